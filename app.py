@@ -1,22 +1,22 @@
 from functools import wraps
-from flask import Flask, request, jsonify, render_template,redirect, session, url_for
+from flask import Flask, request, jsonify, render_template,redirect, session, url_for, Response, stream_with_context
 from xml.etree import ElementTree as ET
-import language_tool_python as lt
-import litellm
 import json
+import hashlib
 import time
 import uuid
+import random
 import os
 import base64
 import requests
 from openai import OpenAI
-import tempfile
 import pandas as pd
 from datetime import datetime
-from pydub import AudioSegment
 import subprocess
 from pathlib import Path
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import atexit
  
 from onelogin.saml2.auth import OneLogin_Saml2_Auth
 from onelogin.saml2.settings import OneLogin_Saml2_Settings
@@ -27,14 +27,42 @@ from utils import (
 )
 # Note: CONNECTION_PAYLOAD from utils is used as default,
 # but can be overridden by config.yaml if needed
-from snowflakeconnection import snowflake_query
+from snowflake_pool import (
+    snowflake_query, snowflake_executemany, snowflake_query_in_chunks, snowflake_query_rows,
+    set_pool_label, pool_stats
+)
+from row_serialization import records, tuple_records
+from audit_writer import AuditWriter
+from id_allocator import SequenceIdAllocator, NoSequenceDefault
+from glossary import GlossaryIndex
+from llm_stream import sse_event, EvaluationStreamParser, RewriteStreamParser
+from llm_gateway import LLMGateway
+from ttl_cache import TTLCache, SharedTTLCache, make_cache_backend
+from eval_cache import EvaluationCache, evaluation_cache_key
+from case_access import CaseAccessIndex
+from case_titles import CaseTitleCache
+from crm_sync import CRMStatusSync
+from input_state import InputStateStore
+from audio_pipeline import AudioTranscoder, AudioError, AudioTooLong, stitch
+from check_cache import ParagraphCheckCache, PARAGRAPH_SEPARATOR
+from lt_pool import LanguageToolPool, backend_urls_from_env
+from lt_client import LanguageToolClient, LanguageToolRequestError
 
 # ==================== EXTERNAL CRM INTEGRATION ====================
 # CRM functions with caching and batch processing optimizations
 
 # CRM Cache for performance optimization
-_crm_cache = {}
+# Bounded LRU with lazy + periodic expiry. Set CRM_CACHE_BACKEND to share entries
+# between gunicorn workers, e.g. "sqlite:////tmp/fsrcoach_cache.db" or "redis://host:6379/0".
 CRM_CACHE_TTL = 300  # 5 minutes
+CRM_CACHE_MAX_SIZE = int(os.environ.get('CRM_CACHE_MAX_SIZE', '10000'))
+try:
+    _crm_cache_backend = make_cache_backend(os.environ.get('CRM_CACHE_BACKEND', ''))
+except Exception as e:
+    print(f"⚠️ [CRM] Shared cache backend unavailable, using per-worker cache only: {e}")
+    _crm_cache_backend = None
+_crm_cache = SharedTTLCache("crm_status", max_size=CRM_CACHE_MAX_SIZE, ttl=CRM_CACHE_TTL,
+                            backend=_crm_cache_backend)
 
 # Default email for non-SSO testing mode
 DEFAULT_TEST_EMAIL = "PRUTHVI.VENKATASEERAMREDDI@KLA.COM"
@@ -79,25 +107,17 @@ def check_external_crm_exists(case_number):
         # Convert case_number to string to match database column type
         case_number_str = str(case_number)
         
-        # Build query with conditional email filtering
+        # With email filtering, ownership is answered from the user's access snapshot
         if CRM_EMAIL_FILTERING_ENABLED:
-            like_pattern = f"%~{user_email_upper}~%"
-            query = """
-                SELECT DISTINCT "Case Number"
-                FROM IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T
-                WHERE "Case Number" IS NOT NULL
-                AND "Case Number" = %s
-                AND "USER_EMAILS" LIKE %s
-            """
-            query_params = (case_number_str, like_pattern)
-        else:
-            query = """
-                SELECT DISTINCT "Case Number"
-                FROM IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T
-                WHERE "Case Number" IS NOT NULL
-                AND "Case Number" = %s
-            """
-            query_params = (case_number_str,)
+            return case_access.can_access(user_email_upper, case_number_str)
+        
+        query = """
+            SELECT DISTINCT "Case Number"
+            FROM IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T
+            WHERE "Case Number" IS NOT NULL
+            AND "Case Number" = %s
+        """
+        query_params = (case_number_str,)
         
         result = snowflake_query(query, CONNECTION_PAYLOAD, query_params)
         
@@ -166,114 +186,85 @@ def check_external_crm_status_batch(case_ids, user_email=None):
     if not case_ids:
         return {}
     
-    current_time = time.time()
     status_map = {}
     uncached_cases = []
     
-    # Check cache first
+    # If user_email is provided, validate that cases belong to the user first.
+    # This is an in-memory check, so it also covers statuses served from the cache.
+    if user_email:
+        user_email_upper = user_email.upper()
+        try:
+            validated_cases = case_access.filter_accessible(user_email_upper, case_ids)
+        except Exception as e:
+            print(f"❌ [CRM] Error loading case access for {user_email_upper}: {e}")
+            validated_cases = []
+        if not validated_cases:
+            print(f"⚠️ [CRM] No cases validated for user {user_email_upper}")
+            return {case_id: "unknown" for case_id in case_ids}
+        case_ids = validated_cases
+    
+    # Check cache first (one batched lookup, including the shared tier if configured)
+    cached_statuses = _crm_cache.get_many(f"crm_status_{case_id}" for case_id in case_ids)
     for case_id in case_ids:
         cache_key = f"crm_status_{case_id}"
-        if (cache_key in _crm_cache and 
-            current_time - _crm_cache[cache_key]['timestamp'] < CRM_CACHE_TTL):
-            status_map[case_id] = _crm_cache[cache_key]['status']
+        if cache_key in cached_statuses:
+            status_map[case_id] = cached_statuses[cache_key]
         else:
             uncached_cases.append(case_id)
     
     # Only query database for uncached cases
     if uncached_cases:
         try:
-            # If user_email is provided, validate that cases belong to the user first
-            if user_email:
-                user_email_upper = user_email.upper()
-                like_pattern = f"%~{user_email_upper}~%"
-                
-                # First, validate that all cases belong to the user
-                case_list = "', '".join(str(case) for case in uncached_cases)
-                validation_query = f"""
-                    SELECT DISTINCT "Case Number" as CASE_NUMBER
-                    FROM IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T
-                    WHERE "Case Number" IS NOT NULL
-                    AND "USER_EMAILS" LIKE %s
-                    AND "Case Number" IN ('{case_list}')
-                """
-                
-                validated_result = snowflake_query(validation_query, CONNECTION_PAYLOAD, (like_pattern,))
-                
-                if validated_result is not None and not validated_result.empty:
-                    validated_cases = set(validated_result["CASE_NUMBER"].astype(str).tolist())
-                    # Filter to only check validated cases
-                    uncached_cases = [case for case in uncached_cases if str(case) in validated_cases]
-                else:
-                    print(f"⚠️ [CRM] No cases validated for user {user_email_upper}")
-                    for case_id in uncached_cases:
-                        status_map[case_id] = "unknown"
-                    return status_map
-            
-            if not uncached_cases:
-                return status_map
-            
-            # Create IN clause for batch query
-            case_ids_str = ','.join([str(cid) for cid in uncached_cases])
-            
             # Optimized batch query to check all cases at once
-            query = f"""
-                SELECT DISTINCT "[Case Number]"
-                FROM GEAR.INSIGHTS.CRMSV_INTERFACE_SAGE_CASE_SUMMARY
-                WHERE "Verify Closure Date/Time" IS NOT NULL
-                AND "Case Creation Date" > DATEADD(YEAR, -1, CURRENT_DATE)
-                AND "[Case Number]" IN ({case_ids_str})
-            """
-            
-            result = snowflake_query(query, PROD_PAYLOAD)
-            
-            # Build status mapping for uncached cases
-            closed_cases = set()
-            
-            if result is not None and not result.empty:
-                closed_cases = set(result["Case Number"].tolist())
+            closed_cases = fetch_closed_crm_cases(uncached_cases)
             
             # Map uncached cases to their status and cache results
+            new_entries = {}
             for case_id in uncached_cases:
-                if case_id in closed_cases:
+                if str(case_id) in closed_cases:
                     status = "closed"
                 else:
                     status = "open"
                 
                 status_map[case_id] = status
-                
-                # Cache the result
-                cache_key = f"crm_status_{case_id}"
-                _crm_cache[cache_key] = {
-                    'status': status,
-                    'timestamp': current_time
-                }
+                new_entries[f"crm_status_{case_id}"] = status
+            
+            # Cache the results
+            _crm_cache.set_many(new_entries)
             
         except Exception as e:
             print(f"❌ [CRM] Error in batch status check: {e}")
             # Check if it's a database access error
             if "Database 'GEAR' does not exist or not authorized" in str(e):
                 print(f"⚠️ [CRM] GEAR database not accessible, defaulting all uncached cases to 'open'")
-                for case_id in uncached_cases:
-                    status_map[case_id] = "open"
-                    # Cache the default result
-                    cache_key = f"crm_status_{case_id}"
-                    _crm_cache[cache_key] = {
-                        'status': "open",
-                        'timestamp': current_time
-                    }
             else:
                 print(f"❌ [CRM] Unexpected error in batch check: {e}")
-                for case_id in uncached_cases:
-                    status_map[case_id] = "open"
-                    # Cache the default result
-                    cache_key = f"crm_status_{case_id}"
-                    _crm_cache[cache_key] = {
-                        'status': "open",
-                        'timestamp': current_time
-                    }
+            for case_id in uncached_cases:
+                status_map[case_id] = "open"
+            # Cache the default result
+            _crm_cache.set_many({f"crm_status_{case_id}": "open" for case_id in uncached_cases})
     
     return status_map
 
+def fetch_closed_crm_cases(case_ids):
+    """
+    Which of case_ids are closed in the external CRM (one query for the batch).
+    Returns a set of case numbers as strings.
+    """
+    query = """
+        SELECT DISTINCT "[Case Number]" AS CASE_NUMBER
+        FROM GEAR.INSIGHTS.CRMSV_INTERFACE_SAGE_CASE_SUMMARY
+        WHERE "Verify Closure Date/Time" IS NOT NULL
+        AND "Case Creation Date" > DATEADD(YEAR, -1, CURRENT_DATE)
+        AND "[Case Number]" IN ({in_list})
+    """
+    
+    result = snowflake_query_in_chunks(query, PROD_PAYLOAD, [str(cid) for cid in case_ids])
+    
+    if result is not None and not result.empty:
+        return set(result["CASE_NUMBER"].astype(str).tolist())
+    return set()
+
 def get_external_case_id(case_number):
     """
     Get external case ID from CRM.
@@ -281,84 +272,37 @@ def get_external_case_id(case_number):
     """
     return case_number
 
-def get_available_case_numbers():
-    """
-    Get list of available case numbers for the current user from CRM.
-    Used to suggest case numbers when creating a new case.
-    """
-    try:
-        # Get user email with fallback to default test email
-        user_email_upper = get_user_email_for_crm()
-        # Query 1: Get available case numbers (email restriction commented out for testing)
-        # Email restriction for production
-        like_pattern = f"%~{user_email_upper}~%"
-        
-        query = """
-            SELECT DISTINCT "Case Number"
-            FROM IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T
-            WHERE "Case Number" IS NOT NULL
-            AND "USER_EMAILS" LIKE %s
-            ORDER BY "Case Number" DESC
-        """
-        
-        result = snowflake_query(query, CONNECTION_PAYLOAD, (like_pattern,))
-        
-        if result is not None and not result.empty:
-            case_numbers = result["Case Number"].tolist()
-            return case_numbers
-        else:
-            return []
-            
-    except Exception as e:
-        print(f"❌ [CRM] Error getting available case numbers: {e}")
-        # Check if it's a database access error
-        if "Database 'IT_SF_SHARE_REPLICA' does not exist or not authorized" in str(e):
-            print(f"⚠️ [CRM] IT_SF_SHARE_REPLICA database not accessible, returning empty list")
-            return []
-        else:
-            print(f"❌ [CRM] Unexpected error getting case numbers: {e}")
-            return []
-
 import yaml
 from werkzeug.middleware.proxy_fix import ProxyFix
-# --- Start / connect to your running LanguageTool server ---------------
-# Make sure the server is already running:
+# --- Connect to the running LanguageTool server(s) -----------------------
+# scripts/start.sh starts LT_INSTANCES local servers on consecutive ports from LT_PORT;
+# LT_URLS (comma-separated) points at external servers instead. Checks go to the
+# least busy healthy server; failing servers are ejected and probed until they recover.
 #   $ java -cp "*" org.languagetool.server.HTTPServer --port 8081
-# Initialize LanguageTool with retry logic to handle startup delays
-_tool = None
-def get_language_tool():
-    """Get LanguageTool instance with lazy initialization and retry logic."""
-    global _tool
-    if _tool is not None:
-        return _tool
-    
-    LT_PORT = os.environ.get('LT_PORT', '8081')
-    LT_URL = f"http://localhost:{LT_PORT}"
-    max_retries = 5
-    retry_delay = 2
-    
-    for attempt in range(max_retries):
-        try:
-            _tool = lt.LanguageTool('en-US', remote_server=LT_URL)
-            return _tool
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"⚠️ Failed to connect to LanguageTool (attempt {attempt + 1}/{max_retries}): {e}")
-                print(f"   Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                print(f"❌ Failed to connect to LanguageTool after {max_retries} attempts: {e}")
-                raise
-    
-    return _tool
+# Rule selection for every check (comma-separated IDs), e.g. to keep slow or noisy rules
+# off the hot path: LT_DISABLED_RULES, LT_DISABLED_CATEGORIES, LT_ENABLED_RULES and
+# LT_ENABLED_ONLY=1 (run only LT_ENABLED_RULES).
+def _env_list(name):
+    return [v.strip() for v in os.environ.get(name, '').split(',') if v.strip()]
+
+def _languagetool_client(url):
+    return LanguageToolClient(
+        url, 'en-US',
+        disabled_rules=_env_list('LT_DISABLED_RULES'),
+        disabled_categories=_env_list('LT_DISABLED_CATEGORIES'),
+        enabled_rules=_env_list('LT_ENABLED_RULES'),
+        enabled_only=os.environ.get('LT_ENABLED_ONLY', '').lower() in ('1', 'true'),
+        timeout=float(os.environ.get('LT_TIMEOUT', '10')),
+        max_replacements=int(os.environ.get('LT_MAX_REPLACEMENTS', '5'))
+    )
 
-# Try to initialize LanguageTool at module load, but don't fail if it's not ready yet
-try:
-    tool = get_language_tool()
-except Exception as e:
-    print(f"⚠️ LanguageTool not ready at module load: {e}")
-    print("   Will retry on first use...")
-    tool = None
+languagetool = LanguageToolPool(
+    backend_urls_from_env(),
+    _languagetool_client,
+    eject_after=int(os.environ.get('LT_EJECT_AFTER', '3')),
+    health_interval=int(os.environ.get('LT_HEALTH_INTERVAL', '10')),
+    client_errors=(LanguageToolRequestError,)
+)
 # -----------------------------------------------------------------------
 
 app = Flask(__name__)
@@ -477,6 +421,87 @@ except Exception as e:
     print(f"🔗 Full Path: {DATABASE}.{SCHEMA}")
     print("=" * 80)
 
+# Name the per-worker Snowflake connection pools so /metrics is readable
+set_pool_label(CONNECTION_PAYLOAD, "CONNECTION_PAYLOAD")
+set_pool_label(PROD_PAYLOAD, "PROD_PAYLOAD")
+
+# Per-user snapshot of authorized CRM case numbers; every ownership check reads it
+# instead of scanning the row-level-security table (see case_access.py)
+case_access = CaseAccessIndex(
+    snowflake_query, CONNECTION_PAYLOAD,
+    "IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T",
+    ttl=int(os.environ.get('CASE_ACCESS_TTL', '300')),
+    max_users=int(os.environ.get('CASE_ACCESS_MAX_USERS', '2000'))
+)
+
+# Problem statement / FSR notes per (user, case) with memoized CASE_SESSIONS IDs.
+# Concurrent autosaves are collected for INPUT_STATE_FLUSH_INTERVAL seconds and
+# committed as one multi-row MERGE (0 = MERGE on every save); each save returns only
+# once committed. Reads always go to Snowflake (one query), so every worker sees it.
+input_states = InputStateStore(
+    snowflake_query, CONNECTION_PAYLOAD, DATABASE, SCHEMA,
+    session_ttl=int(os.environ.get('CASE_SESSION_ID_TTL', '3600')),
+    max_size=int(os.environ.get('CASE_SESSION_ID_MAX_SIZE', '5000')),
+    flush_interval=float(os.environ.get('INPUT_STATE_FLUSH_INTERVAL', '0.2')),
+    flush_batch=int(os.environ.get('INPUT_STATE_FLUSH_BATCH', '500')),
+    commit_timeout=float(os.environ.get('INPUT_STATE_COMMIT_TIMEOUT', '30'))
+)
+atexit.register(input_states.close)
+
+# ==================== CRM STATUS SYNC ====================
+# One process per host (flock leader election) periodically checks every open case
+# session against the CRM in chunks and stores the result in CASE_SESSIONS
+# (CRM_NEEDS_FEEDBACK, CRM_STATUS_SYNC_TIME, CRM_LAST_SYNC_TIME); /api/cases/check-external-status
+# reads those rows and only asks the CRM itself about cases whose status was not synced
+# within CRM_SYNC_MAX_AGE seconds. The columns are added by schema_migrations.py at startup.
+# See crm_sync.py.
+CRM_SYNC_ENABLED = os.environ.get('CRM_SYNC_ENABLED', '1').lower() not in ('0', 'false', 'no')
+CRM_SYNC_INTERVAL = int(os.environ.get('CRM_SYNC_INTERVAL', '300'))  # seconds
+CRM_SYNC_CHUNK_SIZE = int(os.environ.get('CRM_SYNC_CHUNK_SIZE', '1000'))
+CRM_SYNC_MAX_AGE = int(os.environ.get('CRM_SYNC_MAX_AGE', str(2 * CRM_SYNC_INTERVAL)))  # seconds
+
+def list_open_case_ids():
+    result = snowflake_query(f"""
+        SELECT DISTINCT CASE_ID
+        FROM {DATABASE}.{SCHEMA}.CASE_SESSIONS
+        WHERE CASE_STATUS = 'open'
+    """, CONNECTION_PAYLOAD)
+    if result is None or result.empty:
+        return []
+    return result["CASE_ID"].astype(str).tolist()
+
+def apply_crm_statuses(case_ids, closed_ids):
+    """Record one sync chunk: flag cases closed in the CRM, stamp the sync time on all of them."""
+    case_placeholders = ", ".join(["%s"] * len(case_ids))
+    if closed_ids:
+        closed_list = sorted(closed_ids)
+        needs_feedback = f"CASE_ID IN ({', '.join(['%s'] * len(closed_list))})"
+    else:
+        closed_list = []
+        needs_feedback = "FALSE"
+    snowflake_query(f"""
+        UPDATE {DATABASE}.{SCHEMA}.CASE_SESSIONS
+        SET CRM_NEEDS_FEEDBACK = {needs_feedback}, CRM_STATUS_SYNC_TIME = CURRENT_TIMESTAMP(),
+            CRM_LAST_SYNC_TIME = CURRENT_TIMESTAMP()
+        WHERE CASE_STATUS = 'open' AND CASE_ID IN ({case_placeholders})
+    """, CONNECTION_PAYLOAD, tuple(closed_list) + tuple(case_ids), return_df=False)
+    # Keep the request-time status cache in line with what was just synced
+    _crm_cache.set_many({
+        f"crm_status_{case_id}": "closed" if case_id in closed_ids else "open"
+        for case_id in case_ids
+    })
+
+crm_sync = CRMStatusSync(
+    list_open_case_ids, fetch_closed_crm_cases, apply_crm_statuses,
+    interval=CRM_SYNC_INTERVAL, chunk_size=CRM_SYNC_CHUNK_SIZE,
+    lock_path=os.environ.get('CRM_SYNC_LOCK_PATH', '/tmp/fsrcoach_crm_sync.lock')
+)
+if CRM_SYNC_ENABLED:
+    crm_sync.start()
+
+# Case-number autocomplete paging
+SUGGESTION_PAGE_MAX = int(os.environ.get('SUGGESTION_PAGE_MAX', '50'))
+SUGGESTION_PRELOAD_PAGE_SIZE = int(os.environ.get('SUGGESTION_PRELOAD_PAGE_SIZE', '500'))
  
 openai_api_key = "EMPTY"
 openai_api_base = "http://ca1pgpu02:8081/v1"
@@ -632,6 +657,35 @@ def health_check():
         "timestamp": datetime.utcnow().isoformat()
     }), 200
 
+@app.route('/metrics')
+def metrics():
+    """
+    Per-worker runtime metrics (connection pools, in-process indexes and caches).
+    Each gunicorn worker reports its own numbers.
+    """
+    return jsonify({
+        "pid": os.getpid(),
+        "snowflake_pool": pool_stats(),
+        "glossary": glossary.stats(),
+        "caches": {
+            "ruleset": _ruleset_cache.stats(),
+            "crm_status": _crm_cache.stats(),
+            "evaluation": evaluation_cache.stats(),
+            "case_access": case_access.stats(),
+            "case_titles": case_titles.stats(),
+            "input_state": input_states.stats(),
+            "check_paragraphs": check_cache.stats()
+        },
+        "audit_writer": audit_writer.stats(),
+        "llm_gateway": llm_gateway.stats(),
+        "languagetool": languagetool.stats(),
+        "crm_sync": crm_sync.stats(),
+        "id_allocators": {
+            "user_session_inputs": user_input_ids.stats(),
+            "llm_evaluation": evaluation_ids.stats()
+        }
+    }), 200
+
 @app.route('/')
 def index():
     user_data = session.get('user_data')
@@ -754,20 +808,17 @@ def get_user_cases():
         result = snowflake_query(query, CONNECTION_PAYLOAD, (user_id, user_id))
         
         cases = []
-        if result is not None and not result.empty:
-            for _, row in result.iterrows():
-                case_title = row.get("CASE_TITLE")
-                last_accessed_at = row.get("LAST_ACCESSED_AT")
-                case_info = {
-                    "case_id": row["CASE_ID"],
-                    "case_status": row["CASE_STATUS"],
-                    "case_title": case_title if case_title and pd.notna(case_title) else None,
-                    "last_sync_time": row["CRM_LAST_SYNC_TIME"],
-                    "last_accessed_at": last_accessed_at.isoformat() if last_accessed_at and pd.notna(last_accessed_at) else None,
-                    "is_closed": row["CASE_STATUS"] == "closed",
-                    "needs_feedback": False  # Will be determined by external CRM check
-                }
-                cases.append(case_info)
+        for row in records(result, timestamps=("LAST_ACCESSED_AT",)):
+            case_info = {
+                "case_id": row["CASE_ID"],
+                "case_status": row["CASE_STATUS"],
+                "case_title": row["CASE_TITLE"] or None,
+                "last_sync_time": row["CRM_LAST_SYNC_TIME"],
+                "last_accessed_at": row["LAST_ACCESSED_AT"],
+                "is_closed": row["CASE_STATUS"] == "closed",
+                "needs_feedback": False  # Will be determined by external CRM check
+            }
+            cases.append(case_info)
         
         response_data = {
             "user_id": user_id,
@@ -798,6 +849,11 @@ def check_external_crm_status():
     Check external CRM status for user's open cases.
     Returns cases that are closed in external CRM but still open in database.
     These cases need feedback from the user.
+    
+    The CRM itself is polled by the background status sync (crm_sync.py) and
+    the flags it recorded in CASE_SESSIONS are used for recently synced cases.
+    Cases the sync has not covered recently (sync disabled or behind, case
+    opened since the last run, column not migrated yet) are checked live.
     """
     user_data = session.get('user_data')
     if not user_data:
@@ -807,39 +863,57 @@ def check_external_crm_status():
     user_id = user_data.get('user_id')
     # Get user email with fallback to default test email
     user_email_upper = get_user_email_for_crm()
-    print(f"🚀 [Backend] /api/cases/check-external-status: Checking external CRM for user {user_id}")
     
     try:
-        # Get all open cases for the user
-        query = f"""
-            SELECT CASE_ID, CASE_STATUS, CASE_TITLE, CRM_LAST_SYNC_TIME
-            FROM {DATABASE}.{SCHEMA}.CASE_SESSIONS 
-            WHERE CREATED_BY_USER = %s AND CASE_STATUS = 'open'
-        """
-        result = snowflake_query(query, CONNECTION_PAYLOAD, (user_id,))
-        
+        rows = None
+        if CRM_SYNC_ENABLED:
+            # Open cases with the synced flag and whether that sync is recent enough to trust.
+            # CRM_STATUS_SYNC_TIME is only written by the status sync (CRM_LAST_SYNC_TIME is
+            # also stamped on case creation and title updates)
+            query = f"""
+                SELECT CASE_ID, CASE_STATUS, CRM_LAST_SYNC_TIME, CRM_NEEDS_FEEDBACK,
+                       COALESCE(CRM_STATUS_SYNC_TIME >= DATEADD(SECOND, -%s, CURRENT_TIMESTAMP()), FALSE) AS SYNC_FRESH
+                FROM {DATABASE}.{SCHEMA}.CASE_SESSIONS
+                WHERE CREATED_BY_USER = %s AND CASE_STATUS = 'open'
+            """
+            try:
+                result = snowflake_query(query, CONNECTION_PAYLOAD, (CRM_SYNC_MAX_AGE, user_id))
+                rows = result.to_dict('records') if result is not None and not result.empty else []
+            except Exception as e:
+                if "invalid identifier" not in str(e).lower():
+                    raise
+                print(f"⚠️ [CRM] CRM status sync columns missing (run schema_migrations.py), checking the CRM directly: {e}")
+        if rows is None:
+            query = f"""
+                SELECT CASE_ID, CASE_STATUS, CRM_LAST_SYNC_TIME, FALSE AS CRM_NEEDS_FEEDBACK, FALSE AS SYNC_FRESH
+                FROM {DATABASE}.{SCHEMA}.CASE_SESSIONS
+                WHERE CREATED_BY_USER = %s AND CASE_STATUS = 'open'
+            """
+            result = snowflake_query(query, CONNECTION_PAYLOAD, (user_id,))
+            rows = result.to_dict('records') if result is not None and not result.empty else []
+
+        closed_rows = [r for r in rows if r["SYNC_FRESH"] and r["CRM_NEEDS_FEEDBACK"]]
+        # Only report cases the user still has access to in the CRM
+        if CRM_EMAIL_FILTERING_ENABLED and closed_rows:
+            accessible = set(case_access.filter_accessible(user_email_upper, [str(r["CASE_ID"]) for r in closed_rows]))
+            closed_rows = [r for r in closed_rows if str(r["CASE_ID"]) in accessible]
+
+        stale_rows = [r for r in rows if not r["SYNC_FRESH"]]
+        if stale_rows:
+            external_statuses = check_external_crm_status_batch(
+                [r["CASE_ID"] for r in stale_rows],
+                user_email=user_email_upper if CRM_EMAIL_FILTERING_ENABLED else None)
+            closed_rows += [r for r in stale_rows if external_statuses.get(r["CASE_ID"]) == "closed"]
+
         cases_needing_feedback = []
-        if result is not None and not result.empty:
-            
-            # Extract case IDs for batch processing
-            case_ids = [row["CASE_ID"] for _, row in result.iterrows()]
-            
-            # Batch check external CRM status for all cases at once (with email filtering)
-            external_statuses = check_external_crm_status_batch(case_ids, user_email=user_email_upper)
-            
-            for _, row in result.iterrows():
-                case_id = row["CASE_ID"]
-                external_status = external_statuses.get(case_id, "open")  # Default to open if not found
-                
-                # If case is closed in external CRM but open in database, needs feedback
-                if external_status == "closed":
-                    cases_needing_feedback.append({
-                        "case_id": case_id,
-                        "case_status": row["CASE_STATUS"],
-                        "last_sync_time": row["CRM_LAST_SYNC_TIME"],
-                        "external_status": external_status,
-                        "needs_feedback": True
-                    })
+        for row in closed_rows:
+            cases_needing_feedback.append({
+                "case_id": row["CASE_ID"],
+                "case_status": row["CASE_STATUS"],
+                "last_sync_time": row["CRM_LAST_SYNC_TIME"],
+                "external_status": "closed",
+                "needs_feedback": True
+            })
         
         response_data = {
             "user_id": user_id,
@@ -911,22 +985,20 @@ def get_user_case_data():
         if cases_result is not None and not cases_result.empty:
             # Group by case_id to handle multiple FSR line items per case
             case_data = {}
-            for idx, row in cases_result.iterrows():
+            updated_at = datetime.utcnow().isoformat() + 'Z'
+            for row in records(cases_result, timestamps=("LAST_ACCESSED_AT",)):
                 case_id = row["CASE_ID"]
-                case_title = row.get("CASE_TITLE")
-                last_accessed_at = row.get("LAST_ACCESSED_AT")
-                problem_statement = row["PROBLEM_STATEMENT"] or ""
                 fsr_notes = row["FSR_NOTES"] or ""
-                line_item_id = row["FSR_LINE_ITEM_ID"]
+                line_item_id = row["FSR_LINE_ITEM_ID"] or 0
                 
                 if case_id not in case_data:
                     case_data[case_id] = {
                         "caseNumber": case_id,
-                        "caseTitle": case_title if case_title and pd.notna(case_title) else None,
-                        "problemStatement": problem_statement,
+                        "caseTitle": row["CASE_TITLE"] or None,
+                        "problemStatement": row["PROBLEM_STATEMENT"] or "",
                         "fsrNotes": "",
-                        "updatedAt": datetime.utcnow().isoformat() + 'Z',
-                        "lastAccessedAt": last_accessed_at.isoformat() if last_accessed_at and pd.notna(last_accessed_at) else None
+                        "updatedAt": updated_at,
+                        "lastAccessedAt": row["LAST_ACCESSED_AT"]
                     }
                 
                 # Use the last FSR line item (highest LINE_ITEM_ID)
@@ -960,6 +1032,151 @@ def get_user_case_data():
             print(f"❌ [Backend] Unexpected database error for user {user_id}: {e}")
             return jsonify({"error": "Database error occurred"}), 500
 
+@app.route('/api/cases/dashboard', methods=['GET'])
+def get_cases_dashboard():
+    """
+    Everything the case sidebar needs in one round trip: the user's open cases
+    with titles, latest problem statement / FSR notes, review state and the
+    needs-feedback flag from the CRM status sync.
+    
+    Replaces the /api/cases/user-cases + /api/cases/data pair on page load.
+    The response carries an ETag, so an unchanged dashboard costs a 304.
+    """
+    user_data = session.get('user_data')
+    if not user_data:
+        print("❌ [Backend] /api/cases/dashboard: Not authenticated")
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    user_id = user_data.get('user_id')
+    
+    try:
+        # Restrict to the user's sessions first, then pick the latest input per
+        # (session, field) - instead of ranking the whole LAST_INPUT_STATE table.
+        # {needs_feedback} is the CRM_NEEDS_FEEDBACK column, or FALSE while
+        # schema_migrations.py has not added it yet.
+        query = f"""
+            WITH user_sessions AS (
+                SELECT ID, CASE_ID, CASE_STATUS, CASE_TITLE, CREATION_TIME,
+                       CRM_LAST_SYNC_TIME, LAST_ACCESSED_AT, {{needs_feedback}} AS CRM_NEEDS_FEEDBACK
+                FROM {DATABASE}.{SCHEMA}.CASE_SESSIONS
+                WHERE CREATED_BY_USER = %s AND CASE_STATUS = 'open'
+            ),
+            latest_input_state AS (
+                SELECT lis.CASE_SESSION_ID, lis.INPUT_FIELD_ID, lis.INPUT_FIELD_VALUE,
+                       lis.LINE_ITEM_ID, lis.LAST_UPDATED
+                FROM {DATABASE}.{SCHEMA}.LAST_INPUT_STATE lis
+                JOIN user_sessions us ON lis.CASE_SESSION_ID = us.ID
+                WHERE lis.INPUT_FIELD_ID IN (1, 2)
+                QUALIFY ROW_NUMBER() OVER (
+                    PARTITION BY lis.CASE_SESSION_ID, lis.INPUT_FIELD_ID
+                    ORDER BY lis.LAST_UPDATED DESC, lis.LINE_ITEM_ID DESC
+                ) = 1
+            ),
+            reviewed AS (
+                SELECT DISTINCT CASE_ID
+                FROM {DATABASE}.{SCHEMA}.CASE_REVIEW
+                WHERE USER_ID = %s
+            )
+            SELECT
+                us.CASE_ID,
+                us.CASE_STATUS,
+                us.CASE_TITLE,
+                us.CREATION_TIME,
+                us.CRM_LAST_SYNC_TIME,
+                us.LAST_ACCESSED_AT,
+                us.CRM_NEEDS_FEEDBACK,
+                r.CASE_ID IS NOT NULL AS REVIEWED,
+                lis_problem.INPUT_FIELD_VALUE AS PROBLEM_STATEMENT,
+                lis_problem.LAST_UPDATED AS PROBLEM_LAST_UPDATED,
+                lis_fsr.INPUT_FIELD_VALUE AS FSR_NOTES,
+                lis_fsr.LINE_ITEM_ID AS FSR_LINE_ITEM_ID,
+                lis_fsr.LAST_UPDATED AS FSR_LAST_UPDATED
+            FROM user_sessions us
+            LEFT JOIN latest_input_state lis_problem
+                ON lis_problem.CASE_SESSION_ID = us.ID AND lis_problem.INPUT_FIELD_ID = 1
+            LEFT JOIN latest_input_state lis_fsr
+                ON lis_fsr.CASE_SESSION_ID = us.ID AND lis_fsr.INPUT_FIELD_ID = 2
+            LEFT JOIN reviewed r ON r.CASE_ID = us.CASE_ID
+            ORDER BY us.CASE_ID, lis_fsr.LINE_ITEM_ID
+        """
+        try:
+            result = snowflake_query(query.format(needs_feedback="CRM_NEEDS_FEEDBACK"),
+                                     CONNECTION_PAYLOAD, (user_id, user_id))
+        except Exception as e:
+            if "invalid identifier" not in str(e).lower():
+                raise
+            print(f"⚠️ [Backend] CRM_NEEDS_FEEDBACK missing (run schema_migrations.py), dashboard without it: {e}")
+            result = snowflake_query(query.format(needs_feedback="FALSE"), CONNECTION_PAYLOAD, (user_id, user_id))
+        
+        cases = {}
+        rows = records(result, timestamps=("CREATION_TIME", "CRM_LAST_SYNC_TIME", "LAST_ACCESSED_AT",
+                                           "PROBLEM_LAST_UPDATED", "FSR_LAST_UPDATED"))
+        for row in rows:
+            case_id = row["CASE_ID"]
+            # ISO strings of one timestamp type compare chronologically
+            updated = [t for t in (row["PROBLEM_LAST_UPDATED"], row["FSR_LAST_UPDATED"], row["CREATION_TIME"]) if t]
+            entry = cases.get(case_id)
+            if entry is None:
+                entry = cases[case_id] = {
+                    "caseNumber": case_id,
+                    "caseTitle": row["CASE_TITLE"] or None,
+                    "caseStatus": row["CASE_STATUS"],
+                    "problemStatement": row["PROBLEM_STATEMENT"] or "",
+                    "fsrNotes": "",
+                    "updatedAt": max(updated) if updated else None,
+                    "lastAccessedAt": row["LAST_ACCESSED_AT"],
+                    "lastSyncTime": row["CRM_LAST_SYNC_TIME"],
+                    "needsFeedback": bool(row["CRM_NEEDS_FEEDBACK"]) and not row["REVIEWED"],
+                    "reviewed": bool(row["REVIEWED"])
+                }
+            
+            # Use the last FSR line item (highest LINE_ITEM_ID)
+            fsr_notes = row["FSR_NOTES"] or ""
+            line_item_id = row["FSR_LINE_ITEM_ID"] or 0
+            if fsr_notes and (not entry["fsrNotes"] or line_item_id > entry.get("lastLineItemId", 0)):
+                entry["fsrNotes"] = fsr_notes
+                entry["lastLineItemId"] = line_item_id
+        
+        # Fill missing titles from the CRM title cache (written back to CASE_SESSIONS by it)
+        missing_titles = [str(case_id) for case_id, entry in cases.items() if not entry["caseTitle"]]
+        if missing_titles:
+            try:
+                titles = get_case_titles_batch(missing_titles, get_user_email_for_crm())
+                for case_id, entry in cases.items():
+                    if not entry["caseTitle"]:
+                        entry["caseTitle"] = titles.get(str(case_id))
+            except Exception as e:
+                print(f"⚠️ [Backend] Could not fill case titles for dashboard: {e}")
+        
+        payload = {
+            "user_id": str(user_id),
+            "cases": cases,
+            "count": len(cases),
+            "needs_feedback": [case_id for case_id, entry in cases.items() if entry["needsFeedback"]]
+        }
+        etag = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        
+        # Let the browser revalidate with If-None-Match and get a 304 when unchanged
+        response = jsonify(payload)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
+        
+    except Exception as e:
+        print(f"❌ [Backend] Error building case dashboard for user {user_id}: {e}")
+        # Check if it's a table not found error
+        if "does not exist" in str(e) or "not found" in str(e):
+            print(f"⚠️ [Backend] Database tables not found, returning empty dashboard for user {user_id}")
+            return jsonify({
+                "user_id": str(user_id),
+                "cases": {},
+                "count": 0,
+                "needs_feedback": [],
+                "message": "Database tables not yet created"
+            })
+        else:
+            return jsonify({"error": "Database error occurred"}), 500
+
 @app.route('/api/cases/data/<case_number>', methods=['GET'])
 def get_case_data(case_number):
     """
@@ -992,10 +1209,29 @@ def get_case_data(case_number):
 
 # Removed: /api/cases/data POST - No longer needed, individual cases handled by database endpoints
 
+def _page_args(default_limit, max_limit):
+    """Read offset/limit query parameters, clamped to sane bounds."""
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        offset = 0
+    try:
+        limit = int(request.args.get('limit', default_limit))
+    except ValueError:
+        limit = default_limit
+    return offset, min(max(1, limit), max_limit)
+
+def _next_offset(offset, page, total):
+    if total is None:
+        return offset + len(page) if page else None
+    return offset + len(page) if offset + len(page) < total else None
+
 @app.route('/api/cases/suggestions/preload', methods=['GET'])
 def preload_case_suggestions():
     """
-    Preload all available case numbers for fast suggestions.
+    Page through the user's available case numbers (newest first).
+    Also warms the server-side suggestion index, so the first
+    /api/cases/suggestions keystroke is answered from memory.
     """
     user_data = session.get('user_data')
     if not user_data:
@@ -1004,21 +1240,21 @@ def preload_case_suggestions():
     
     # Get user email with fallback to default test email
     user_email_upper = get_user_email_for_crm()
-    user_email = user_email_upper.lower()  # For display purposes
+    offset, limit = _page_args(SUGGESTION_PRELOAD_PAGE_SIZE, SUGGESTION_PRELOAD_PAGE_SIZE)
     try:
-        # Get ALL case numbers (no search filter, no limit - get all cases)
         # IMPORTANT: This function filters by email - only cases matching user_email_upper will be returned
-        # No limit is applied - we fetch all matching cases regardless of count
-        case_numbers = get_available_case_numbers(user_email_upper, "", limit=None)
-        total_cases = len(case_numbers)
+        case_numbers, total = get_available_case_numbers(user_email_upper, "", limit=limit, offset=offset)
         
-        if total_cases == 0:
+        if total == 0:
             print(f"⚠️ [CRM] No cases found in CRM database for preloading for user {user_email_upper}")
         
         return jsonify({
             "success": True,
             "case_numbers": case_numbers,
             "count": len(case_numbers),
+            "total": total,
+            "offset": offset,
+            "next_offset": _next_offset(offset, case_numbers, total),
             "filtered_by_email": user_email_upper
         })
         
@@ -1030,7 +1266,8 @@ def preload_case_suggestions():
 def get_case_suggestions():
     """
     Get available case numbers from CRM to suggest to users.
-    Returns list of case numbers the user has access to.
+    Returns one page of case numbers the user has access to matching ?q=
+    (prefix matches first), with case titles attached unless ?titles=0.
     """
     user_data = session.get('user_data')
     if not user_data:
@@ -1039,18 +1276,27 @@ def get_case_suggestions():
     
     # Get user email with fallback to default test email
     user_email_upper = get_user_email_for_crm()
-    user_email = user_email_upper.lower()  # For display purposes
     
     # Get search query parameter for filtering
     search_query = request.args.get('q', '').strip()
+    offset, limit = _page_args(10, SUGGESTION_PAGE_MAX)
+    include_titles = request.args.get('titles', '1').lower() not in ('0', 'false', 'no')
     
     try:
-        case_numbers = get_available_case_numbers(user_email_upper, search_query, limit=10)
+        case_numbers, total = get_available_case_numbers(user_email_upper, search_query, limit=limit, offset=offset)
+        titles = get_case_titles_batch(case_numbers, user_email_upper) if include_titles and case_numbers else {}
         
         return jsonify({
             "success": True,
             "case_numbers": case_numbers,
+            "suggestions": [
+                {"case_number": case_number, "title": titles.get(str(case_number))}
+                for case_number in case_numbers
+            ],
             "count": len(case_numbers),
+            "total": total,
+            "offset": offset,
+            "next_offset": _next_offset(offset, case_numbers, total),
             "search_query": search_query
         })
         
@@ -1281,64 +1527,58 @@ def update_last_accessed_at():
 
 # ==================== CRM INTEGRATION FUNCTIONS ====================
 
-def get_available_case_numbers(user_email, search_query="", limit=10):
+def get_available_case_numbers(user_email, search_query="", limit=10, offset=0):
     """
-    CRM Query 1: Get available case numbers for suggestions
-    Use this in: /api/cases/suggestions
+    CRM Query 1: Get one page of available case numbers for suggestions
+    Use this in: /api/cases/suggestions, /api/cases/suggestions/preload
+    
+    Returns (case_numbers, total). Prefix matches come first, then other
+    substring matches, newest first. total is None when it is not known
+    (email filtering disabled); callers then page until a short page.
     """
     try:
         if CRM_EMAIL_FILTERING_ENABLED:
             if not user_email:
                 print("❌ [CRM] No user email provided for case number query")
-                return []
+                return [], 0
             
-            # Convert email to uppercase to match CRM format
-            user_email_upper = user_email.upper()
-            like_pattern = f"%~{user_email_upper}~%"
-            
-            # Base query with email restriction - STRICTLY filter by user email
-            # The USER_EMAILS column contains emails in format: ~EMAIL1~EMAIL2~EMAIL3~
-            # We use LIKE pattern %~EMAIL~% to match emails in the delimited list
-            base_query = """
-                SELECT DISTINCT "Case Number" as CASE_NUMBER
-                FROM IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T
-                WHERE "Case Number" IS NOT NULL
-                AND "USER_EMAILS" LIKE %s
-            """
-            query_params = [like_pattern]
-        else:
-            # No email filtering - get all cases
-            base_query = """
-                SELECT DISTINCT "Case Number" as CASE_NUMBER
-                FROM IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T
-                WHERE "Case Number" IS NOT NULL
-            """
-            query_params = []
+            # STRICTLY filter by user email: served from the suggestion index of the
+            # user's access snapshot (see case_access.py / case_suggestions.py)
+            index = case_access.snapshot(user_email.upper()).suggestions
+            return index.search(search_query, offset=offset, limit=limit)
+        
+        # No email filtering - get all cases
+        base_query = """
+            SELECT DISTINCT "Case Number" as CASE_NUMBER
+            FROM IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T
+            WHERE "Case Number" IS NOT NULL
+        """
+        query_params = []
         
         # Add search filtering if provided
         if search_query:
-            base_query += f' AND "Case Number" LIKE \'%{search_query}%\''
+            base_query += ' AND "Case Number" LIKE %s'
+            query_params.append(f"%{search_query}%")
         
-        # Add limit only if specified (for suggestions, not preloading)
-        # When limit=None, fetch ALL cases - no LIMIT clause added to SQL
+        base_query += ' ORDER BY "Case Number" DESC'
         if limit is not None:
-            base_query += f" ORDER BY \"Case Number\" DESC LIMIT {limit}"
-        else:
-            base_query += " ORDER BY \"Case Number\" DESC"
+            base_query += " LIMIT %s OFFSET %s"
+            query_params.extend([int(limit), int(offset)])
         
         result = snowflake_query(base_query, CONNECTION_PAYLOAD, tuple(query_params))
         
         if result is not None and not result.empty:
-            case_numbers = result["CASE_NUMBER"].tolist()
-            return case_numbers
+            case_numbers = result["CASE_NUMBER"].astype(str).tolist()
         else:
-            return []
+            case_numbers = []
+        total = None if limit is not None and len(case_numbers) == limit else offset + len(case_numbers)
+        return case_numbers, total
             
     except Exception as e:
         print(f"❌ [CRM] Error getting available case numbers: {e}")
         import traceback
         traceback.print_exc()
-        return []
+        return [], 0
 
 def check_case_status_batch(case_numbers, user_email=None):
     """
@@ -1356,24 +1596,11 @@ def check_case_status_batch(case_numbers, user_email=None):
         # If email filtering is enabled and user_email is provided, validate that cases belong to the user first
         if CRM_EMAIL_FILTERING_ENABLED and user_email:
             user_email_upper = user_email.upper()
-            like_pattern = f"%~{user_email_upper}~%"
-            
-            # First, validate that all cases belong to the user
-            case_list = "', '".join(str(case) for case in case_numbers)
-            validation_query = f"""
-                SELECT DISTINCT "Case Number" as CASE_NUMBER
-                FROM IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T
-                WHERE "Case Number" IS NOT NULL
-                AND "USER_EMAILS" LIKE %s
-                AND "Case Number" IN ('{case_list}')
-            """
-            
-            validated_result = snowflake_query(validation_query, CONNECTION_PAYLOAD, (like_pattern,))
             
-            if validated_result is not None and not validated_result.empty:
-                validated_cases = set(validated_result["CASE_NUMBER"].astype(str).tolist())
-                # Filter to only check validated cases
-                case_numbers = [case for case in case_numbers if str(case) in validated_cases]
+            # First, validate that all cases belong to the user (in-memory access snapshot)
+            validated_cases = case_access.filter_accessible(user_email_upper, case_numbers)
+            if validated_cases:
+                case_numbers = validated_cases
             else:
                 print(f"⚠️ [CRM] No cases validated for user {user_email_upper}")
                 return {case_num: 'unknown' for case_num in case_numbers}
@@ -1381,27 +1608,24 @@ def check_case_status_batch(case_numbers, user_email=None):
         if not case_numbers:
             return {}
         
-        # Create IN clause for batch query
-        case_list = "', '".join(str(case) for case in case_numbers)
-        
-        query = f"""
+        # Bound, chunked IN list (see snowflake_query_in_chunks)
+        query = """
             SELECT DISTINCT "[Case Number]" AS "Case Number"
             FROM GEAR.INSIGHTS.CRMSV_INTERFACE_SAGE_CASE_SUMMARY 
             WHERE "Verify Closure Date/Time" IS NULL 
             AND "Case Creation Date" > DATEADD(YEAR, -1, CURRENT_DATE)
-            AND "[Case Number]" IN ('{case_list}')
-            ORDER BY "[Case Number]" DESC
+            AND "[Case Number]" IN ({in_list})
         """
         
-        result = snowflake_query(query, PROD_PAYLOAD)
+        result = snowflake_query_in_chunks(query, PROD_PAYLOAD, [str(case) for case in case_numbers])
         
         if result is not None and not result.empty:
-            open_cases = set(result["Case Number"].tolist())
+            open_cases = set(result["Case Number"].astype(str).tolist())
             
             # Return status for each case
             case_status = {}
             for case_num in case_numbers:
-                case_status[case_num] = 'open' if case_num in open_cases else 'closed'
+                case_status[case_num] = 'open' if str(case_num) in open_cases else 'closed'
             
             return case_status
         else:
@@ -1424,20 +1648,9 @@ def get_case_details(case_number, user_email=None):
         # If email filtering is enabled and user_email is provided, validate that the case belongs to the user first
         if CRM_EMAIL_FILTERING_ENABLED and user_email:
             user_email_upper = user_email.upper()
-            like_pattern = f"%~{user_email_upper}~%"
-            
-            # First, validate that the case belongs to the user
-            validation_query = """
-                SELECT DISTINCT "Case Number" as CASE_NUMBER
-                FROM IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T
-                WHERE "Case Number" IS NOT NULL
-                AND "USER_EMAILS" LIKE %s
-                AND "Case Number" = %s
-            """
-            
-            validated_result = snowflake_query(validation_query, CONNECTION_PAYLOAD, (like_pattern, str(case_number)))
             
-            if validated_result is None or validated_result.empty:
+            # First, validate that the case belongs to the user (in-memory access snapshot)
+            if not case_access.can_access(user_email_upper, case_number):
                 print(f"⚠️ [CRM] Case {case_number} does not belong to user {user_email_upper}")
                 return []
         
@@ -1487,24 +1700,12 @@ def get_case_titles_batch(case_numbers, user_email=None):
         # If email filtering is enabled and user_email is provided, validate that all cases belong to the user first
         if CRM_EMAIL_FILTERING_ENABLED and user_email:
             user_email_upper = user_email.upper()
-            like_pattern = f"%~{user_email_upper}~%"
             
-            # First, validate that all cases belong to the user
-            case_list = "', '".join(str(case) for case in case_numbers)
-            validation_query = f"""
-                SELECT DISTINCT "Case Number" as CASE_NUMBER
-                FROM IT_SF_SHARE_REPLICA.RSRV.CRMSV_INTERFACE_SAGE_ROW_LEVEL_SECURITY_T
-                WHERE "Case Number" IS NOT NULL
-                AND "USER_EMAILS" LIKE %s
-                AND "Case Number" IN ('{case_list}')
-            """
-            
-            validated_result = snowflake_query(validation_query, CONNECTION_PAYLOAD, (like_pattern,))
-            
-            if validated_result is not None and not validated_result.empty:
-                validated_cases = set(validated_result["CASE_NUMBER"].astype(str).tolist())
+            # First, validate that all cases belong to the user (in-memory access snapshot)
+            validated_cases = case_access.filter_accessible(user_email_upper, case_numbers)
+            if validated_cases:
                 # Filter to only get titles for validated cases
-                case_numbers = [case for case in case_numbers if str(case) in validated_cases]
+                case_numbers = validated_cases
             else:
                 print(f"⚠️ [CRM] No cases validated for user {user_email_upper}, returning empty titles")
                 return {}
@@ -1512,33 +1713,8 @@ def get_case_titles_batch(case_numbers, user_email=None):
         if not case_numbers:
             return {}
         
-        # Query to get case titles for multiple cases
-        # Use DISTINCT and window function to get the latest title for each case
-        case_list = "', '".join(str(case) for case in case_numbers)
-        query = f"""
-            SELECT DISTINCT
-                "Case Number",
-                "Case Title",
-                ROW_NUMBER() OVER (
-                    PARTITION BY "Case Number" 
-                    ORDER BY "FSR Number" DESC, "FSR Creation Date" DESC
-                ) as rn
-            FROM GEAR.INSIGHTS.CRMSV_INTERFACE_SAGE_FSR_DETAIL
-            WHERE "Case Number" IN ('{case_list}')
-            QUALIFY rn = 1
-        """
-        
-        result = snowflake_query(query, PROD_PAYLOAD)
-        
-        titles = {}
-        if result is not None and not result.empty:
-            for _, row in result.iterrows():
-                case_num = str(row["Case Number"])
-                case_title = row["Case Title"]
-                if pd.notna(case_title) and case_title:
-                    titles[case_num] = str(case_title)
-        
-        return titles
+        # Served from the title cache; only unseen case numbers reach the CRM
+        return case_titles.get_many(case_numbers)
             
     except Exception as e:
         print(f"❌ [CRM] Error getting case titles batch: {e}")
@@ -1546,6 +1722,66 @@ def get_case_titles_batch(case_numbers, user_email=None):
         traceback.print_exc()
         return {}
 
+def fetch_crm_case_titles(case_numbers):
+    """
+    Latest CRM title of each case (batched through snowflake_query_in_chunks).
+    Returns a dictionary mapping case_number -> case_title for cases that have one.
+    """
+    # Use window function to get the latest title for each case
+    query = """
+        SELECT
+            "Case Number",
+            "Case Title",
+            ROW_NUMBER() OVER (
+                PARTITION BY "Case Number" 
+                ORDER BY "FSR Number" DESC, "FSR Creation Date" DESC
+            ) as rn
+        FROM GEAR.INSIGHTS.CRMSV_INTERFACE_SAGE_FSR_DETAIL
+        WHERE "Case Number" IN ({in_list})
+        QUALIFY rn = 1
+    """
+    
+    result = snowflake_query_in_chunks(query, PROD_PAYLOAD, [str(case) for case in case_numbers])
+    
+    return {
+        str(row["Case Number"]): str(row["Case Title"])
+        for row in records(result)
+        if row["Case Title"]
+    }
+
+# Copy CRM titles into CASE_SESSIONS so the case list renders from local data.
+# Runs on the audit writer threads, off the request path. Only the title is
+# written: no CRM status was synced, so the sync timestamps stay untouched.
+CASE_TITLE_WRITE_BACK = f"""
+    UPDATE {DATABASE}.{SCHEMA}.CASE_SESSIONS
+    SET CASE_TITLE = %s
+    WHERE CASE_ID = %s AND (CASE_TITLE IS NULL OR CASE_TITLE <> %s)
+"""
+
+def write_back_case_titles(titles):
+    audit_writer.submit_rows(
+        CASE_TITLE_WRITE_BACK,
+        [(title, case_number, title) for case_number, title in titles.items()]
+    )
+
+# Case titles almost never change: cache them (negative entries for cases without a
+# title), fetch only unseen case numbers, and refresh everything in bulk periodically.
+# Set CASE_TITLE_CACHE_BACKEND (same URL format as CRM_CACHE_BACKEND) to share between workers.
+CASE_TITLE_CACHE_TTL = int(os.environ.get('CASE_TITLE_CACHE_TTL', '86400'))
+try:
+    _case_title_cache_backend = make_cache_backend(os.environ.get('CASE_TITLE_CACHE_BACKEND', ''))
+except Exception as e:
+    print(f"⚠️ [CRM] Shared title cache backend unavailable, using per-worker cache only: {e}")
+    _case_title_cache_backend = None
+case_titles = CaseTitleCache(
+    fetch_crm_case_titles,
+    SharedTTLCache("case_titles", max_size=int(os.environ.get('CASE_TITLE_CACHE_MAX_SIZE', '20000')),
+                   ttl=CASE_TITLE_CACHE_TTL, backend=_case_title_cache_backend, local_ttl=CASE_TITLE_CACHE_TTL),
+    negative_ttl=int(os.environ.get('CASE_TITLE_NEGATIVE_TTL', '600')),
+    refresh_interval=int(os.environ.get('CASE_TITLE_REFRESH_INTERVAL', '1800')),
+    on_titles=write_back_case_titles
+)
+
 # ==================== END MOCK ENDPOINTS ====================
 
 @app.before_request
@@ -1738,12 +1974,8 @@ def llm_evaluation_log():
             if rewrite_check is None or rewrite_check.empty:
                 rewrite_uuid = None  # Set to null instead of failing
         
-        insert_query = f"""
-            INSERT INTO {DATABASE}.{SCHEMA}.LLM_EVALUATION 
-            (USER_INPUT_ID, ORIGINAL_TEXT, REWRITTEN_TEXT, SCORE, REWRITE_UUID, TIMESTAMP)
-            VALUES (%s, %s, %s, %s, %s, TO_TIMESTAMP(%s))
-        """
-
+        # LLM_EVALUATION IDs come from the shared allocator so they never collide with /llm inserts;
+        # when the column is not sequence-backed it generates the ID itself
         params = (
             user_input_id,
             data["text"],
@@ -1752,6 +1984,20 @@ def llm_evaluation_log():
             rewrite_uuid,
             data["timestamp"]
         )
+        evaluation_id = allocate_id(evaluation_ids)
+        if evaluation_id is None:
+            insert_query = f"""
+                INSERT INTO {DATABASE}.{SCHEMA}.LLM_EVALUATION 
+                (USER_INPUT_ID, ORIGINAL_TEXT, REWRITTEN_TEXT, SCORE, REWRITE_UUID, TIMESTAMP)
+                VALUES (%s, %s, %s, %s, %s, TO_TIMESTAMP(%s))
+            """
+        else:
+            insert_query = f"""
+                INSERT INTO {DATABASE}.{SCHEMA}.LLM_EVALUATION 
+                (ID, USER_INPUT_ID, ORIGINAL_TEXT, REWRITTEN_TEXT, SCORE, REWRITE_UUID, TIMESTAMP)
+                VALUES (%s, %s, %s, %s, %s, %s, TO_TIMESTAMP(%s))
+            """
+            params = (evaluation_id,) + params
 
         snowflake_query(insert_query, CONNECTION_PAYLOAD, params=params, return_df=False)
         return jsonify({"status": "ok"})
@@ -1793,6 +2039,16 @@ def rewrite_feedback():
  
  
  
+# KLA glossary, loaded once per worker and refreshed in the background.
+# /check only ever reads from this index; it never queries KLA_GLOSSARY directly.
+GLOSSARY_REFRESH_INTERVAL = int(os.environ.get('GLOSSARY_REFRESH_INTERVAL', '300'))  # seconds
+glossary = GlossaryIndex(
+    snowflake_query,
+    CONNECTION_PAYLOAD,
+    f"{DATABASE}.{SCHEMA}.KLA_GLOSSARY",
+    refresh_interval=GLOSSARY_REFRESH_INTERVAL
+)
+
 @app.route('/terms', methods=['GET', 'POST'])
 def terms_route():
     if request.method == 'POST':
@@ -1802,6 +2058,13 @@ def terms_route():
         if not term:
             return jsonify({'error': 'No term provided'}), 400
  
+        # Known terms are answered from the in-process index without a round trip
+        try:
+            if glossary.contains_casefold(term):
+                return jsonify({'status': 'ok', 'added': term})
+        except Exception as e:
+            return jsonify({'error': 'Could not connect to KLA Dictionary'}), 500
+ 
         try:
             # Check if term already exists (case-insensitive)
             query = f"""
@@ -1823,19 +2086,15 @@ def terms_route():
             except Exception as e:
                 return jsonify({'error': 'Failed to insert new term'}), 500
  
+        # Make the term visible to /check immediately in this worker
+        glossary.add(term)
         return jsonify({'status': 'ok', 'added': term})
  
     else:  # GET request
         try:
-            result = snowflake_query(
-                f"SELECT term FROM {DATABASE}.{SCHEMA}.KLA_GLOSSARY",
-                CONNECTION_PAYLOAD
-            )
-            terms = result["TERM"].values.tolist()
+            return jsonify({'terms': glossary.terms()})
         except Exception as e:
             return jsonify({'error': 'Could not connect to KLA Dictionary'}), 500
- 
-        return jsonify({'terms': terms})
 
 def get_error_type(ruleId):
     if ruleId.startswith("MORFOLOGIK"):
@@ -1851,6 +2110,48 @@ def get_error_type(ruleId):
 # def index():
 #     return render_template("index.html")
 
+def _languagetool_matches(text):
+    """Raw LanguageTool matches for text (offsets relative to text); used through check_cache."""
+    return [
+        {
+            "offset": m.offset,
+            "length": m.errorLength,
+            "message": m.message,
+            "replacements": m.replacements,
+            "ruleId": m.ruleId,
+            # Kept so glossary filtering works for paragraphs served from the cache
+            "token": text[m.offset : m.offset + m.errorLength],
+        }
+        for m in languagetool.check(text)
+    ]
+
+# LanguageTool matches cached per paragraph (LRU), so an edit only re-checks what changed
+check_cache = ParagraphCheckCache(
+    _languagetool_matches,
+    TTLCache(max_size=int(os.environ.get('CHECK_CACHE_MAX_SIZE', '20000')),
+             ttl=int(os.environ.get('CHECK_CACHE_TTL', '3600')),
+             name="check_paragraphs")
+)
+
+def _check_response(matches):
+    response = []
+    for m in matches:
+        error_type = get_error_type(m["ruleId"])
+ 
+        # Skip spelling errors if token is in the glossary (in-process index, no DB call)
+        if error_type == 'spelling' and m["token"] in glossary:
+            continue
+ 
+        response.append({
+            "offset": m["offset"],
+            "length": m["length"],
+            "message": m["message"],
+            "replacements": m["replacements"],
+            "ruleId": m["ruleId"],
+            "errorType": error_type,
+        })
+    return response
+
 @app.route("/check", methods=["POST"])
 def check():
     data = request.get_json()
@@ -1859,45 +2160,51 @@ def check():
     if not text.strip():
         return jsonify([])
     
+    # Without the glossary every KLA term would come back as a spelling error
     try:
-        # Ensure LanguageTool is initialized
-        current_tool = tool
-        if current_tool is None:
-            current_tool = get_language_tool()
-        matches = current_tool.check(text)
-        
-        # Load KLA term bank
-        try:
-            result = snowflake_query(
-                f"SELECT term FROM {DATABASE}.{SCHEMA}.KLA_GLOSSARY",
-                CONNECTION_PAYLOAD
-            )
-            terms = result["TERM"].values
-        except Exception as e:
-            return jsonify({'error': 'Could not connect to KLA Dictionary'}), 500
- 
-        response = []
-        for m in matches:
-            token = text[m.offset : m.offset + m.errorLength]
-            error_type = get_error_type(m.ruleId)
- 
-            # Skip spelling errors if token is in the glossary
-            if error_type == 'spelling' and token in terms:
-                continue
- 
-            response.append({
-                "offset": m.offset,
-                "length": m.errorLength,
-                "message": m.message,
-                "replacements": m.replacements,
-                "ruleId": m.ruleId,
-                "errorType": error_type,
-            })
-        return jsonify(response)
+        glossary.ensure_loaded()
+    except Exception as e:
+        return jsonify({'error': 'Could not connect to KLA Dictionary'}), 500
+    
+    try:
+        return jsonify(_check_response(check_cache.check_document(text)))
     except Exception as e:
         print(f"Error checking text: {e}")
         return jsonify([])
 
+@app.route("/check/incremental", methods=["POST"])
+def check_incremental():
+    """
+    /check for a document sent as its lines: {"paragraphs": [...]} where each item is
+    the line's text or {"hash": ...} for a line unchanged since the previous call
+    (hashes come from the previous response). Only lines LanguageTool has not seen
+    are checked.
+
+    Returns {"matches": [...same items as /check, document offsets...], "hashes": [...]},
+    or {"matches": null, "hashes": [...], "missing": [indices]} when hash-only lines
+    are no longer cached; the client resends those lines as text.
+    """
+    data = request.get_json(silent=True) or {}
+    paragraphs = data.get("paragraphs")
+    if paragraphs is None:
+        paragraphs = str(data.get("text", "")).split(PARAGRAPH_SEPARATOR)
+    if not isinstance(paragraphs, list):
+        return jsonify({"error": "paragraphs must be a list"}), 400
+    
+    try:
+        glossary.ensure_loaded()
+    except Exception as e:
+        return jsonify({'error': 'Could not connect to KLA Dictionary'}), 500
+    
+    try:
+        matches, hashes, missing = check_cache.check_paragraphs(paragraphs)
+    except Exception as e:
+        print(f"Error checking text: {e}")
+        return jsonify({"matches": [], "hashes": []})
+    if missing:
+        return jsonify({"matches": None, "hashes": hashes, "missing": missing})
+    return jsonify({"matches": _check_response(matches), "hashes": hashes})
+
 import re
 
 def _normalize_criteria_name(name: str) -> str:
@@ -1907,12 +2214,47 @@ def _normalize_criteria_name(name: str) -> str:
     except Exception:
         return "rule"
 
-def load_ruleset_from_db(input_field_type: str, group_name: str = "DEFAULT"):
+# Rulesets change rarely, so criteria are cached per (input_field_type, group_name)
+RULESET_CACHE_TTL = int(os.environ.get('RULESET_CACHE_TTL', '3600'))  # seconds
+_ruleset_cache = TTLCache(max_size=32, ttl=RULESET_CACHE_TTL, name="ruleset")
+
+def _ruleset_etag(rules_payload) -> str:
+    return hashlib.sha1(json.dumps(rules_payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def invalidate_ruleset_cache(input_field_type: str = None, group_name: str = "DEFAULT"):
+    """Drop one cached ruleset, or all of them when input_field_type is None."""
+    if input_field_type is None:
+        _ruleset_cache.clear()
+    else:
+        _ruleset_cache.invalidate((input_field_type, group_name))
+
+def load_ruleset_with_etag(input_field_type: str, group_name: str = "DEFAULT"):
+    """
+    Return (rules_payload, etag) for a ruleset, served from the TTL cache when possible.
+    The returned payload is shared between requests and must be treated as read-only.
+    """
+    cache_key = (input_field_type, group_name)
+    cached = _ruleset_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    rules_payload = _query_ruleset(input_field_type, group_name)
+    entry = (rules_payload, _ruleset_etag(rules_payload))
+    # Only cache successful loads so a transient DB error is retried on the next call
+    if rules_payload.get("rules"):
+        _ruleset_cache.set(cache_key, entry)
+    return entry
+
+def load_ruleset_from_db(input_field_type: str, group_name: str = "DEFAULT"):
+    return load_ruleset_with_etag(input_field_type, group_name)[0]
+
+def _query_ruleset(input_field_type: str, group_name: str = "DEFAULT"):
     query = f"""
         SELECT c.id AS CRITERIA_ID,
                c.criteria AS CRITERIA_NAME,
                c.weight AS WEIGHT,
-               c.criteria_description AS DESCRIPTION
+               c.criteria_description AS DESCRIPTION,
+               c.criteria_version AS CRITERIA_VERSION,
+               g.group_version AS GROUP_VERSION
         FROM {DATABASE}.{SCHEMA}.CRITERIA c
         JOIN {DATABASE}.{SCHEMA}.CRITERIA_GROUPS g
           ON g.criteria_id = c.id
@@ -1927,19 +2269,20 @@ def load_ruleset_from_db(input_field_type: str, group_name: str = "DEFAULT"):
     try:
         df = snowflake_query(query, CONNECTION_PAYLOAD, params=(input_field_type, group_name))
         rules = []
-        if df is not None and not df.empty:
-            for _, row in df.iterrows():
-                # Convert criteria_name to a human-readable display name
-                criteria_name = str(row["CRITERIA_NAME"])
-                display_name = criteria_name.replace("_", " ").title()
-                
-                rules.append({
-                    "id": int(row["CRITERIA_ID"]),
-                    "name": criteria_name,
-                    "display_name": display_name,
-                    "weight": float(row["WEIGHT"]) if row["WEIGHT"] is not None else 0,
-                    "description": row.get("DESCRIPTION")
-                })
+        for row in records(df, floats=("WEIGHT",)):
+            # Convert criteria_name to a human-readable display name
+            criteria_name = str(row["CRITERIA_NAME"])
+            display_name = criteria_name.replace("_", " ").title()
+            
+            rules.append({
+                "id": int(row["CRITERIA_ID"]),
+                "name": criteria_name,
+                "display_name": display_name,
+                "weight": row["WEIGHT"] or 0,
+                "description": row["DESCRIPTION"],
+                "criteria_version": None if row["CRITERIA_VERSION"] is None else str(row["CRITERIA_VERSION"]),
+                "group_version": None if row["GROUP_VERSION"] is None else str(row["GROUP_VERSION"])
+            })
         return {"rules": rules}
     except Exception as e:
         print(f"Failed to load ruleset from DB: {e}")
@@ -1948,24 +2291,144 @@ def load_ruleset_from_db(input_field_type: str, group_name: str = "DEFAULT"):
 @app.route("/ruleset/<ruleset_name>", methods=["GET"])
 def get_ruleset(ruleset_name):
     if ruleset_name == "fsr":
-        return jsonify(load_ruleset_from_db("FSR_DAILY_NOTE", "DEFAULT"))
+        rules_payload, etag = load_ruleset_with_etag("FSR_DAILY_NOTE", "DEFAULT")
     else:
-        return jsonify(load_ruleset_from_db("PROBLEM_STATEMENT", "DEFAULT"))
+        rules_payload, etag = load_ruleset_with_etag("PROBLEM_STATEMENT", "DEFAULT")
+    
+    # Let the browser revalidate with If-None-Match and get a 304 when unchanged
+    response = jsonify(rules_payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
-@app.route("/llm", methods=["POST"])
-def llm():
-    import time
-    start_time = time.time()
+@app.route("/ruleset/cache/invalidate", methods=["POST"])
+def invalidate_ruleset():
+    """
+    Drop cached rulesets after CRITERIA / CRITERIA_GROUPS are edited.
+    Requires the same X-API-Key as /api/score. Only this worker's cache is cleared;
+    other workers pick up the change when their entries expire (RULESET_CACHE_TTL).
+    """
+    api_key = request.headers.get("X-API-Key")
+    if api_key not in API_KEYS:
+        return jsonify({"error": "Invalid API key. Please check your credentials."}), 401
     
-    data = request.get_json() or {}
-    text = data.get("text", "")
-    answers = data.get("answers", {})
+    invalidate_ruleset_cache()
+    return jsonify({"status": "ok", "cache": _ruleset_cache.stats()})
+
+# Criteria evaluations (/llm step 1 and /api/score) are cached by normalized text,
+# criteria IDs/versions, model and prompt template version (see eval_cache.py), so
+# re-submitting the same note costs no LLM call. Set EVAL_CACHE_BACKEND to keep entries
+# on disk and share them between workers, e.g. "sqlite:////tmp/fsrcoach_eval_cache.db".
+PROMPT_TEMPLATE_VERSION = "1"  # bump whenever the evaluation prompts change
+EVAL_CACHE_ENABLED = os.environ.get('EVAL_CACHE_ENABLED', '1') != '0'
+EVAL_CACHE_TTL = int(os.environ.get('EVAL_CACHE_TTL', '86400'))  # seconds
+EVAL_CACHE_MAX_SIZE = int(os.environ.get('EVAL_CACHE_MAX_SIZE', '2000'))
+try:
+    _eval_cache_backend = make_cache_backend(os.environ.get('EVAL_CACHE_BACKEND', ''))
+except Exception as e:
+    print(f"⚠️ [LLM] Evaluation cache backend unavailable, using per-worker cache only: {e}")
+    _eval_cache_backend = None
+# Entries never go stale (the key changes instead), so the local tier keeps the full TTL
+evaluation_cache = EvaluationCache(
+    SharedTTLCache("evaluation", max_size=EVAL_CACHE_MAX_SIZE, ttl=EVAL_CACHE_TTL,
+                   backend=_eval_cache_backend, local_ttl=EVAL_CACHE_TTL),
+    enabled=EVAL_CACHE_ENABLED
+)
+
+def criteria_identity(rules_payload):
+    """What the evaluation cache keys on for a ruleset: criteria IDs, names and versions."""
+    return [
+        [r.get("id"), r.get("name"), r.get("criteria_version"), r.get("group_version")]
+        for r in (rules_payload.get("rules") or [])
+    ]
+
+def is_cacheable_evaluation(llm_result):
+    return isinstance(llm_result, dict) and not llm_result.get("error") and bool(llm_result.get("evaluation"))
+
+# /llm audit inserts go through one bounded queue per worker, drained by a small
+# writer pool that batches rows into multi-row INSERTs (see audit_writer.py)
+LLM_REWRITE_PROMPTS_INSERT = f"""
+    INSERT INTO {DATABASE}.{SCHEMA}.LLM_REWRITE_PROMPTS
+    (REWRITE_UUID, CRITERIA_ID, CRITERIA_SCORE, REWRITE_QUESTION, TIMESTAMP)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+USER_SESSION_INPUTS_INSERT = f"""
+    INSERT INTO {DATABASE}.{SCHEMA}.USER_SESSION_INPUTS
+    (ID, USER_ID, APP_SESSION_ID, CASE_ID, LINE_ITEM_ID, INPUT_FIELD_TYPE, INPUT_TEXT, TIMESTAMP)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+LLM_EVALUATION_INSERT = f"""
+    INSERT INTO {DATABASE}.{SCHEMA}.LLM_EVALUATION
+    (ID, USER_INPUT_ID, ORIGINAL_TEXT, REWRITTEN_TEXT, SCORE, REWRITE_UUID, TIMESTAMP, EVALUATION_DETAILS)
+    SELECT COLUMN1, COLUMN2, COLUMN3, COLUMN4, COLUMN5, COLUMN6, COLUMN7, PARSE_JSON(COLUMN8)
+    FROM VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+# Same rows without ID, for tables whose ID column is not sequence-backed (see allocate_id)
+USER_SESSION_INPUTS_INSERT_AUTO_ID = f"""
+    INSERT INTO {DATABASE}.{SCHEMA}.USER_SESSION_INPUTS
+    (USER_ID, APP_SESSION_ID, CASE_ID, LINE_ITEM_ID, INPUT_FIELD_TYPE, INPUT_TEXT, TIMESTAMP)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+LLM_EVALUATION_INSERT_AUTO_ID = f"""
+    INSERT INTO {DATABASE}.{SCHEMA}.LLM_EVALUATION
+    (USER_INPUT_ID, ORIGINAL_TEXT, REWRITTEN_TEXT, SCORE, REWRITE_UUID, TIMESTAMP, EVALUATION_DETAILS)
+    SELECT COLUMN1, COLUMN2, COLUMN3, COLUMN4, COLUMN5, COLUMN6, PARSE_JSON(COLUMN7)
+    FROM VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+USER_REWRITE_INPUTS_INSERT = f"""
+    INSERT INTO {DATABASE}.{SCHEMA}.USER_REWRITE_INPUTS
+    (REWRITE_ID, USER_REWRITE_INPUT, TIMESTAMP)
+    VALUES (%s, %s, %s)
+"""
+
+# Primary keys for USER_SESSION_INPUTS and LLM_EVALUATION are allocated in-process from
+# per-worker blocks of the sequence the ID column defaults to, so inserts carry their keys
+# and /llm can return user_input_id / evaluation_id immediately without an INSERT-then-SELECT.
+# AUTOINCREMENT ID columns keep generating their own keys: rows are inserted without ID
+# (the *_AUTO_ID statements) and USER_SESSION_INPUTS IDs are read back.
+ID_BLOCK_SIZE = int(os.environ.get('ID_BLOCK_SIZE', '50'))
+user_input_ids = SequenceIdAllocator(
+    snowflake_query, CONNECTION_PAYLOAD, f"{DATABASE}.{SCHEMA}.USER_SESSION_INPUTS",
+    block_size=ID_BLOCK_SIZE
+)
+evaluation_ids = SequenceIdAllocator(
+    snowflake_query, CONNECTION_PAYLOAD, f"{DATABASE}.{SCHEMA}.LLM_EVALUATION",
+    block_size=ID_BLOCK_SIZE
+)
+
+def allocate_id(allocator):
+    """
+    Allocate an ID, or return None when it cannot be allocated client-side (column
+    not sequence-backed, sequence unreachable); the row is then inserted without an
+    ID and the column generates it.
+    """
     try:
-        step = int(data.get("step", 1))
-    except Exception:
-        step = 1
-    ruleset_name = data.get("ruleset", "problem_statement")
+        return allocator.allocate()
+    except NoSequenceDefault:
+        return None
+    except Exception as e:
+        print(f"⚠️  [DB] ID allocation for {allocator.table} failed: {e}")
+        return None
+
+def evaluation_row(evaluation_id, *values):
+    """(statement, params) for an LLM_EVALUATION row; without an ID the column default generates it."""
+    if evaluation_id is None:
+        return LLM_EVALUATION_INSERT_AUTO_ID, values
+    return LLM_EVALUATION_INSERT, (evaluation_id,) + values
+
+audit_writer = AuditWriter(
+    lambda statement, rows: snowflake_executemany(statement, CONNECTION_PAYLOAD, rows),
+    execute_one=lambda statement, params: snowflake_query(statement, CONNECTION_PAYLOAD, params, return_df=False),
+    max_queue=int(os.environ.get('AUDIT_QUEUE_SIZE', '1000')),
+    batch_size=int(os.environ.get('AUDIT_BATCH_SIZE', '200')),
+    flush_interval=float(os.environ.get('AUDIT_FLUSH_INTERVAL', '1.0')),
+    threads=int(os.environ.get('AUDIT_WRITER_THREADS', '2')),
+)
+# gunicorn workers exit through sys.exit on graceful shutdown, so atexit drains the queue
+atexit.register(audit_writer.close)
 
+def load_llm_ruleset(ruleset_name):
+    """Criteria and general advice for the /llm ruleset name ("problem_statement" or "fsr")."""
     # Load rules dynamically from DB
     if ruleset_name == "fsr":
         rules_payload = load_ruleset_from_db("FSR_DAILY_NOTE", "DEFAULT")
@@ -1980,30 +2443,18 @@ def llm():
             "Experience-based and Process/System-based knowledge is valuable to the process for external information",
             "Minimize/remove unsubstantiated/emotional content"
         ]
+    return rules_payload, advice_list
 
-    if not text.strip():
-        return jsonify({"result": "No text provided."})
-
-    # Shared model config
-    model_kwargs = {
-        "model": ACTIVE_MODEL_CONFIG["model"],
-        "api_base": ACTIVE_MODEL_CONFIG["api_base"],
-        "custom_llm_provider": ACTIVE_MODEL_CONFIG["provider"],
-        "temperature": 0.1,
-        "timeout": 30,  # 30 second timeout to prevent hanging
-    }
-    if ACTIVE_MODEL_CONFIG["use_token_provider"]:
-        model_kwargs["azure_ad_token_provider"] = ACTIVE_MODEL_CONFIG["token_provider"]
-        model_kwargs["api_version"] = ACTIVE_MODEL_CONFIG["api_version"]
-    else:
-        model_kwargs["api_key"] = ACTIVE_MODEL_CONFIG["api_key"]
+# Every model call goes through one gateway per worker: shared model kwargs, a keep-alive
+# async HTTP client, bounded concurrency and jittered backoff (see llm_gateway.py)
+llm_gateway = LLMGateway(ACTIVE_MODEL_CONFIG)
 
-    # Build prompt
+def build_llm_prompt(step, text, answers, ruleset_name, rules_payload, advice_list):
+    """User prompt for step 1 (evaluation) or step 2 (rewrite)."""
     if step == 1:
         rules_list = [r['name'] for r in (rules_payload.get('rules') or [])]
         rules_lines = "\n".join(f"- {n}" for n in rules_list)
         advice = "\n".join(f"- {tip}" for tip in advice_list)
-        rewrite_uuid = str(uuid.uuid4())
         user_prompt = (
             "Criteria to evaluate (use EXACTLY these names as keys; do NOT invent or add any others):\n"
             f"{rules_lines}\n\n"
@@ -2074,530 +2525,576 @@ def llm():
             {example_line}
         """
 
+    return user_prompt
 
-    # Call LLM (for both steps)
-    prompt_len = len(user_prompt)
-    system_len = len(SYSTEM_PROMPT)
-    
-    llm_start = time.time()
+def parse_llm_response(llm_result_str, step):
+    """
+    Parse the raw model output into a dict, tolerating Markdown code fences.
+    Raises if the output cannot be parsed at all.
+    """
     try:
-        # Add timeout and retry logic
-        max_retries = 2
-        for attempt in range(max_retries):
-            try:
-                response = litellm.completion(
-                    messages=[{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}],
-                    **model_kwargs
-                )
-                
-                break  # Success, exit retry loop
-            except Exception as retry_error:
-                if attempt == max_retries - 1:  # Last attempt
-                    raise retry_error
-                time.sleep(1)  # Wait before retry
-        
-        # Check if response is valid
-        if not response or "choices" not in response or not response["choices"]:
-            raise Exception("Invalid LLM response structure")
-            
-        llm_result_str = response["choices"][0]["message"]["content"]
-        
-        # Check if response content is empty or whitespace
-        if not llm_result_str or not llm_result_str.strip():
-            raise Exception("LLM returned empty response")
-        
-        parse_start = time.time()
+        # First, try to parse the raw response as JSON
+        llm_result = json.loads(llm_result_str)
+    except Exception as e:
+        print(f"⚠️  [LLM] JSON parse error: {e}")
+
+        # Try to extract JSON from Markdown code blocks
         try:
-            # First, try to parse the raw response as JSON
-            llm_result = json.loads(llm_result_str)
-        except Exception as e:
-            print(f"⚠️  [LLM] JSON parse error: {e}")
-            
-            # Try to extract JSON from Markdown code blocks
-            try:
-                if "```json" in llm_result_str:
-                    start_marker = "```json"
-                    end_marker = "```"
-                    start_idx = llm_result_str.find(start_marker) + len(start_marker)
-                    end_idx = llm_result_str.find(end_marker, start_idx)
-                    
-                    if start_idx != -1 and end_idx != -1:
-                        json_content = llm_result_str[start_idx:end_idx].strip()
-                        llm_result = json.loads(json_content)
-                    else:
-                        raise Exception("Incomplete Markdown code block")
+            if "```json" in llm_result_str:
+                start_marker = "```json"
+                end_marker = "```"
+                start_idx = llm_result_str.find(start_marker) + len(start_marker)
+                end_idx = llm_result_str.find(end_marker, start_idx)
+
+                if start_idx != -1 and end_idx != -1:
+                    json_content = llm_result_str[start_idx:end_idx].strip()
+                    llm_result = json.loads(json_content)
                 else:
-                    raise Exception("No Markdown code block found")
-            except Exception as markdown_error:
-                raise e  # Re-raise the original JSON parse error
-            
-            # Try to extract rewrite content from malformed JSON for step 2
-            if step == 2:
-                try:
-                    # Look for rewrite content in the malformed response
-                    if '"rewrite"' in llm_result_str:
-                        # Extract content between "rewrite": and the next quote or brace
-                        start_idx = llm_result_str.find('"rewrite"') + 9  # Skip "rewrite":
-                        # Find the opening quote after "rewrite":
-                        quote_start = llm_result_str.find('"', start_idx)
-                        if quote_start != -1:
-                            # Find the closing quote, handling escaped quotes
-                            content_start = quote_start + 1
-                            content_end = content_start
-                            while True:
-                                next_quote = llm_result_str.find('"', content_end)
-                                if next_quote == -1:
-                                    break
-                                # Check if this quote is escaped
-                                if next_quote > 0 and llm_result_str[next_quote - 1] != '\\':
-                                    content_end = next_quote
-                                    break
-                                content_end = next_quote + 1
-                            
-                            if content_end > content_start:
-                                rewrite_content = llm_result_str[content_start:content_end]
-                                rewrite_content = rewrite_content.replace('\\n', '\n').replace('\\"', '"').replace('\\\\', '\\')
-                                llm_result = {"rewrite": rewrite_content}
-                            else:
-                                llm_result = {"rewrite": "Error: Could not extract rewrite content"}
+                    raise Exception("Incomplete Markdown code block")
+            else:
+                raise Exception("No Markdown code block found")
+        except Exception as markdown_error:
+            raise e  # Re-raise the original JSON parse error
+
+        # Try to extract rewrite content from malformed JSON for step 2
+        if step == 2:
+            try:
+                # Look for rewrite content in the malformed response
+                if '"rewrite"' in llm_result_str:
+                    # Extract content between "rewrite": and the next quote or brace
+                    start_idx = llm_result_str.find('"rewrite"') + 9  # Skip "rewrite":
+                    # Find the opening quote after "rewrite":
+                    quote_start = llm_result_str.find('"', start_idx)
+                    if quote_start != -1:
+                        # Find the closing quote, handling escaped quotes
+                        content_start = quote_start + 1
+                        content_end = content_start
+                        while True:
+                            next_quote = llm_result_str.find('"', content_end)
+                            if next_quote == -1:
+                                break
+                            # Check if this quote is escaped
+                            if next_quote > 0 and llm_result_str[next_quote - 1] != '\\':
+                                content_end = next_quote
+                                break
+                            content_end = next_quote + 1
+
+                        if content_end > content_start:
+                            rewrite_content = llm_result_str[content_start:content_end]
+                            rewrite_content = rewrite_content.replace('\\n', '\n').replace('\\"', '"').replace('\\\\', '\\')
+                            llm_result = {"rewrite": rewrite_content}
                         else:
-                            llm_result = {"rewrite": "Error: Could not find rewrite content"}
+                            llm_result = {"rewrite": "Error: Could not extract rewrite content"}
                     else:
-                        if "User Answers Summary" in llm_result_str or "rewrite_id" in llm_result_str:
-                            llm_result = {"rewrite": "Error: LLM failed to generate proper rewrite - please try again"}
-                        else:
-                            llm_result = {"rewrite": "Error: No rewrite field found in response"}
-                except Exception as extract_error:
-                    llm_result = {"rewrite": "Error: Failed to parse LLM response"}
-            else:
-                if step == 1:
-                    llm_result = {
-                        "evaluation": {},
-                        "error": "LLM evaluation failed due to malformed response. Please try again."
-                    }
+                        llm_result = {"rewrite": "Error: Could not find rewrite content"}
                 else:
-                    llm_result = {}
-        
-    except Exception as e:
-        print(f"❌ [LLM] Error: {e}")
-        # Return a more user-friendly error structure
-        if step == 1:
-            return jsonify({
-                "result": {
-                    "evaluation": {},
-                    "error": f"LLM service error: {str(e)}. Please try again in a moment."
-                }
-            })
+                    if "User Answers Summary" in llm_result_str or "rewrite_id" in llm_result_str:
+                        llm_result = {"rewrite": "Error: LLM failed to generate proper rewrite - please try again"}
+                    else:
+                        llm_result = {"rewrite": "Error: No rewrite field found in response"}
+            except Exception as extract_error:
+                llm_result = {"rewrite": "Error: Failed to parse LLM response"}
         else:
-            return jsonify({
-                "result": {
-                    "rewrite": f"LLM service error: {str(e)}. Please try again in a moment."
+            if step == 1:
+                llm_result = {
+                    "evaluation": {},
+                    "error": "LLM evaluation failed due to malformed response. Please try again."
                 }
-            })
+            else:
+                llm_result = {}
+
+    return llm_result
+
+def add_criteria_display_names(evaluation, rules_payload):
+    # Create a mapping of criteria names to display names
+    criteria_display_map = {}
+    for rule in rules_payload.get('rules', []):
+        criteria_display_map[rule['name']] = rule.get('display_name', rule['name'])
+    
+    # Add display names to evaluation results
+    for criteria_name, criteria_data in evaluation.items():
+        if isinstance(criteria_data, dict):
+            criteria_data['display_name'] = criteria_display_map.get(criteria_name, criteria_name.replace('_', ' ').title())
+
+def persist_llm_step1(data, text, ruleset_name, rules_payload, llm_result, rewrite_uuid, user_id, timestamp):
+    """
+    Allocate the step 1 IDs into llm_result and queue the USER_SESSION_INPUTS,
+    prompt and LLM_EVALUATION rows on the audit writer.
+    """
+    evaluation = llm_result.get("evaluation", {}) if isinstance(llm_result, dict) else {}
+    app_session_id = data.get("app_session_id", f"sess_{uuid.uuid4()}")
+    case_id = data.get("case_id", "unknown_case")
+    line_item_id = data.get("line_item_id", "unknown_line")
+    input_field = data.get("input_field", ruleset_name)
+    input_text = text
+
+    # Keys are allocated up front, so the IDs can be returned synchronously
+    # while the inserts themselves are written in the background
+    user_input_id = allocate_id(user_input_ids)
+    evaluation_id = allocate_id(evaluation_ids)
+    
+    llm_result["rewrite_uuid"] = str(rewrite_uuid)
+    llm_result["user_input_id"] = user_input_id
+    llm_result["evaluation_id"] = evaluation_id
+    
+    total = len(evaluation) if isinstance(evaluation, dict) else 0
+    passed = sum(1 for v in evaluation.values() if v.get("passed")) if total else 0
+    score_num = (passed / total) * 100 if total else 0
+    # Insert evaluation with full details as JSON into VARIANT column
+    evaluation_details_json = json.dumps(llm_result)
+    
+    # USER_SESSION_INPUTS + LLM_EVALUATION
+    if user_input_id:
+        audit_writer.submit_row(
+            USER_SESSION_INPUTS_INSERT,
+            (user_input_id, user_id, app_session_id, case_id, line_item_id, input_field, input_text, timestamp)
+        )
+        audit_writer.submit_row(*evaluation_row(
+            evaluation_id, user_input_id, input_text, input_text, score_num, None, timestamp, evaluation_details_json))
+    else:
+        # The column generates the input ID: insert it directly and read it back,
+        # since the LLM_EVALUATION row links to it
+        def persist_user_input():
+            read_back_id = None
+            try:
+                snowflake_query(
+                    USER_SESSION_INPUTS_INSERT_AUTO_ID, CONNECTION_PAYLOAD,
+                    (user_id, app_session_id, case_id, line_item_id, input_field, input_text, timestamp),
+                    return_df=False,
+                )
+                df_id = snowflake_query(
+                    f"""
+                    SELECT ID FROM {DATABASE}.{SCHEMA}.USER_SESSION_INPUTS
+                    WHERE APP_SESSION_ID = %s
+                    ORDER BY TIMESTAMP DESC, ID DESC
+                    LIMIT 1
+                    """,
+                    CONNECTION_PAYLOAD,
+                    params=(app_session_id,),
+                )
+                read_back_id = int(df_id.iloc[0]["ID"]) if df_id is not None and not df_id.empty else None
+            except Exception as e:
+                print(f"⚠️  [DB] USER_SESSION_INPUTS error: {e}")
+            return [evaluation_row(
+                evaluation_id, read_back_id, input_text, input_text, score_num, None, timestamp, evaluation_details_json)]
+        audit_writer.submit_task(persist_user_input)
+    
+    # Prompts
+    name_to_id = {r["name"]: int(r["id"]) for r in (rules_payload.get("rules") or [])}
+    prompt_rows = []
+    for idx, (rule_name, section) in enumerate(evaluation.items()):
+        q = section.get("question")
+        if not q:
+            continue
+        crit_id = name_to_id.get(rule_name, idx + 1)
+        prompt_rows.append((rewrite_uuid, crit_id, 0, q, timestamp))
+    audit_writer.submit_rows(LLM_REWRITE_PROMPTS_INSERT, prompt_rows)
+
+def persist_llm_step2(data, text, answers, llm_result, user_id, timestamp):
+    """Queue the USER_REWRITE_INPUTS / LLM_EVALUATION rows and the LAST_INPUT_STATE update for a rewrite."""
+    rewritten = llm_result.get("rewrite") if isinstance(llm_result, dict) else None
+    # USER_REWRITE_INPUTS
+    if isinstance(answers, list):
+        for item in answers:
+            pid = item.get("rewrite_id")
+            ans = (item.get("answer") or "").strip()
+            # If rewrite_id is missing (from background Step 1), skip for now
+            if not pid and data.get("rewrite_uuid"):
+                continue
+            if not pid or not ans:
+                continue
+            audit_writer.submit_row(USER_REWRITE_INPUTS_INSERT, (pid, ans, timestamp))
+
+    # LLM_EVALUATION (step2) - with full rewrite details as JSON
+    evaluation_details_json = json.dumps(llm_result)
+    audit_writer.submit_row(*evaluation_row(
+        allocate_id(evaluation_ids),
+        data.get("user_input_id"),
+        text,
+        rewritten or text,
+        None,
+        data.get("rewrite_uuid"),
+        timestamp,
+        evaluation_details_json,
+    ))
+
+    # Update LAST_INPUT_STATE with the rewritten text for persistence
+    def persist_rewrite_state():
+        # Get the case session ID from the user input
+        case_query = f"""
+            SELECT CASE_ID, INPUT_FIELD_TYPE 
+            FROM {DATABASE}.{SCHEMA}.USER_SESSION_INPUTS 
+            WHERE ID = %s
+        """
+        case_result = snowflake_query(case_query, CONNECTION_PAYLOAD, (data.get("user_input_id"),))
+
+        if case_result is not None and not case_result.empty:
+            case_id = case_result.iloc[0]["CASE_ID"]
+            input_field_type = case_result.iloc[0]["INPUT_FIELD_TYPE"]
+
+            # Determine input field ID based on type
+            input_field_id = 1 if input_field_type == "problem_statement" else 2
+            input_states.write(case_id, user_id, [(input_field_id, 1, rewritten)])
+
+    if rewritten and data.get("user_input_id"):
+        audit_writer.submit_task(persist_rewrite_state)
+
+@app.route("/llm", methods=["POST"])
+def llm():
+    import time
+    start_time = time.time()
+    
+    data = request.get_json() or {}
+    text = data.get("text", "")
+    answers = data.get("answers", {})
+    try:
+        step = int(data.get("step", 1))
+    except Exception:
+        step = 1
+    ruleset_name = data.get("ruleset", "problem_statement")
+
+    rules_payload, advice_list = load_llm_ruleset(ruleset_name)
+
+    if not text.strip():
+        return jsonify({"result": "No text provided."})
+
+    rewrite_uuid = str(uuid.uuid4()) if step == 1 else None
+
+    # Step 1 evaluations of the same text against the same criteria are served from the cache
+    llm_result, cache_key, cache_meta = None, None, None
+    if step == 1:
+        llm_result, cache_key, cache_meta = lookup_cached_evaluation(data, text, ruleset_name, rules_payload)
+
+    if llm_result is None:
+        user_prompt = build_llm_prompt(step, text, answers, ruleset_name, rules_payload, advice_list)
+        try:
+            llm_result = complete_llm(user_prompt, step)
+        except Exception as e:
+            print(f"❌ [LLM] Error: {e}")
+            return jsonify({"result": llm_error_result(step, e)})
+        if cache_key and is_cacheable_evaluation(llm_result):
+            evaluation_cache.set(cache_key, llm_result)
 
     timestamp = datetime.utcnow()
-    response_prep_start = time.time()
+    user_data = session.get("user_data", {})
+    user_id = user_data.get("user_id")
 
     if step == 1:
         evaluation = llm_result.get("evaluation", {}) if isinstance(llm_result, dict) else {}
+        add_criteria_display_names(evaluation, rules_payload)
+        llm_result["cache"] = cache_meta
         
-        # Create a mapping of criteria names to display names
-        criteria_display_map = {}
-        for rule in rules_payload.get('rules', []):
-            criteria_display_map[rule['name']] = rule.get('display_name', rule['name'])
-        
-        # Add display names to evaluation results
-        for criteria_name, criteria_data in evaluation.items():
-            if isinstance(criteria_data, dict):
-                criteria_data['display_name'] = criteria_display_map.get(criteria_name, criteria_name.replace('_', ' ').title())
-        
-        user_data = session.get("user_data", {})
-        user_id = user_data.get("user_id")
-        app_session_id = data.get("app_session_id", f"sess_{uuid.uuid4()}")
-        case_id = data.get("case_id", "unknown_case")
-        line_item_id = data.get("line_item_id", "unknown_line")
-        input_field = data.get("input_field", ruleset_name)
-        input_text = text
-
-        # Return response immediately after LLM parsing - NO database queries block the response
-        llm_result["rewrite_uuid"] = str(rewrite_uuid)
-        llm_result["user_input_id"] = None  # Will be populated in background
-        llm_result["evaluation_id"] = None  # Will be populated in background
-        
-        response = jsonify({"result": llm_result})
-        
-        # Move ALL database queries to background thread
-        def background_db_operations():
-            try:
-                # USER_SESSION_INPUTS
-                user_input_id = None
-                try:
-                    snowflake_query(
-                        f"""
-                        INSERT INTO {DATABASE}.{SCHEMA}.USER_SESSION_INPUTS
-                        (USER_ID, APP_SESSION_ID, CASE_ID, LINE_ITEM_ID, INPUT_FIELD_TYPE, INPUT_TEXT, TIMESTAMP)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                        """,
-                        CONNECTION_PAYLOAD,
-                        (user_id, app_session_id, case_id, line_item_id, input_field, input_text, timestamp),
-                        return_df=False,
-                    )
-                    df_id = snowflake_query(
-                        f"""
-                        SELECT ID FROM {DATABASE}.{SCHEMA}.USER_SESSION_INPUTS
-                        WHERE APP_SESSION_ID = %s
-                        ORDER BY TIMESTAMP DESC
-                        LIMIT 1
-                        """,
-                        CONNECTION_PAYLOAD,
-                        params=(app_session_id,),
-                    )
-                    user_input_id = int(df_id.iloc[0]["ID"]) if df_id is not None and not df_id.empty else None
-                except Exception as e:
-                    print(f"⚠️  [DB] USER_SESSION_INPUTS error: {e}")
-                    user_input_id = None
-
-                # Prompts - insert and get rewrite_ids
-                name_to_id = {r["name"]: int(r["id"]) for r in (rules_payload.get("rules") or [])}
-                try:
-                    for idx, (rule_name, section) in enumerate(evaluation.items()):
-                        q = section.get("question")
-                        if not q:
-                            continue
-                        crit_id = name_to_id.get(rule_name, idx + 1)
-                        snowflake_query(
-                            f"""
-                            INSERT INTO {DATABASE}.{SCHEMA}.LLM_REWRITE_PROMPTS
-                            (REWRITE_UUID, CRITERIA_ID, CRITERIA_SCORE, REWRITE_QUESTION, TIMESTAMP)
-                            VALUES (%s, %s, %s, %s, %s)
-                            """,
-                            CONNECTION_PAYLOAD,
-                            (rewrite_uuid, crit_id, 0, q, timestamp),
-                            return_df=False,
-                        )
-                        df_prompt = snowflake_query(
-                            f"""
-                            SELECT ID FROM {DATABASE}.{SCHEMA}.LLM_REWRITE_PROMPTS
-                            WHERE REWRITE_UUID = %s AND REWRITE_QUESTION = %s
-                            ORDER BY TIMESTAMP DESC
-                            LIMIT 1
-                            """,
-                            CONNECTION_PAYLOAD,
-                            params=(rewrite_uuid, q),
-                        )
-                except Exception as e:
-                    print(f"⚠️  [DB] LLM_REWRITE_PROMPTS error: {e}")
-
-                # LLM_EVALUATION
-                if user_input_id:
-                    try:
-                        total = len(evaluation) if isinstance(evaluation, dict) else 0
-                        passed = sum(1 for v in evaluation.values() if v.get("passed")) if total else 0
-                        score_num = (passed / total) * 100 if total else 0
-                        
-                        # Insert evaluation with full details as JSON into VARIANT column
-                        evaluation_details_json = json.dumps(llm_result)
-                        insert_query = f"""
-                            INSERT INTO {DATABASE}.{SCHEMA}.LLM_EVALUATION
-                            (USER_INPUT_ID, ORIGINAL_TEXT, REWRITTEN_TEXT, SCORE, REWRITE_UUID, TIMESTAMP, EVALUATION_DETAILS)
-                            SELECT %s, %s, %s, %s, %s, %s, PARSE_JSON(%s)
-                        """
-                        snowflake_query(insert_query, CONNECTION_PAYLOAD,
-                                      (user_input_id, input_text, input_text, score_num, None, timestamp, evaluation_details_json),
-                                      return_df=False)
-                        
-                        # Get the evaluation ID that was just inserted
-                        id_query = f"""
-                            SELECT ID FROM {DATABASE}.{SCHEMA}.LLM_EVALUATION 
-                            WHERE USER_INPUT_ID = %s AND TIMESTAMP = %s
-                            ORDER BY ID DESC LIMIT 1
-                        """
-                        id_result = snowflake_query(id_query, CONNECTION_PAYLOAD, (user_input_id, timestamp))
-                        if id_result is not None and not id_result.empty:
-                            evaluation_id = int(id_result.iloc[0]["ID"])
-                    except Exception as e:
-                        print(f"⚠️  [DB] LLM_EVALUATION error: {e}")
-            except Exception as e:
-                print(f"⚠️  [DB] Step 1 background operations error: {e}")
-        
-        # Start background thread for ALL database operations
-        db_thread = threading.Thread(target=background_db_operations, daemon=True)
-        db_thread.start()
-        
-        return response
+        # IDs are allocated synchronously; the inserts are queued on the background audit writer
+        persist_llm_step1(data, text, ruleset_name, rules_payload, llm_result, rewrite_uuid, user_id, timestamp)
+        return jsonify({"result": llm_result})
 
     elif step == 2:
-        response_prep_start = time.time()
-        rewritten = llm_result.get("rewrite") if isinstance(llm_result, dict) else None
-        user_data = session.get("user_data", {})
-        user_id = user_data.get("user_id")
-        
         response = jsonify({"result": llm_result})
+        persist_llm_step2(data, text, answers, llm_result, user_id, timestamp)
+        return response
+
+    else:
+        return jsonify({"result": {"echo": True, "step": step}})
+
+def complete_llm(user_prompt, step):
+    """Call the model (retried by the gateway) and parse its JSON answer. Raises on failure."""
+    response = llm_gateway.complete(
+        [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}]
+    )
+    
+    # Check if response is valid
+    if not response or "choices" not in response or not response["choices"]:
+        raise Exception("Invalid LLM response structure")
         
-        # Run database queries in background thread
-        def background_db_operations():
+    llm_result_str = response["choices"][0]["message"]["content"]
+    
+    # Check if response content is empty or whitespace
+    if not llm_result_str or not llm_result_str.strip():
+        raise Exception("LLM returned empty response")
+    
+    return parse_llm_response(llm_result_str, step)
+
+def lookup_cached_evaluation(data, text, ruleset_name, rules_payload):
+    """
+    Returns (cached_result_or_None, cache_key, cache_metadata) for a step 1 evaluation.
+    Send "no_cache": true in the request body to force a fresh evaluation.
+    """
+    cache_key = evaluation_cache_key(
+        text, criteria_identity(rules_payload), ACTIVE_MODEL_CONFIG["model"],
+        f"llm:{ruleset_name}", PROMPT_TEMPLATE_VERSION
+    )
+    if data.get("no_cache"):
+        return None, cache_key, {"hit": False, "bypassed": True}
+    cached, cache_meta = evaluation_cache.get(cache_key)
+    return cached, cache_key, cache_meta
+
+def llm_error_result(step, error):
+    """User-facing error payload for a failed LLM call."""
+    if step == 1:
+        return {
+            "evaluation": {},
+            "error": f"LLM service error: {str(error)}. Please try again in a moment."
+        }
+    return {"rewrite": f"LLM service error: {str(error)}. Please try again in a moment."}
+
+@app.route("/llm/stream", methods=["POST"])
+def llm_stream():
+    """
+    Streaming variant of /llm (same request body) served as Server-Sent Events.
+
+    Step 1 emits a "criterion" event for each criterion as soon as the model has
+    finished it; step 2 emits "delta" events with the rewrite text as it is
+    generated. Both finish with a "result" event carrying exactly what /llm
+    would have returned in "result" (including user_input_id / evaluation_id),
+    or an "error" event whose payload is the usual error result.
+    """
+    data = request.get_json() or {}
+    text = data.get("text", "")
+    answers = data.get("answers", {})
+    try:
+        step = int(data.get("step", 1))
+    except Exception:
+        step = 1
+    if step not in (1, 2):
+        return jsonify({"error": "step must be 1 or 2"}), 400
+    if not text.strip():
+        return jsonify({"result": "No text provided."})
+    ruleset_name = data.get("ruleset", "problem_statement")
+    user_id = session.get("user_data", {}).get("user_id")
+
+    def generate():
+        rules_payload, advice_list = load_llm_ruleset(ruleset_name)
+        rewrite_uuid = str(uuid.uuid4()) if step == 1 else None
+        user_prompt = build_llm_prompt(step, text, answers, ruleset_name, rules_payload, advice_list)
+        llm_result, cache_key, cache_meta = None, None, None
+        if step == 1:
+            llm_result, cache_key, cache_meta = lookup_cached_evaluation(data, text, ruleset_name, rules_payload)
+        display_names = {r['name']: r.get('display_name', r['name']) for r in (rules_payload.get('rules') or [])}
+        parser = EvaluationStreamParser() if step == 1 else RewriteStreamParser()
+        llm_start = time.time()
+        first_event_ms = None
+
+        # Tell proxies/clients the stream is live before the model answers
+        yield sse_event("start", {"step": step, "rewrite_uuid": rewrite_uuid})
+
+        if llm_result is not None:
+            # Cache hit: replay the stored criteria straight away
+            for name, criterion in (llm_result.get("evaluation") or {}).items():
+                if isinstance(criterion, dict):
+                    criterion = dict(criterion, display_name=display_names.get(name, name.replace('_', ' ').title()))
+                    yield sse_event("criterion", {"name": name, "criterion": criterion})
+            first_event_ms = int((time.time() - llm_start) * 1000)
+        else:
             try:
-                # USER_REWRITE_INPUTS
-                if isinstance(answers, list):
-                    for item in answers:
-                        pid = item.get("rewrite_id")
-                        ans = (item.get("answer") or "").strip()
-                        # If rewrite_id is missing (from background Step 1), skip for now
-                        if not pid and data.get("rewrite_uuid"):
-                            continue
-                        if not pid or not ans:
-                            continue
-                        snowflake_query(
-                            f"""
-                            INSERT INTO {DATABASE}.{SCHEMA}.USER_REWRITE_INPUTS
-                            (REWRITE_ID, USER_REWRITE_INPUT, TIMESTAMP)
-                            VALUES (%s, %s, %s)
-                            """,
-                            CONNECTION_PAYLOAD,
-                            (pid, ans, timestamp),
-                            return_df=False,
-                        )
-                
-                # LLM_EVALUATION (step2) - with full rewrite details as JSON
-                evaluation_details_json = json.dumps(llm_result)
-                snowflake_query(
-                    f"""
-                    INSERT INTO {DATABASE}.{SCHEMA}.LLM_EVALUATION
-                    (USER_INPUT_ID, ORIGINAL_TEXT, REWRITTEN_TEXT, SCORE, REWRITE_UUID, TIMESTAMP, EVALUATION_DETAILS)
-                    SELECT %s, %s, %s, %s, %s, %s, PARSE_JSON(%s)
-                    """,
-                    CONNECTION_PAYLOAD,
-                    (
-                        data.get("user_input_id"),
-                        text,
-                        rewritten or text,
-                        None,
-                        data.get("rewrite_uuid"),
-                        timestamp,
-                        evaluation_details_json,
-                    ),
-                    return_df=False,
+                stream = llm_gateway.stream(
+                    [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}]
                 )
-                
-                # Update LAST_INPUT_STATE with the rewritten text for persistence
-                if rewritten and data.get("user_input_id"):
-                    # Get the case session ID from the user input
-                    case_query = f"""
-                        SELECT CASE_ID, INPUT_FIELD_TYPE 
-                        FROM {DATABASE}.{SCHEMA}.USER_SESSION_INPUTS 
-                        WHERE ID = %s
-                    """
-                    case_result = snowflake_query(case_query, CONNECTION_PAYLOAD, (data.get("user_input_id"),))
-                    
-                    if case_result is not None and not case_result.empty:
-                        case_id = case_result.iloc[0]["CASE_ID"]
-                        input_field_type = case_result.iloc[0]["INPUT_FIELD_TYPE"]
-                        
-                        # Get case session ID
-                        session_query = f"""
-                            SELECT ID FROM {DATABASE}.{SCHEMA}.CASE_SESSIONS 
-                            WHERE CASE_ID = %s AND CREATED_BY_USER = %s
-                        """
-                        session_result = snowflake_query(session_query, CONNECTION_PAYLOAD, (case_id, user_id))
-                        
-                        if session_result is not None and not session_result.empty:
-                            case_session_id = session_result.iloc[0]["ID"]
-                            
-                            # Determine input field ID based on type
-                            input_field_id = 1 if input_field_type == "problem_statement" else 2
-                            
-                            update_query = f"""
-                                MERGE INTO {DATABASE}.{SCHEMA}.LAST_INPUT_STATE AS target
-                                USING (SELECT %s as CASE_SESSION_ID, %s as INPUT_FIELD_ID, %s as INPUT_FIELD_VALUE, %s as LINE_ITEM_ID, %s as INPUT_FIELD_EVAL_ID) AS source
-                                ON target.CASE_SESSION_ID = source.CASE_SESSION_ID 
-                                   AND target.INPUT_FIELD_ID = source.INPUT_FIELD_ID 
-                                   AND target.LINE_ITEM_ID = source.LINE_ITEM_ID
-                                WHEN MATCHED THEN UPDATE SET 
-                                    INPUT_FIELD_VALUE = source.INPUT_FIELD_VALUE,
-                                    LAST_UPDATED = CURRENT_TIMESTAMP()
-                                WHEN NOT MATCHED THEN INSERT 
-                                    (CASE_SESSION_ID, INPUT_FIELD_ID, INPUT_FIELD_VALUE, LINE_ITEM_ID, INPUT_FIELD_EVAL_ID, LAST_UPDATED)
-                                    VALUES (source.CASE_SESSION_ID, source.INPUT_FIELD_ID, source.INPUT_FIELD_VALUE, source.LINE_ITEM_ID, source.INPUT_FIELD_EVAL_ID, CURRENT_TIMESTAMP())
-                            """
-                            snowflake_query(update_query, CONNECTION_PAYLOAD, 
-                                           (case_session_id, input_field_id, rewritten, 1, None), 
-                                           return_df=False)
+                for chunk in stream:
+                    try:
+                        delta = chunk.choices[0].delta.content
+                    except (AttributeError, IndexError):
+                        delta = None
+                    if not delta:
+                        continue
+                    if step == 1:
+                        for name, criterion in parser.feed(delta):
+                            criterion["display_name"] = display_names.get(name, name.replace('_', ' ').title())
+                            if first_event_ms is None:
+                                first_event_ms = int((time.time() - llm_start) * 1000)
+                            yield sse_event("criterion", {"name": name, "criterion": criterion})
+                    else:
+                        text_delta = parser.feed(delta)
+                        if text_delta:
+                            if first_event_ms is None:
+                                first_event_ms = int((time.time() - llm_start) * 1000)
+                            yield sse_event("delta", {"text": text_delta})
+
+                if not parser.text.strip():
+                    raise Exception("LLM returned empty response")
+                llm_result = parse_llm_response(parser.text, step)
             except Exception as e:
-                print(f"[DBG] /llm step2 background DB operations error: {e}")
-        
-        # Start background thread for database operations
-        db_thread = threading.Thread(target=background_db_operations, daemon=True)
-        db_thread.start()
-        
-        return response
+                print(f"❌ [LLM] Stream error: {e}")
+                yield sse_event("error", llm_error_result(step, e))
+                return
+            if cache_key and is_cacheable_evaluation(llm_result):
+                evaluation_cache.set(cache_key, llm_result)
 
-    else:
-        return jsonify({"result": {"echo": True, "step": step}})
+        timestamp = datetime.utcnow()
+        if step == 1:
+            evaluation = llm_result.get("evaluation", {}) if isinstance(llm_result, dict) else {}
+            add_criteria_display_names(evaluation, rules_payload)
+            llm_result["cache"] = cache_meta
+            persist_llm_step1(data, text, ruleset_name, rules_payload, llm_result, rewrite_uuid, user_id, timestamp)
+        else:
+            persist_llm_step2(data, text, answers, llm_result, user_id, timestamp)
+
+        print(f"📊 [LLM] Stream step {step}: first event {first_event_ms} ms, "
+              f"complete {int((time.time() - llm_start) * 1000)} ms")
+        yield sse_event("result", llm_result)
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # disable proxy buffering so events flush immediately
+    return response
 
 # API keys for the scoring endpoint
 API_KEYS = ["SAGE-access"]
 
-@app.route("/api/score", methods=["POST"])
-def score_text():
+class ScoreError(Exception):
+    """A scoring failure for one text, carrying the HTTP status /api/score responds with."""
+
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def score_item(data, rules_payloads=None, llm_attempts=None):
     """
-    API endpoint to score problem statements or FSRs.
-    Input: {"input_type": "problem_statement" or "fsr", "text": "text to evaluate"}
-    Output: {"score": percentage, "evaluation": {criteria_results}}
+    Score one {"input_type", "text", "criteria"?, "no_cache"?} item and return the
+    /api/score response body. rules_payloads optionally maps input_type to an
+    already loaded ruleset (used by /api/score/batch). llm_attempts overrides the
+    gateway's attempt count. Raises ScoreError.
     """
-    # Check API key authentication
-    api_key = request.headers.get("X-API-Key")
-    if not api_key:
-        return jsonify({"error": "API key required. Please include X-API-Key header."}), 401
-    
-    if api_key not in API_KEYS:
-        return jsonify({"error": "Invalid API key. Please check your credentials."}), 401
-    
-    try:
-        data = request.get_json()
-        
-        # Validate input
-        if not data or "input_type" not in data or "text" not in data:
-            return jsonify({"error": "Missing required fields: input_type and text"}), 400
-        
-        input_type = data["input_type"].lower()
-        text = data["text"].strip()
-        
-        if not text:
-            return jsonify({"error": "Text cannot be empty"}), 400
-        
-        if input_type not in ["problem_statement", "fsr"]:
-            return jsonify({"error": "input_type must be 'problem_statement' or 'fsr'"}), 400
-        
-        # Check for custom criteria override
-        custom_criteria = data.get("criteria")
-        
-        if custom_criteria:
-            # Validate custom criteria format
-            if not isinstance(custom_criteria, list):
-                return jsonify({"error": "criteria must be a list of objects"}), 400
-            
-            for i, criterion in enumerate(custom_criteria):
-                if not isinstance(criterion, dict):
-                    return jsonify({"error": f"criterion {i} must be an object"}), 400
-                
-                if "name" not in criterion:
-                    return jsonify({"error": f"criterion {i} missing required 'name' field"}), 400
-                
-                if "weight" not in criterion:
-                    return jsonify({"error": f"criterion {i} missing required 'weight' field"}), 400
-                
-                if not isinstance(criterion["weight"], (int, float)) or criterion["weight"] <= 0:
-                    return jsonify({"error": f"criterion {i} weight must be a positive number"}), 400
-            
-            # Use custom criteria
-            rules_list = [criterion["name"] for criterion in custom_criteria]
-            total_weight = sum(criterion["weight"] for criterion in custom_criteria)
-            
-            # Normalize weights to sum to 100
-            if total_weight != 100:
-                for criterion in custom_criteria:
-                    criterion["normalized_weight"] = round((criterion["weight"] / total_weight) * 100, 1)
-            else:
-                for criterion in custom_criteria:
-                    criterion["normalized_weight"] = criterion["weight"]
+
+    # Validate input
+    if not data or "input_type" not in data or "text" not in data:
+        raise ScoreError("Missing required fields: input_type and text", 400)
+
+    input_type = data["input_type"].lower()
+    text = data["text"].strip()
+
+    if not text:
+        raise ScoreError("Text cannot be empty", 400)
+
+    if input_type not in ["problem_statement", "fsr"]:
+        raise ScoreError("input_type must be 'problem_statement' or 'fsr'", 400)
+
+    # Check for custom criteria override
+    custom_criteria = data.get("criteria")
+
+    if custom_criteria:
+        # Validate custom criteria format
+        if not isinstance(custom_criteria, list):
+            raise ScoreError("criteria must be a list of objects", 400)
+
+        for i, criterion in enumerate(custom_criteria):
+            if not isinstance(criterion, dict):
+                raise ScoreError(f"criterion {i} must be an object", 400)
+
+            if "name" not in criterion:
+                raise ScoreError(f"criterion {i} missing required 'name' field", 400)
+
+            if "weight" not in criterion:
+                raise ScoreError(f"criterion {i} missing required 'weight' field", 400)
+
+            if not isinstance(criterion["weight"], (int, float)) or criterion["weight"] <= 0:
+                raise ScoreError(f"criterion {i} weight must be a positive number", 400)
+
+        # Use custom criteria
+        rules_list = [criterion["name"] for criterion in custom_criteria]
+        total_weight = sum(criterion["weight"] for criterion in custom_criteria)
+
+        # Normalize weights to sum to 100
+        if total_weight != 100:
+            for criterion in custom_criteria:
+                criterion["normalized_weight"] = round((criterion["weight"] / total_weight) * 100, 1)
         else:
-            # Use default criteria from database
-            if input_type == "fsr":
-                ruleset_name = "fsr"
-                input_field_type = "FSR_DAILY_NOTE"
-            else:
-                ruleset_name = "problem_statement"
-                input_field_type = "PROBLEM_STATEMENT"
-            
-            # Load rules and advice
+            for criterion in custom_criteria:
+                criterion["normalized_weight"] = criterion["weight"]
+    else:
+        # Use default criteria from database
+        if input_type == "fsr":
+            ruleset_name = "fsr"
+            input_field_type = "FSR_DAILY_NOTE"
+        else:
+            ruleset_name = "problem_statement"
+            input_field_type = "PROBLEM_STATEMENT"
+
+        # Load rules and advice
+        # A preloaded ruleset without rules (failed batch preload) is loaded again;
+        # failed loads are not cached, so this retries the database
+        rules_payload = (rules_payloads or {}).get(input_type)
+        if not rules_payload or not rules_payload.get('rules'):
             rules_payload = load_ruleset_from_db(input_field_type, "DEFAULT")
-            if not rules_payload or not rules_payload.get('rules'):
-                return jsonify({"error": "Failed to load evaluation criteria"}), 500
-            
-            rules_list = [r['name'] for r in (rules_payload.get('rules') or [])]
-            # Equal weighting for default criteria
-            custom_criteria = [{"name": rule, "normalized_weight": round(100 / len(rules_list), 1)} for rule in rules_list]
-        
-        # Ensure rules_payload is defined for custom criteria case
-        if custom_criteria and not 'rules_payload' in locals():
-            rules_payload = {"rules": [{"name": criterion["name"]} for criterion in custom_criteria]}
-        
-        advice_list = [
-            "Be specific and concrete in your descriptions",
-            "Use clear, technical language",
-            "Focus on the problem, not the solution",
-            "Include relevant context and scope"
-        ]
-        
-        # Build the same prompt as the main app
+        if not rules_payload or not rules_payload.get('rules'):
+            raise ScoreError("Failed to load evaluation criteria", 500)
+
         rules_list = [r['name'] for r in (rules_payload.get('rules') or [])]
-        rules_lines = "\n".join(f"- {n}" for n in rules_list)
-        advice = "\n".join(f"- {tip}" for tip in advice_list)
-        
-        user_prompt = (
-            "Criteria to evaluate (use EXACTLY these names as keys; do NOT invent or add any others):\n"
-            f"{rules_lines}\n\n"
-            "General advice for the user (DO NOT treat these as criteria keys):\n"
-            f"{advice}\n\n"
-            "Here is the text to review:\n"
-            f"\"\"\"\n{text}\n\"\"\"\n\n"
-            "Instructions:\n"
-            f"- You must return a JSON with this exact structure and keys ONLY from this list: {json.dumps(rules_list)}\n"
-            "- For each criterion, include: passed (boolean), justification (string), and if not passed, a question (string).\n"
-            "- Do NOT add any keys not present in the criteria list. Do NOT use advice items as keys.\n"
-            "- Do NOT use Markdown formatting (no ```json or ``` markers)\n"
-            "- Return ONLY raw JSON without any formatting or code blocks\n\n"
-            "Return your response as JSON like:\n"
-            "{\n"
-            "  \"evaluation\": {\n"
-            "    \"<criterion_name>\": {\n"
-            "      \"passed\": true/false,\n"
-            "      \"justification\": \"...\",\n"
-            "      \"question\": \"...\"\n"
-            "    }\n"
-            "  }\n"
-            "}\n"
-            "- Only return the JSON object; no extra commentary, no Markdown formatting."
-        )
-        
-        # Call LLM with same configuration as main app
-        model_kwargs = {
-            "model": ACTIVE_MODEL_CONFIG["model"],
-            "api_base": ACTIVE_MODEL_CONFIG["api_base"],
-            "custom_llm_provider": ACTIVE_MODEL_CONFIG["provider"],
-            "temperature": 0.1,
-            "max_tokens": 2000
-        }
-        
-        if ACTIVE_MODEL_CONFIG["use_token_provider"]:
-            model_kwargs["azure_ad_token_provider"] = ACTIVE_MODEL_CONFIG["token_provider"]
-            model_kwargs["api_version"] = ACTIVE_MODEL_CONFIG["api_version"]
-        else:
-            model_kwargs["api_key"] = ACTIVE_MODEL_CONFIG["api_key"]
-        
-        # Call LLM with retry logic
-        max_retries = 2
-        for attempt in range(max_retries):
-            try:
-                response = litellm.completion(
-                    messages=[{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}],
-                    **model_kwargs
-                )
-                break
-            except Exception as retry_error:
-                if attempt == max_retries - 1:
-                    return jsonify({"error": f"LLM service error: {str(retry_error)}"}), 500
-                time.sleep(1)
-        
+        # Equal weighting for default criteria
+        custom_criteria = [{"name": rule, "normalized_weight": round(100 / len(rules_list), 1)} for rule in rules_list]
+
+    # Ensure rules_payload is defined for custom criteria case
+    if custom_criteria and not 'rules_payload' in locals():
+        rules_payload = {"rules": [{"name": criterion["name"]} for criterion in custom_criteria]}
+
+    advice_list = [
+        "Be specific and concrete in your descriptions",
+        "Use clear, technical language",
+        "Focus on the problem, not the solution",
+        "Include relevant context and scope"
+    ]
+
+    # Build the same prompt as the main app
+    rules_list = [r['name'] for r in (rules_payload.get('rules') or [])]
+    rules_lines = "\n".join(f"- {n}" for n in rules_list)
+    advice = "\n".join(f"- {tip}" for tip in advice_list)
+
+    user_prompt = (
+        "Criteria to evaluate (use EXACTLY these names as keys; do NOT invent or add any others):\n"
+        f"{rules_lines}\n\n"
+        "General advice for the user (DO NOT treat these as criteria keys):\n"
+        f"{advice}\n\n"
+        "Here is the text to review:\n"
+        f"\"\"\"\n{text}\n\"\"\"\n\n"
+        "Instructions:\n"
+        f"- You must return a JSON with this exact structure and keys ONLY from this list: {json.dumps(rules_list)}\n"
+        "- For each criterion, include: passed (boolean), justification (string), and if not passed, a question (string).\n"
+        "- Do NOT add any keys not present in the criteria list. Do NOT use advice items as keys.\n"
+        "- Do NOT use Markdown formatting (no ```json or ``` markers)\n"
+        "- Return ONLY raw JSON without any formatting or code blocks\n\n"
+        "Return your response as JSON like:\n"
+        "{\n"
+        "  \"evaluation\": {\n"
+        "    \"<criterion_name>\": {\n"
+        "      \"passed\": true/false,\n"
+        "      \"justification\": \"...\",\n"
+        "      \"question\": \"...\"\n"
+        "    }\n"
+        "  }\n"
+        "}\n"
+        "- Only return the JSON object; no extra commentary, no Markdown formatting."
+    )
+
+    # Identical text scored against the same criteria is served from the evaluation cache
+    cache_key = evaluation_cache_key(
+        text, criteria_identity(rules_payload), ACTIVE_MODEL_CONFIG["model"],
+        "score", PROMPT_TEMPLATE_VERSION
+    )
+    if data.get("no_cache"):
+        llm_result, cache_meta = None, {"hit": False, "bypassed": True}
+    else:
+        llm_result, cache_meta = evaluation_cache.get(cache_key)
+
+    if llm_result is None:
+        # Call LLM through the shared gateway (retries with backoff)
+        try:
+            response = llm_gateway.complete(
+                [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}],
+                max_attempts=llm_attempts,
+                max_tokens=2000
+            )
+        except Exception as llm_error:
+            raise ScoreError(f"LLM service error: {str(llm_error)}", 500)
+
         # Validate response
         if not response or "choices" not in response or not response["choices"]:
-            return jsonify({"error": "Invalid LLM response structure"}), 500
-            
+            raise ScoreError("Invalid LLM response structure", 500)
+
         llm_result_str = response["choices"][0]["message"]["content"]
-        
+
         if not llm_result_str or not llm_result_str.strip():
-            return jsonify({"error": "LLM returned empty response"}), 500
-        
+            raise ScoreError("LLM returned empty response", 500)
+
         # Parse JSON response
         try:
             llm_result = json.loads(llm_result_str)
@@ -2609,122 +3106,323 @@ def score_text():
                     end_marker = "```"
                     start_idx = llm_result_str.find(start_marker) + len(start_marker)
                     end_idx = llm_result_str.find(end_marker, start_idx)
-                    
+
                     if start_idx != -1 and end_idx != -1:
                         json_content = llm_result_str[start_idx:end_idx].strip()
                         llm_result = json.loads(json_content)
                     else:
-                        return jsonify({"error": "Malformed LLM response"}), 500
+                        raise ScoreError("Malformed LLM response", 500)
                 else:
-                    return jsonify({"error": "Malformed LLM response"}), 500
+                    raise ScoreError("Malformed LLM response", 500)
+            except ScoreError:
+                raise
             except Exception:
-                return jsonify({"error": "Failed to parse LLM response"}), 500
-        
-        # Extract evaluation results
-        evaluation = llm_result.get("evaluation", {})
-        if not evaluation:
-            return jsonify({"error": "No evaluation results found"}), 500
-        
-        # Calculate score using custom weights
-        total_criteria = len(rules_list)
-        passed_criteria = sum(1 for v in evaluation.values() if v.get("passed", False))
-        
-        # Calculate weighted score
-        total_score = 0
-        for criterion in custom_criteria:
-            criteria_name = criterion["name"]
-            if criteria_name in evaluation and evaluation[criteria_name].get("passed", False):
-                total_score += criterion["normalized_weight"]
-        
-        score = round(total_score)
-        
-        # Simplify evaluation results to only include passed status and normalized score
-        simplified_evaluation = {}
-        
-        for criteria_name, criteria_data in evaluation.items():
-            if isinstance(criteria_data, dict):
-                # Find the corresponding criterion to get its weight
-                criterion_info = next((c for c in custom_criteria if c["name"] == criteria_name), None)
-                criteria_score = criterion_info["normalized_weight"] if criterion_info and criteria_data.get("passed", False) else 0
-                
-                simplified_evaluation[criteria_name] = {
-                    "passed": criteria_data.get("passed", False),
-                    "score": criteria_score
-                }
-        
-        return jsonify({
-            "score": score,
-            "evaluation": simplified_evaluation,
-            "input_type": input_type,
-            "total_criteria": total_criteria,
-            "passed_criteria": passed_criteria
-        })
-        
+                raise ScoreError("Failed to parse LLM response", 500)
+
+        if is_cacheable_evaluation(llm_result):
+            evaluation_cache.set(cache_key, llm_result)
+
+    # Extract evaluation results
+    evaluation = llm_result.get("evaluation", {})
+    if not evaluation:
+        raise ScoreError("No evaluation results found", 500)
+
+    # Calculate score using custom weights
+    total_criteria = len(rules_list)
+    passed_criteria = sum(1 for v in evaluation.values() if v.get("passed", False))
+
+    # Calculate weighted score
+    total_score = 0
+    for criterion in custom_criteria:
+        criteria_name = criterion["name"]
+        if criteria_name in evaluation and evaluation[criteria_name].get("passed", False):
+            total_score += criterion["normalized_weight"]
+
+    score = round(total_score)
+
+    # Simplify evaluation results to only include passed status and normalized score
+    simplified_evaluation = {}
+
+    for criteria_name, criteria_data in evaluation.items():
+        if isinstance(criteria_data, dict):
+            # Find the corresponding criterion to get its weight
+            criterion_info = next((c for c in custom_criteria if c["name"] == criteria_name), None)
+            criteria_score = criterion_info["normalized_weight"] if criterion_info and criteria_data.get("passed", False) else 0
+
+            simplified_evaluation[criteria_name] = {
+                "passed": criteria_data.get("passed", False),
+                "score": criteria_score
+            }
+
+    return {
+        "score": score,
+        "evaluation": simplified_evaluation,
+        "input_type": input_type,
+        "total_criteria": total_criteria,
+        "passed_criteria": passed_criteria,
+        "cache": cache_meta
+    }
+
+@app.route("/api/score", methods=["POST"])
+def score_text():
+    """
+    API endpoint to score problem statements or FSRs.
+    Input: {"input_type": "problem_statement" or "fsr", "text": "text to evaluate"}
+    Output: {"score": percentage, "evaluation": {criteria_results}}
+    """
+    # Check API key authentication
+    api_key = request.headers.get("X-API-Key")
+    if not api_key:
+        return jsonify({"error": "API key required. Please include X-API-Key header."}), 401
+    
+    if api_key not in API_KEYS:
+        return jsonify({"error": "Invalid API key. Please check your credentials."}), 401
+    
+    try:
+        return jsonify(score_item(request.get_json()))
+    except ScoreError as e:
+        return jsonify({"error": e.message}), e.status
     except Exception as e:
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
-@app.route("/speech-to-text", methods=["POST"])
-def speech_to_text():
-    print("Received request to /speech-to-text")
- 
+# Batch scoring: items are fanned out over a bounded thread pool per request and
+# streamed back as NDJSON in completion order
+SCORE_BATCH_MAX_ITEMS = int(os.environ.get('SCORE_BATCH_MAX_ITEMS', '1000'))
+SCORE_BATCH_CONCURRENCY = int(os.environ.get('SCORE_BATCH_CONCURRENCY', '8'))
+SCORE_BATCH_ITEM_RETRIES = int(os.environ.get('SCORE_BATCH_ITEM_RETRIES', '2'))
+
+def _score_batch_item(index, item, rules_payloads):
+    """Score one batch item with retries on server-side (5xx) failures; never raises."""
+    item_id = item.get("id", index) if isinstance(item, dict) else index
+    started = time.time()
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            result = score_item(item if isinstance(item, dict) else None, rules_payloads, llm_attempts=1)
+            result.update({"id": item_id, "index": index, "ok": True})
+            break
+        except Exception as e:
+            status = e.status if isinstance(e, ScoreError) else 500
+            message = e.message if isinstance(e, ScoreError) else f"Internal server error: {str(e)}"
+            # Bad input will not get better on retry; LLM/transient failures might
+            if status < 500 or not isinstance(e, ScoreError) or attempts > SCORE_BATCH_ITEM_RETRIES:
+                result = {"id": item_id, "index": index, "ok": False, "error": message, "status": status}
+                break
+            # Jittered exponential backoff: ~0.5s, ~1s, ~2s ...
+            time.sleep(min(8.0, 0.5 * 2 ** (attempts - 1)) * random.uniform(0.5, 1.5))
+    result["attempts"] = attempts
+    result["duration_ms"] = int((time.time() - started) * 1000)
+    return result
+
+@app.route("/api/score/batch", methods=["POST"])
+def score_batch():
+    """
+    Score many texts in one call.
+    Input: [{"id": ..., "input_type": ..., "text": ..., "criteria"?: [...]}, ...]
+           (or {"items": [...]})
+    Output: NDJSON, one line per item in completion order, each the /api/score
+            body plus "id", "index", "ok", "attempts", "duration_ms" (or "error"/"status").
+    """
+    api_key = request.headers.get("X-API-Key")
+    if not api_key:
+        return jsonify({"error": "API key required. Please include X-API-Key header."}), 401
+    
+    if api_key not in API_KEYS:
+        return jsonify({"error": "Invalid API key. Please check your credentials."}), 401
+    
+    data = request.get_json(silent=True)
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Request body must be a non-empty array of items"}), 400
+    if len(items) > SCORE_BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Too many items ({len(items)}); the limit is {SCORE_BATCH_MAX_ITEMS}"}), 400
+    
+    # Load each default ruleset once for the whole batch
+    rules_payloads = {}
+    for input_type in ("problem_statement", "fsr"):
+        if any(isinstance(item, dict) and not item.get("criteria")
+               and str(item.get("input_type", "")).lower() == input_type for item in items):
+            input_field_type = "FSR_DAILY_NOTE" if input_type == "fsr" else "PROBLEM_STATEMENT"
+            rules_payload = load_ruleset_from_db(input_field_type, "DEFAULT")
+            # Only share a successful load; items load it themselves otherwise
+            if rules_payload and rules_payload.get("rules"):
+                rules_payloads[input_type] = rules_payload
+    
+    def generate():
+        executor = ThreadPoolExecutor(max_workers=min(SCORE_BATCH_CONCURRENCY, len(items)),
+                                      thread_name_prefix="score-batch")
+        try:
+            futures = [executor.submit(_score_batch_item, index, item, rules_payloads)
+                       for index, item in enumerate(items)]
+            for future in as_completed(futures):
+                yield json.dumps(future.result()) + "\n"
+        finally:
+            # Client went away or we are done: drop anything not yet started
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    response = Response(generate(), mimetype="application/x-ndjson")
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+# Speech-to-text input is downmixed/resampled in memory before it is sent to the model.
+# Recordings longer than AUDIO_MAX_SEGMENT_SECONDS are split at pauses into ~AUDIO_SEGMENT_SECONDS
+# segments that are transcribed concurrently (AUDIO_SEGMENT_PARALLELISM) and stitched in order.
+AUDIO_MAX_UPLOAD_BYTES = int(os.environ.get('AUDIO_MAX_UPLOAD_BYTES', str(25 * 1024 * 1024)))
+AUDIO_SEGMENT_PARALLELISM = int(os.environ.get('AUDIO_SEGMENT_PARALLELISM', '4'))
+audio_transcoder = AudioTranscoder(
+    sample_rate=int(os.environ.get('AUDIO_SAMPLE_RATE', '16000')),
+    bitrate=os.environ.get('AUDIO_BITRATE', '32k'),
+    max_duration=int(os.environ.get('AUDIO_MAX_DURATION', '300')),
+    segment_seconds=int(os.environ.get('AUDIO_SEGMENT_SECONDS', '30')),
+    max_segment_seconds=int(os.environ.get('AUDIO_MAX_SEGMENT_SECONDS', '45'))
+)
+
+def _transcribe_mp3(mp3_bytes):
+    """Send one MP3 clip to the multimodal model and return its transcript."""
+    response = client.chat.completions.create(
+        messages=[{
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": "Transcribe this audio word for word, in exactly the order it is spoken."
+                },
+                {
+                    "type": "input_audio",
+                    "input_audio": {
+                        "data": base64.b64encode(mp3_bytes).decode("utf-8"),
+                        "format": "mp3"
+                    },
+                },
+            ],
+        }],
+        model="Phi-4-multimodal-instruct",
+        max_completion_tokens=512,
+        temperature=0.1,
+    )
+    return response.choices[0].message.content or ""
+
+def _decode_audio_upload():
+    """
+    Read and decode the uploaded 'audio' file.
+    Returns (pcm, decode_ms, None) or (None, None, error_response).
+    """
     if 'audio' not in request.files:
         print("No audio file found in request.")
-        return jsonify({"error": "No audio file uploaded."}), 400
- 
+        return None, None, (jsonify({"error": "No audio file uploaded."}), 400)
+
     audio_file = request.files['audio']
     print(f"Audio file received: {audio_file.filename}")
- 
+
+    audio_bytes = audio_file.read(AUDIO_MAX_UPLOAD_BYTES + 1)
+    if len(audio_bytes) > AUDIO_MAX_UPLOAD_BYTES:
+        return None, None, (jsonify({"error": "Audio file too large."}), 413)
+
+    started = time.perf_counter()
     try:
-        # Create temporary files for raw and mp3 audio
-        with tempfile.NamedTemporaryFile(delete=True, suffix="_raw") as raw_temp, \
-             tempfile.NamedTemporaryFile(delete=True, suffix=".mp3") as mp3_temp:
- 
-            # Save raw audio to temp file
-            audio_file.save(raw_temp.name)
-            print(f"Raw audio temporarily saved to: {raw_temp.name}")
- 
-            # Convert to MP3
-            audio = AudioSegment.from_file(raw_temp.name)
-            audio.export(mp3_temp.name, format="mp3")
-            print(f"Audio converted to MP3: {mp3_temp.name}")
- 
-            # Encode MP3 to base64
-            with open(mp3_temp.name, "rb") as f:
-                audio_base64 = base64.b64encode(f.read()).decode("utf-8")
-            print("MP3 audio file successfully encoded to base64.")
+        pcm = audio_transcoder.decode(audio_bytes)
+    except AudioTooLong as e:
+        return None, None, (jsonify({"error": str(e)}), 413)
+    except AudioError as e:
+        print(f"❌ [Audio] Could not decode upload: {e}")
+        return None, None, (jsonify({"error": "Could not decode audio."}), 400)
+    decode_ms = round((time.perf_counter() - started) * 1000, 1)
+    print(f"🎙️ [Audio] {audio_transcoder.duration(pcm):.1f}s of audio from {len(audio_bytes)} bytes "
+          f"(decode {decode_ms}ms)")
+    return pcm, decode_ms, None
+
+def _transcribe_segments(pcm, segments):
+    """
+    Encode and transcribe PCM segments concurrently.
+    Yields (index, text, encode_ms) in segment order as soon as each is available.
+    """
+    def work(begin, end, _overlaps_previous=False):
+        started = time.perf_counter()
+        mp3_bytes = audio_transcoder.encode(pcm[begin:end])
+        encode_ms = round((time.perf_counter() - started) * 1000, 1)
+        return _transcribe_mp3(mp3_bytes), encode_ms
+
+    if len(segments) == 1:
+        text, encode_ms = work(*segments[0])
+        yield 0, text, encode_ms
+        return
+    executor = ThreadPoolExecutor(max_workers=min(AUDIO_SEGMENT_PARALLELISM, len(segments)),
+                                  thread_name_prefix="stt-segment")
+    try:
+        futures = [executor.submit(work, *segment) for segment in segments]
+        for index, future in enumerate(futures):
+            text, encode_ms = future.result()
+            yield index, text, encode_ms
+    finally:
+        # Client went away or a segment failed: drop segments not yet started
+        executor.shutdown(wait=False, cancel_futures=True)
+
+@app.route("/speech-to-text", methods=["POST"])
+def speech_to_text():
+    print("Received request to /speech-to-text")
  
-        # Send to LLM for transcription
-        print("Sending request to LLM for transcription...")
-        response = client.chat.completions.create(
-            messages=[{
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": "Transcribe this audio word for word, in exactly the order it is spoken."
-                    },
-                    {
-                        "type": "input_audio",
-                        "input_audio": {
-                            "data": audio_base64,
-                            "format": "mp3"
-                        },
-                    },
-                ],
-            }],
-            model="Phi-4-multimodal-instruct",
-            max_completion_tokens=512,
-            temperature=0.1,
-        )
+    pcm, decode_ms, error = _decode_audio_upload()
+    if error:
+        return error
+
+    try:
+        segments = audio_transcoder.segments(pcm)
+        print(f"Sending {len(segments)} segment(s) to LLM for transcription...")
+        started = time.perf_counter()
+        transcription = ""
+        encode_ms = 0.0
+        for index, text, segment_encode_ms in _transcribe_segments(pcm, segments):
+            transcription = stitch(transcription, text, overlapped=segments[index][2])
+            encode_ms += segment_encode_ms
+        transcribe_ms = round((time.perf_counter() - started) * 1000, 1)
  
-        transcription = response.choices[0].message.content
         print("Transcription received from LLM.")
-        return jsonify({"transcription": transcription})
+        result = jsonify({"transcription": transcription, "segments": len(segments)})
+        result.headers['Server-Timing'] = (f"decode;dur={decode_ms}, encode;dur={round(encode_ms, 1)}, "
+                                           f"transcribe;dur={transcribe_ms}")
+        return result
  
+    except AudioError as e:
+        print(f"❌ [Audio] Could not encode audio: {e}")
+        return jsonify({"error": "Could not encode audio."}), 500
     except Exception as e:
         print(f"Error during transcription: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/speech-to-text/stream", methods=["POST"])
+def speech_to_text_stream():
+    """
+    Streaming variant of /speech-to-text (same multipart upload) served as Server-Sent Events.
+
+    Emits "start" ({segments, duration_s}), then one "partial" event per segment in
+    order ({index, text, transcript} where transcript is everything stitched so far),
+    and finally "result" ({transcription}) or "error" ({error}).
+    """
+    pcm, decode_ms, error = _decode_audio_upload()
+    if error:
+        return error
+    segments = audio_transcoder.segments(pcm)
+    duration = round(audio_transcoder.duration(pcm), 2)
+
+    def generate():
+        yield sse_event("start", {"segments": len(segments), "duration_s": duration, "decode_ms": decode_ms})
+        transcript = ""
+        try:
+            for index, text, _ in _transcribe_segments(pcm, segments):
+                transcript = stitch(transcript, text, overlapped=segments[index][2])
+                yield sse_event("partial", {"index": index, "text": text, "transcript": transcript})
+        except Exception as e:
+            print(f"Error during streamed transcription: {e}")
+            yield sse_event("error", {"error": str(e), "transcription": transcript})
+            return
+        yield sse_event("result", {"transcription": transcript})
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
 @app.route('/api/cases/feedback', methods=['POST'])
 def submit_case_feedback():
     """
@@ -2758,13 +3456,7 @@ def submit_case_feedback():
         case_number = int(data.get('case_number'))
         
         # Check if case exists for this user
-        case_check_query = f"""
-            SELECT ID FROM {DATABASE}.{SCHEMA}.CASE_SESSIONS 
-            WHERE CASE_ID = %s AND CREATED_BY_USER = %s
-        """
-        case_result = snowflake_query(case_check_query, CONNECTION_PAYLOAD, (case_number, user_id))
-        
-        if case_result is None or case_result.empty:
+        if input_states.session_id(case_number, user_id, fresh=True) is None:
             return jsonify({"error": "Case not found"}), 404
         
         # Insert feedback into CASE_REVIEW table
@@ -2815,7 +3507,7 @@ def submit_case_feedback():
 def generate_case_feedback():
     """
     Generate LLM-based feedback for a closed case using case information.
-    Uses direct LLM call with the same configuration as the rest of the application.
+    Uses the shared LLM gateway, with the same configuration as the rest of the application.
     """
     user_data = session.get('user_data')
     if not user_data:
@@ -2832,18 +3524,10 @@ def generate_case_feedback():
     try:
         case_number_int = int(case_number)
         
-        # Get case session ID
-        session_query = f"""
-            SELECT ID FROM {DATABASE}.{SCHEMA}.CASE_SESSIONS 
-            WHERE CASE_ID = %s AND CREATED_BY_USER = %s
-        """
-        session_result = snowflake_query(session_query, CONNECTION_PAYLOAD, (case_number_int, user_id))
-        
-        if session_result is None or session_result.empty:
+        case_session_id = input_states.session_id(case_number_int, user_id, fresh=True)
+        if case_session_id is None:
             return jsonify({"error": "Case not found"}), 404
         
-        case_session_id = session_result.iloc[0]["ID"]
-        
         # Get problem statement
         problem_query = f"""
             SELECT INPUT_FIELD_VALUE
@@ -2910,26 +3594,10 @@ FIX: [solution implemented]
 Be specific and technical, drawing from the case information provided.
 """
         
-        # Direct LLM call using the same configuration as the main app
-        model_kwargs = {
-            "model": ACTIVE_MODEL_CONFIG["model"],
-            "api_base": ACTIVE_MODEL_CONFIG["api_base"],
-            "custom_llm_provider": ACTIVE_MODEL_CONFIG["provider"],
-            "temperature": 0.1,
-        }
-        if ACTIVE_MODEL_CONFIG["use_token_provider"]:
-            model_kwargs["azure_ad_token_provider"] = ACTIVE_MODEL_CONFIG["token_provider"]
-            model_kwargs["api_version"] = ACTIVE_MODEL_CONFIG["api_version"]
-        else:
-            model_kwargs["api_key"] = ACTIVE_MODEL_CONFIG["api_key"]
-        
-        # Call LLM directly
-        response = litellm.completion(
-            messages=[
-                {"role": "user", "content": llm_prompt}
-            ],
-            **model_kwargs
-        )
+        # LLM call through the shared gateway (same model configuration as the main app)
+        response = llm_gateway.complete([
+            {"role": "user", "content": llm_prompt}
+        ])
         
         generated_content = response.choices[0].message.content
         
@@ -3052,6 +3720,7 @@ def create_case():
         response_data = {
             "success": True,
             "case_number": case_number,
+            "case_title": case_title,
             "message": "Case created successfully",
             "exists_in_crm": exists_in_crm
         }
@@ -3141,6 +3810,7 @@ def delete_case(case_number):
         """
         snowflake_query(delete_case_query, CONNECTION_PAYLOAD, (case_session_id,), return_df=False)
         print(f"✅ [Backend] Deleted case session for case {case_number}")
+        input_states.forget(result.iloc[0]["CASE_ID"], user_id)
         
         return jsonify({
             "success": True,
@@ -3175,64 +3845,14 @@ def get_input_state():
     
     try:
         case_number_int = int(case_number)
-        
-        # Get case session ID
-        session_query = f"""
-            SELECT ID FROM {DATABASE}.{SCHEMA}.CASE_SESSIONS 
-            WHERE CASE_ID = %s AND CREATED_BY_USER = %s
-        """
-        session_result = snowflake_query(session_query, CONNECTION_PAYLOAD, (case_number_int, user_id))
-        
-        if session_result is None or session_result.empty:
+
+        # Session lookup and both fields in one query (not cached: other workers may have saved since)
+        state = input_states.read(case_number_int, user_id)
+        if state is None:
             return jsonify({"error": "Case not found"}), 404
-        
-        case_session_id = session_result.iloc[0]["ID"]
-        
-        # Get problem statement (INPUT_FIELD_ID = 1)
-        problem_query = f"""
-            SELECT INPUT_FIELD_VALUE, LAST_UPDATED
-            FROM {DATABASE}.{SCHEMA}.LAST_INPUT_STATE
-            WHERE CASE_SESSION_ID = %s AND INPUT_FIELD_ID = 1
-        """
-        problem_result = snowflake_query(problem_query, CONNECTION_PAYLOAD, (case_session_id,))
-        if problem_result is not None and not problem_result.empty:
-            problem_text = problem_result.iloc[0]["INPUT_FIELD_VALUE"] or ""
-        
-        # Get FSR notes (INPUT_FIELD_ID = 2)
-        fsr_query = f"""
-            SELECT LINE_ITEM_ID, INPUT_FIELD_VALUE, LAST_UPDATED
-            FROM {DATABASE}.{SCHEMA}.LAST_INPUT_STATE
-            WHERE CASE_SESSION_ID = %s AND INPUT_FIELD_ID = 2
-            ORDER BY LINE_ITEM_ID
-        """
-        fsr_result = snowflake_query(fsr_query, CONNECTION_PAYLOAD, (case_session_id,))
-        
-        # Build response
-        response_data = {
-            "case_number": case_number,
-            "problem_statement": "",
-            "fsr_notes": "",
-            "fsr_line_items": []
-        }
-        
-        if problem_result is not None and not problem_result.empty:
-            problem_row = problem_result.iloc[0]
-            response_data["problem_statement"] = problem_row["INPUT_FIELD_VALUE"] or ""
-        
-        if fsr_result is not None and not fsr_result.empty:
-            # Get all FSR line items
-            for _, fsr_row in fsr_result.iterrows():
-                line_item = {
-                    "line_item_id": fsr_row["LINE_ITEM_ID"],
-                    "value": fsr_row["INPUT_FIELD_VALUE"],
-                    "last_updated": fsr_row["LAST_UPDATED"].isoformat() if fsr_row["LAST_UPDATED"] else None
-                }
-                response_data["fsr_line_items"].append(line_item)
-            
-            # Get the last FSR line item for the main fsr_notes field
-            last_fsr = fsr_result.iloc[-1]
-            response_data["fsr_notes"] = last_fsr["INPUT_FIELD_VALUE"] or ""
-        
+
+        response_data = {"case_number": case_number}
+        response_data.update(state)
         return jsonify(response_data)
         
     except ValueError:
@@ -3264,60 +3884,20 @@ def update_input_state():
     
     try:
         case_number_int = int(case_number)
-        
-        # Get case session ID
-        session_query = f"""
-            SELECT ID FROM {DATABASE}.{SCHEMA}.CASE_SESSIONS 
-            WHERE CASE_ID = %s AND CREATED_BY_USER = %s
-        """
-        session_result = snowflake_query(session_query, CONNECTION_PAYLOAD, (case_number_int, user_id))
-        
-        if session_result is None or session_result.empty:
+
+        # Problem statement has no line item; FSR notes are line item 1. Returns once the
+        # save is committed; the version orders acknowledgements for the client.
+        version = input_states.write(case_number_int, user_id, [
+            (1, None, problem_statement),
+            (2, 1, fsr_notes),
+        ], evaluation_id=evaluation_id)
+        if version is None:
             return jsonify({"error": "Case not found"}), 404
-        
-        case_session_id = session_result.iloc[0]["ID"]
-        
-        # Update problem statement using MERGE (Snowflake upsert)
-        if problem_statement:
-            problem_merge = f"""
-                MERGE INTO {DATABASE}.{SCHEMA}.LAST_INPUT_STATE AS target
-                USING (SELECT %s as CASE_SESSION_ID, %s as INPUT_FIELD_ID, %s as INPUT_FIELD_VALUE, %s as LINE_ITEM_ID, %s as INPUT_FIELD_EVAL_ID) AS source
-                ON target.CASE_SESSION_ID = source.CASE_SESSION_ID 
-                   AND target.INPUT_FIELD_ID = source.INPUT_FIELD_ID 
-                   AND target.LINE_ITEM_ID = source.LINE_ITEM_ID
-                WHEN MATCHED THEN UPDATE SET 
-                    INPUT_FIELD_VALUE = source.INPUT_FIELD_VALUE,
-                    LAST_UPDATED = CURRENT_TIMESTAMP()
-                WHEN NOT MATCHED THEN INSERT 
-                    (CASE_SESSION_ID, INPUT_FIELD_ID, INPUT_FIELD_VALUE, LINE_ITEM_ID, INPUT_FIELD_EVAL_ID, LAST_UPDATED)
-                    VALUES (source.CASE_SESSION_ID, source.INPUT_FIELD_ID, source.INPUT_FIELD_VALUE, source.LINE_ITEM_ID, source.INPUT_FIELD_EVAL_ID, CURRENT_TIMESTAMP())
-            """
-            snowflake_query(problem_merge, CONNECTION_PAYLOAD, 
-                           (case_session_id, 1, problem_statement, None, evaluation_id), 
-                           return_df=False)
-        
-        # Update FSR notes using MERGE (Snowflake upsert)
-        if fsr_notes:
-            fsr_merge = f"""
-                MERGE INTO {DATABASE}.{SCHEMA}.LAST_INPUT_STATE AS target
-                USING (SELECT %s as CASE_SESSION_ID, %s as INPUT_FIELD_ID, %s as INPUT_FIELD_VALUE, %s as LINE_ITEM_ID, %s as INPUT_FIELD_EVAL_ID) AS source
-                ON target.CASE_SESSION_ID = source.CASE_SESSION_ID 
-                   AND target.INPUT_FIELD_ID = source.INPUT_FIELD_ID 
-                   AND target.LINE_ITEM_ID = source.LINE_ITEM_ID
-                WHEN MATCHED THEN UPDATE SET 
-                    INPUT_FIELD_VALUE = source.INPUT_FIELD_VALUE,
-                    LAST_UPDATED = CURRENT_TIMESTAMP()
-                WHEN NOT MATCHED THEN INSERT 
-                    (CASE_SESSION_ID, INPUT_FIELD_ID, INPUT_FIELD_VALUE, LINE_ITEM_ID, INPUT_FIELD_EVAL_ID, LAST_UPDATED)
-                    VALUES (source.CASE_SESSION_ID, source.INPUT_FIELD_ID, source.INPUT_FIELD_VALUE, source.LINE_ITEM_ID, source.INPUT_FIELD_EVAL_ID, CURRENT_TIMESTAMP())
-            """
-            snowflake_query(fsr_merge, CONNECTION_PAYLOAD, 
-                           (case_session_id, 2, fsr_notes, 1, evaluation_id), 
-                           return_df=False)
-        
+
         return jsonify({
             "success": True,
             "case_number": case_number,
+            "version": version,
             "message": "Input state updated successfully"
         })
         
@@ -3339,11 +3919,27 @@ def clear_feedback_flags():
         "instructions": "Run localStorage.clear() in browser console to clear all feedback flags"
     })
 
+HISTORY_PAGE_MAX = int(os.environ.get('HISTORY_PAGE_MAX', '100'))
+
+def _history_cursor(row):
+    return f"{row['TIMESTAMP']}|{row['ID']}"
+
+def _parse_history_cursor(cursor):
+    """'<ISO timestamp>|<evaluation id>' -> (timestamp, id); raises ValueError if malformed."""
+    timestamp, _, evaluation_id = (cursor or "").rpartition("|")
+    if not timestamp:
+        raise ValueError(f"Invalid history cursor: {cursor}")
+    return timestamp, int(evaluation_id)
+
 @app.route('/api/cases/history', methods=['GET'])
 def get_case_history():
     """
-    Get simplified history for a case from database.
+    Get simplified history for a case from database, newest first.
     Returns text content, score, and timestamp for each evaluation/rewrite.
+
+    Pages by keyset: pass the previous response's next_cursor as ?before=
+    (limit defaults to 50). EVALUATION_DETAILS is only included with
+    ?details=1; otherwise fetch it per item from /api/cases/history/<id>.
     """
     user_data = session.get('user_data')
     if not user_data:
@@ -3352,71 +3948,70 @@ def get_case_history():
     user_id = user_data.get('user_id')
     case_number = request.args.get('case_number')
     field_type = request.args.get('field_type', 'problem_statement')  # or 'fsr'
+    include_details = request.args.get('details') in ('1', 'true')
+    _, limit = _page_args(50, HISTORY_PAGE_MAX)
     
     if not case_number:
         return jsonify({"error": "case_number required"}), 400
     
+    cursor_clause = ""
+    params = [case_number, user_id, field_type]
+    if request.args.get('before'):
+        try:
+            before_ts, before_id = _parse_history_cursor(request.args.get('before'))
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        cursor_clause = """
+              AND (e.TIMESTAMP < %s::TIMESTAMP_NTZ
+                   OR (e.TIMESTAMP = %s::TIMESTAMP_NTZ AND e.ID < %s))"""
+        params += [before_ts, before_ts, before_id]
+    params.append(limit + 1)  # one extra row tells whether another page exists
+    
     try:
-        # Query LLM_EVALUATION joined with USER_SESSION_INPUTS to get history
-        # Include EVALUATION_DETAILS for full evaluation/rewrite details
+        # Query LLM_EVALUATION joined with USER_SESSION_INPUTS to get history.
+        # Empty texts are filtered in SQL so every page is full, and the VARIANT
+        # column is only scanned when the caller asks for it.
+        details_column = ",\n                e.EVALUATION_DETAILS" if include_details else ""
         query = f"""
             SELECT 
-                e.ORIGINAL_TEXT,
-                e.REWRITTEN_TEXT,
+                e.ID,
+                COALESCE(NULLIF(e.REWRITTEN_TEXT, ''), e.ORIGINAL_TEXT) AS TEXT,
                 e.SCORE,
                 e.TIMESTAMP,
-                i.INPUT_FIELD_TYPE,
-                e.REWRITE_UUID,
-                e.EVALUATION_DETAILS
+                e.REWRITE_UUID{details_column}
             FROM {DATABASE}.{SCHEMA}.LLM_EVALUATION e
             JOIN {DATABASE}.{SCHEMA}.USER_SESSION_INPUTS i ON e.USER_INPUT_ID = i.ID
             WHERE i.CASE_ID = %s 
               AND i.USER_ID = %s
               AND i.INPUT_FIELD_TYPE = %s
-            ORDER BY e.TIMESTAMP DESC
-            LIMIT 50
+              AND TRIM(COALESCE(NULLIF(e.REWRITTEN_TEXT, ''), e.ORIGINAL_TEXT, '')) <> ''{cursor_clause}
+            ORDER BY e.TIMESTAMP DESC, e.ID DESC
+            LIMIT %s
         """
         
-        result = snowflake_query(query, CONNECTION_PAYLOAD, (case_number, user_id, field_type))
-        
-        if result is None or result.empty:
-            return jsonify({"history": []})
+        # Cursor tuples straight to records (no DataFrame); Snowflake VARIANT comes as a JSON string
+        rows = tuple_records(
+            *snowflake_query_rows(query, CONNECTION_PAYLOAD, tuple(params)),
+            timestamps=("TIMESTAMP",), floats=("SCORE",), json_columns=("EVALUATION_DETAILS",)
+        )
+        next_cursor = _history_cursor(rows[limit - 1]) if len(rows) > limit else None
         
         history_items = []
-        for _, row in result.iterrows():
-            # Use REWRITTEN_TEXT if available (for rewrites), otherwise ORIGINAL_TEXT
-            text = row['REWRITTEN_TEXT'] if pd.notna(row['REWRITTEN_TEXT']) and row['REWRITTEN_TEXT'] else row['ORIGINAL_TEXT']
-            
-            # Only include if we have text
-            if not text or not text.strip():
-                continue
-            
-            # Parse EVALUATION_DETAILS JSON if available
-            evaluation_details = None
-            if pd.notna(row['EVALUATION_DETAILS']) and row['EVALUATION_DETAILS']:
-                try:
-                    # Snowflake VARIANT comes as string, parse it
-                    if isinstance(row['EVALUATION_DETAILS'], str):
-                        evaluation_details = json.loads(row['EVALUATION_DETAILS'])
-                    else:
-                        # Already parsed (dict)
-                        evaluation_details = row['EVALUATION_DETAILS']
-                except Exception as e:
-                    print(f"⚠️ [Backend] Error parsing EVALUATION_DETAILS JSON: {e}")
-                    evaluation_details = None
-            
+        for row in rows[:limit]:
             history_item = {
-                "text": text.strip(),
-                "score": float(row['SCORE']) if pd.notna(row['SCORE']) else None,
-                "timestamp": row['TIMESTAMP'].isoformat() if pd.notna(row['TIMESTAMP']) else None,
-                "isRewrite": pd.notna(row['REWRITE_UUID']) and row['REWRITE_UUID'] is not None,
-                "evaluationDetails": evaluation_details,  # Full LLM result with evaluation/rewrite details
+                "id": row['ID'],
+                "text": row['TEXT'].strip(),
+                "score": row['SCORE'],
+                "timestamp": row['TIMESTAMP'],
+                "isRewrite": row['REWRITE_UUID'] is not None,
                 "dbSource": True  # Mark as coming from database
             }
+            if include_details:
+                history_item["evaluationDetails"] = row['EVALUATION_DETAILS']  # Full LLM result with evaluation/rewrite details
             history_items.append(history_item)
         
         print(f"✅ [Backend] Loaded {len(history_items)} history items for case {case_number}, field {field_type}")
-        return jsonify({"history": history_items})
+        return jsonify({"history": history_items, "next_cursor": next_cursor})
         
     except Exception as e:
         print(f"❌ [Backend] Error fetching case history: {e}")
@@ -3424,6 +4019,37 @@ def get_case_history():
         traceback.print_exc()
         return jsonify({"error": "Failed to fetch history"}), 500
 
+@app.route('/api/cases/history/<int:evaluation_id>', methods=['GET'])
+def get_case_history_details(evaluation_id):
+    """
+    Full EVALUATION_DETAILS for one history item (loaded when the user opens it).
+    Evaluations are never modified after they are written, so the response is cacheable.
+    """
+    user_data = session.get('user_data')
+    if not user_data:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    user_id = user_data.get('user_id')
+    try:
+        query = f"""
+            SELECT e.EVALUATION_DETAILS
+            FROM {DATABASE}.{SCHEMA}.LLM_EVALUATION e
+            JOIN {DATABASE}.{SCHEMA}.USER_SESSION_INPUTS i ON e.USER_INPUT_ID = i.ID
+            WHERE e.ID = %s AND i.USER_ID = %s
+        """
+        rows = tuple_records(*snowflake_query_rows(query, CONNECTION_PAYLOAD, (evaluation_id, user_id)),
+                             json_columns=("EVALUATION_DETAILS",))
+        if not rows:
+            return jsonify({"error": "History item not found"}), 404
+        
+        response = jsonify({"id": evaluation_id, "evaluationDetails": rows[0]['EVALUATION_DETAILS']})
+        response.headers['Cache-Control'] = 'private, max-age=86400'
+        return response
+        
+    except Exception as e:
+        print(f"❌ [Backend] Error fetching history item {evaluation_id}: {e}")
+        return jsonify({"error": "Failed to fetch history item"}), 500
+
 if __name__ == "__main__":
     print("Starting LanguageTool Flask App...")
     # Note: All config values (CONNECTION_PAYLOAD, PROD_PAYLOAD, DATABASE, SCHEMA)
@@ -0,0 +1,202 @@
+"""
+In-memory audio transcoding for /speech-to-text.
+
+The upload bytes are piped through ffmpeg twice, with no temp files:
+  1. decode: any container/codec the browser recorded -> mono 16-bit PCM at
+     the transcription model's sample rate, cut off just past max_duration
+     so a long recording cannot grow memory without bound
+  2. encode: PCM -> a small mono MP3 for the model
+
+Each stage is timed so the endpoint can report it (Server-Timing header).
+
+Long recordings are split into segments of about segment_seconds at quiet
+points (RMS over short windows, threshold relative to the recording's own
+level, the same idea as pydub's silence detection), so they can be
+transcribed in parallel and stitched back together with stitch().
+"""
+import os
+import re
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+FFMPEG = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+_PCM_SAMPLE_BYTES = 2  # s16le
+
+
+class AudioError(Exception):
+    """The upload could not be decoded or encoded."""
+
+
+class AudioTooLong(AudioError):
+    """The recording is longer than the allowed maximum."""
+
+
+def _ffmpeg(args, data, timeout):
+    try:
+        result = subprocess.run(
+            [FFMPEG, "-hide_banner", "-loglevel", "error", "-nostdin"] + args,
+            input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise AudioError(f"ffmpeg timed out after {timeout}s")
+    except FileNotFoundError:
+        raise AudioError(f"ffmpeg not found ({FFMPEG})")
+    if result.returncode != 0 or not result.stdout:
+        message = result.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise AudioError(message[-1] if message else f"ffmpeg exited with {result.returncode}")
+    return result.stdout
+
+
+class AudioTranscoder:
+    """
+    Args:
+        sample_rate: Output sample rate in Hz (16 kHz is what speech models use)
+        bitrate: MP3 bitrate for the encoded output
+        max_duration: Longest accepted recording in seconds
+        timeout: Seconds each ffmpeg stage may take
+    """
+
+    def __init__(self, sample_rate=16000, bitrate="32k", max_duration=300, timeout=60,
+                 segment_seconds=30, max_segment_seconds=45, overlap_seconds=1.0):
+        self.sample_rate = sample_rate
+        self.bitrate = bitrate
+        self.max_duration = max_duration
+        self.timeout = timeout
+        self.segment_seconds = segment_seconds
+        self.max_segment_seconds = max_segment_seconds
+        self.overlap_seconds = overlap_seconds
+
+    def decode(self, data):
+        """Upload bytes -> mono s16le PCM at sample_rate. Raises AudioTooLong past max_duration."""
+        # Decode slightly past the limit so "too long" can be told apart from "exactly at the limit"
+        args = ["-t", str(self.max_duration + 1), "-vn", "-ac", "1", "-ar", str(self.sample_rate),
+                "-f", "s16le", "pipe:1"]
+        try:
+            pcm = _ffmpeg(["-i", "pipe:0"] + args, data, self.timeout)
+        except AudioError as pipe_error:
+            # Some containers (non-fragmented MP4 with the index at the end) need a
+            # seekable input; only those fall back to a temp file
+            with tempfile.NamedTemporaryFile(suffix="_audio") as upload:
+                upload.write(data)
+                upload.flush()
+                try:
+                    pcm = _ffmpeg(["-i", upload.name] + args, None, self.timeout)
+                except AudioError:
+                    raise pipe_error
+        if self.duration(pcm) > self.max_duration:
+            raise AudioTooLong(f"Recording is longer than {self.max_duration} seconds")
+        return pcm
+
+    def encode(self, pcm):
+        """Mono s16le PCM -> MP3 bytes."""
+        return _ffmpeg(["-f", "s16le", "-ac", "1", "-ar", str(self.sample_rate), "-i", "pipe:0",
+                        "-b:a", self.bitrate, "-f", "mp3", "pipe:1"], pcm, self.timeout)
+
+    def duration(self, pcm):
+        return len(pcm) / (self.sample_rate * _PCM_SAMPLE_BYTES)
+
+    def transcode(self, data):
+        """
+        Returns (mp3_bytes, timings) where timings has decode_ms, encode_ms and
+        duration_s of the decoded audio.
+        """
+        started = time.perf_counter()
+        pcm = self.decode(data)
+        decoded = time.perf_counter()
+        mp3 = self.encode(pcm)
+        encoded = time.perf_counter()
+        return mp3, {
+            "decode_ms": round((decoded - started) * 1000, 1),
+            "encode_ms": round((encoded - decoded) * 1000, 1),
+            "duration_s": round(self.duration(pcm), 2),
+        }
+
+    def segments(self, pcm, window_ms=50, silence_db=16):
+        """
+        Split PCM into [(start_byte, end_byte, overlaps_previous), ...] of roughly
+        segment_seconds.
+
+        Cuts go at the quiet window (silence_db below the recording's RMS level)
+        closest to the target length. When a stretch has no pause up to
+        max_segment_seconds, the cut goes at its quietest window and the next
+        segment starts overlap_seconds earlier, so no word is lost at the seam;
+        overlaps_previous marks those segments (pass it on to stitch()).
+        """
+        samples = np.frombuffer(pcm[:len(pcm) - len(pcm) % _PCM_SAMPLE_BYTES], dtype="<i2")
+        if len(samples) <= self.max_segment_seconds * self.sample_rate:
+            return [(0, len(samples) * _PCM_SAMPLE_BYTES, False)]
+
+        window = max(1, self.sample_rate * window_ms // 1000)
+        usable = len(samples) - len(samples) % window
+        frames = samples[:usable].astype(np.float64).reshape(-1, window)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        level = np.sqrt(np.mean(samples.astype(np.float64) ** 2)) or 1.0
+        quiet = rms < level * 10 ** (-silence_db / 20)
+
+        per_second = self.sample_rate / window
+        target = int(self.segment_seconds * per_second)
+        longest = int(self.max_segment_seconds * per_second)
+        earliest = max(1, target // 2)
+        overlap = int(self.overlap_seconds * per_second)
+
+        bounds = []
+        start = 0
+        overlapped = False
+        total = len(rms)
+        while total - start > longest:
+            lo, hi = start + earliest, start + longest
+            candidates = np.flatnonzero(quiet[lo:hi]) + lo
+            if len(candidates):
+                cut = int(candidates[np.argmin(np.abs(candidates - (start + target)))])
+                next_start = cut
+            else:
+                cut = lo + int(np.argmin(rms[lo:hi]))
+                next_start = max(start + 1, cut - overlap)
+            bounds.append((start, cut, overlapped))
+            overlapped = next_start < cut
+            start = next_start
+        bounds.append((start, None, overlapped))
+        return [(begin * window * _PCM_SAMPLE_BYTES,
+                 end * window * _PCM_SAMPLE_BYTES if end is not None else len(samples) * _PCM_SAMPLE_BYTES,
+                 overlaps)
+                for begin, end, overlaps in bounds]
+
+
+_WORD = re.compile(r"[\w']+")
+
+
+def _normalized_words(text):
+    return [w.lower() for w in _WORD.findall(text)]
+
+
+def stitch(transcript, segment_text, overlapped=False, max_overlap_words=12):
+    """
+    Append segment_text to transcript. When the segment overlaps the previous
+    one (overlaps_previous from segments()), the seam was transcribed twice and
+    the words the segment repeats from the end of the transcript are dropped;
+    after a cut at a pause nothing is dropped, repeated words are real speech.
+    """
+    segment_text = (segment_text or "").strip()
+    if not transcript:
+        return segment_text
+    if not segment_text:
+        return transcript
+    if not overlapped:
+        return f"{transcript} {segment_text}"
+    tail = _normalized_words(transcript)[-max_overlap_words:]
+    head = _normalized_words(segment_text)[:max_overlap_words]
+    repeated = 0
+    for size in range(min(len(tail), len(head)), 0, -1):
+        if tail[-size:] == head[:size]:
+            repeated = size
+            break
+    if repeated:
+        # Skip the repeated words in the original (punctuated) segment text
+        matches = list(_WORD.finditer(segment_text))
+        segment_text = segment_text[matches[repeated - 1].end():].lstrip(" ,.;:-")
+        if not segment_text:
+            return transcript
+    return f"{transcript} {segment_text}"
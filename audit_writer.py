@@ -0,0 +1,207 @@
+"""
+Background writer for audit/logging inserts.
+
+Request handlers enqueue rows instead of starting a thread per request. A
+small pool of writer threads drains one bounded queue per worker, groups rows
+by statement and writes each group with a single executemany (multi-row
+INSERT), flushing when a batch is full or the flush interval elapses.
+"""
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class AuditWriter:
+    """
+    Bounded, batched writer.
+
+    Args:
+        execute_many: Callable (statement, rows) that writes a batch
+        execute_one: Callable (statement, params) used to retry a failed batch row by row
+        max_queue: Maximum number of queued items before submitters block
+        batch_size: Flush once this many rows are buffered in a writer thread
+        flush_interval: Flush buffered rows at least this often (seconds)
+        threads: Number of writer threads
+        put_timeout: How long a submitter blocks on a full queue before the item is dropped
+    """
+
+    def __init__(self, execute_many, execute_one=None, max_queue=1000, batch_size=200,
+                 flush_interval=1.0, threads=2, put_timeout=2.0, name="audit"):
+        self._execute_many = execute_many
+        self._execute_one = execute_one
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.name = name
+        self._thread_count = threads
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "dropped": 0,
+            "rows_written": 0,
+            "rows_failed": 0,
+            "batches": 0,
+            "tasks": 0,
+            "task_failures": 0,
+        }
+
+    # ------------------------------------------------------------------ producers
+
+    def submit_row(self, statement, params):
+        """Queue one row for `statement`. Returns False if the queue stayed full and the row was dropped."""
+        return self._put(("row", statement, tuple(params)))
+
+    def submit_rows(self, statement, rows):
+        ok = True
+        for params in rows:
+            ok = self.submit_row(statement, params) and ok
+        return ok
+
+    def submit_task(self, fn, *args):
+        """
+        Queue work that cannot be expressed as a plain row (e.g. needs a lookup first).
+        fn runs on a writer thread; it may return an iterable of (statement, params)
+        rows which are added to that thread's current batch.
+        """
+        return self._put(("task", fn, args))
+
+    def _put(self, item):
+        if self._closed:
+            print(f"⚠️ [{self.name}] Writer is shut down, dropping item")
+            self._bump("dropped")
+            return False
+        self._ensure_started()
+        try:
+            # Blocking here is the backpressure: a burst slows request threads down
+            # instead of growing memory without bound.
+            self._queue.put(item, timeout=self.put_timeout)
+        except queue.Full:
+            print(f"⚠️ [{self.name}] Queue full for {self.put_timeout}s, dropping item")
+            self._bump("dropped")
+            return False
+        self._bump("submitted")
+        return True
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def close(self, timeout=10.0):
+        """Stop accepting work, drain the queue and flush every writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        deadline = time.time() + timeout
+        for _ in self._threads:
+            try:
+                self._queue.put(_STOP, timeout=max(0.1, deadline - time.time()))
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(max(0.1, deadline - time.time()))
+        pending = self._queue.qsize()
+        if pending:
+            print(f"⚠️ [{self.name}] Shutdown timed out with {pending} queued items")
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            "queue_depth": self._queue.qsize(),
+            "queue_max": self._queue.maxsize,
+            "threads": len(self._threads),
+            "avg_batch_rows": round(stats["rows_written"] / stats["batches"], 1) if stats["batches"] else None,
+        })
+        return stats
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self._thread_count):
+                thread = threading.Thread(target=self._run, name=f"{self.name}-writer-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    # ------------------------------------------------------------------ consumer
+
+    def _run(self):
+        batches = {}  # statement -> [params, ...]
+        buffered = 0
+        first_buffered_at = None
+        stopping = False
+
+        while not stopping:
+            timeout = self.flush_interval
+            if first_buffered_at is not None:
+                timeout = max(0.0, first_buffered_at + self.flush_interval - time.time())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                kind = item[0]
+                if kind == "row":
+                    rows = [(item[1], item[2])]
+                else:
+                    rows = self._run_task(item[1], item[2])
+                for statement, params in rows:
+                    batches.setdefault(statement, []).append(tuple(params))
+                    buffered += 1
+                if buffered and first_buffered_at is None:
+                    first_buffered_at = time.time()
+
+            due = first_buffered_at is not None and time.time() - first_buffered_at >= self.flush_interval
+            if buffered and (stopping or buffered >= self.batch_size or due):
+                self._flush(batches)
+                batches = {}
+                buffered = 0
+                first_buffered_at = None
+
+    def _run_task(self, fn, args):
+        self._bump("tasks")
+        try:
+            return list(fn(*args) or [])
+        except Exception as e:
+            print(f"⚠️ [{self.name}] Background task failed: {e}")
+            self._bump("task_failures")
+            return []
+
+    def _flush(self, batches):
+        for statement, rows in batches.items():
+            for start in range(0, len(rows), self.batch_size):
+                chunk = rows[start:start + self.batch_size]
+                try:
+                    self._execute_many(statement, chunk)
+                    self._bump("rows_written", len(chunk))
+                    self._bump("batches")
+                except Exception as e:
+                    print(f"⚠️ [{self.name}] Batch of {len(chunk)} rows failed: {e}")
+                    self._retry_rows(statement, chunk)
+
+    def _retry_rows(self, statement, rows):
+        # Retry individually so one bad row does not lose the whole batch
+        if self._execute_one is None:
+            self._bump("rows_failed", len(rows))
+            return
+        for params in rows:
+            try:
+                self._execute_one(statement, params)
+                self._bump("rows_written")
+            except Exception as e:
+                print(f"⚠️ [{self.name}] Row insert failed: {e}")
+                self._bump("rows_failed")
+
+    def _bump(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
@@ -0,0 +1,174 @@
+"""
+Per-user snapshot of the CRM cases a user is authorized to see.
+
+The row-level-security table stores authorized users as a "~EMAIL1~EMAIL2~"
+string, so every ownership check is a LIKE '%~EMAIL~%' scan that cannot use
+pruning. Instead, each user's authorized case numbers are fetched once into a
+sorted list plus a set, kept in a TTL cache, and every ownership check is
+answered from memory. Snapshots are refreshed in the background shortly
+before they expire, so active users never wait on the scan again.
+"""
+import threading
+import time
+
+from case_suggestions import CaseSuggestionIndex
+from ttl_cache import TTLCache
+
+
+class CaseAccessSnapshot:
+    """Immutable set of case numbers (as strings) one user may access."""
+
+    __slots__ = ("email", "sorted_cases", "case_set", "loaded_at", "_suggestions")
+
+    def __init__(self, email, case_numbers, loaded_at=None):
+        self.email = email
+        self.sorted_cases = sorted({str(c) for c in case_numbers if c is not None})
+        self.case_set = frozenset(self.sorted_cases)
+        self.loaded_at = loaded_at if loaded_at is not None else time.time()
+        self._suggestions = None
+
+    def __contains__(self, case_number):
+        return str(case_number) in self.case_set
+
+    def __len__(self):
+        return len(self.sorted_cases)
+
+    def filter(self, case_numbers):
+        """The accessible subset of case_numbers, in their original order."""
+        return [c for c in case_numbers if str(c) in self.case_set]
+
+    def newest_first(self):
+        """All case numbers in descending order (matches ORDER BY "Case Number" DESC)."""
+        return self.sorted_cases[::-1]
+
+    @property
+    def suggestions(self):
+        """Autocomplete index over these cases, built on first use."""
+        if self._suggestions is None:
+            self._suggestions = CaseSuggestionIndex(self.sorted_cases)
+        return self._suggestions
+
+
+class CaseAccessIndex:
+    """
+    TTL/LRU cache of CaseAccessSnapshot per user email, with refresh-ahead.
+
+    Args:
+        query_fn: Callable with the snowflake_query signature
+        payload: Connection payload passed to query_fn
+        table: Fully qualified row-level-security table
+        ttl: Seconds a snapshot stays valid
+        refresh_ahead: Fraction of ttl after which a read triggers a background refresh
+        max_users: Maximum number of cached users (least recently used are evicted)
+    """
+
+    def __init__(self, query_fn, payload, table, ttl=300, refresh_ahead=0.8, max_users=2000):
+        self._query_fn = query_fn
+        self._payload = payload
+        self._table = table
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self._cache = TTLCache(max_size=max_users, ttl=ttl, name="case_access")
+        self._load_locks = {}
+        self._locks_lock = threading.Lock()
+        self._refreshing = set()
+        self._stats_lock = threading.Lock()
+        self._loads = 0
+        self._background_refreshes = 0
+        self._load_ms_total = 0.0
+
+    # ------------------------------------------------------------------ checks
+
+    def snapshot(self, email):
+        """Return the user's snapshot, loading it synchronously only on a cold miss."""
+        email = (email or "").upper()
+        snap = self._cache.get(email)
+        if snap is None:
+            return self._load(email)
+        if time.time() - snap.loaded_at >= self.ttl * self.refresh_ahead:
+            self._refresh_in_background(email)
+        return snap
+
+    def can_access(self, email, case_number):
+        return case_number in self.snapshot(email)
+
+    def filter_accessible(self, email, case_numbers):
+        return self.snapshot(email).filter(case_numbers)
+
+    def invalidate(self, email=None):
+        """Forget one user's snapshot (e.g. after a CRM assignment change) or all of them."""
+        if email is None:
+            self._cache.clear()
+        else:
+            self._cache.invalidate(email.upper())
+
+    def stats(self):
+        stats = self._cache.stats()
+        with self._stats_lock:
+            stats.update({
+                "refresh_ahead": self.refresh_ahead,
+                "loads": self._loads,
+                "background_refreshes": self._background_refreshes,
+                "avg_load_ms": round(self._load_ms_total / self._loads, 1) if self._loads else None,
+            })
+        return stats
+
+    # ------------------------------------------------------------------ loading
+
+    def _user_lock(self, email):
+        with self._locks_lock:
+            lock = self._load_locks.get(email)
+            if lock is None:
+                lock = self._load_locks[email] = threading.Lock()
+            return lock
+
+    def _load(self, email):
+        # One scan per user even when several requests miss at the same time
+        with self._user_lock(email):
+            snap = self._cache.get(email)
+            if snap is not None:
+                return snap
+            return self._fetch_and_store(email)
+
+    def _fetch_and_store(self, email):
+        started = time.perf_counter()
+        result = self._query_fn(
+            f"""
+            SELECT DISTINCT "Case Number" AS CASE_NUMBER
+            FROM {self._table}
+            WHERE "Case Number" IS NOT NULL
+            AND "USER_EMAILS" LIKE %s
+            """,
+            self._payload,
+            (f"%~{email}~%",),
+        )
+        case_numbers = []
+        if result is not None and not result.empty:
+            case_numbers = result["CASE_NUMBER"].astype(str).tolist()
+        snap = CaseAccessSnapshot(email, case_numbers)
+        self._cache.set(email, snap)
+        with self._stats_lock:
+            self._loads += 1
+            self._load_ms_total += (time.perf_counter() - started) * 1000
+        return snap
+
+    def _refresh_in_background(self, email):
+        with self._locks_lock:
+            if email in self._refreshing:
+                return
+            self._refreshing.add(email)
+
+        def refresh():
+            try:
+                with self._user_lock(email):
+                    self._fetch_and_store(email)
+                with self._stats_lock:
+                    self._background_refreshes += 1
+            except Exception as e:
+                # Keep serving the current snapshot until it expires
+                print(f"⚠️ [CRM] Background case-access refresh failed for {email}: {e}")
+            finally:
+                with self._locks_lock:
+                    self._refreshing.discard(email)
+
+        threading.Thread(target=refresh, name="case-access-refresh", daemon=True).start()
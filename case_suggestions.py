@@ -0,0 +1,77 @@
+"""
+In-memory autocomplete index over one user's authorized case numbers.
+
+Built once per CaseAccessSnapshot, so suggestion requests never touch the
+CRM replica: prefix matches come from bisect over the sorted case numbers,
+substring matches from a trigram -> positions map that is intersected and
+then verified. Results are newest first, prefix matches before other
+substring matches, and are returned a page at a time.
+"""
+from bisect import bisect_left
+
+NGRAM = 3
+_PREFIX_SENTINEL = "\U0010ffff"
+
+
+def _ngrams(value, n=NGRAM):
+    return {value[i:i + n] for i in range(len(value) - n + 1)}
+
+
+class CaseSuggestionIndex:
+    """
+    Args:
+        sorted_cases: Case numbers as strings, sorted ascending and de-duplicated
+    """
+
+    __slots__ = ("_cases", "_grams")
+
+    def __init__(self, sorted_cases):
+        self._cases = list(sorted_cases)
+        grams = {}
+        for position, case in enumerate(self._cases):
+            for gram in _ngrams(case):
+                grams.setdefault(gram, []).append(position)
+        self._grams = grams
+
+    def __len__(self):
+        return len(self._cases)
+
+    def search(self, query, offset=0, limit=10):
+        """
+        Return (page, total) for case numbers containing query.
+
+        An empty query pages through every case, newest first.
+        """
+        query = (query or "").strip()
+        matches = self._matches(query)
+        offset = max(0, offset)
+        page = matches[offset:offset + limit] if limit is not None else matches[offset:]
+        return page, len(matches)
+
+    def _matches(self, query):
+        cases = self._cases
+        if not query:
+            return cases[::-1]
+
+        # Prefix matches form one contiguous run of the sorted list
+        lo = bisect_left(cases, query)
+        hi = bisect_left(cases, query + _PREFIX_SENTINEL, lo)
+        prefix = cases[lo:hi][::-1]
+
+        # Substring matches anywhere else in the case number
+        if len(query) < NGRAM:
+            candidates = range(len(cases) - 1, -1, -1)
+        else:
+            postings = [self._grams.get(gram) for gram in _ngrams(query)]
+            if not all(postings):
+                return prefix
+            postings.sort(key=len)
+            positions = set(postings[0])
+            for posting in postings[1:]:
+                positions.intersection_update(posting)
+                if not positions:
+                    return prefix
+            candidates = sorted(positions, reverse=True)
+        substring = [cases[p] for p in candidates
+                     if not lo <= p < hi and query in cases[p]]
+        return prefix + substring
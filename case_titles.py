@@ -0,0 +1,151 @@
+"""
+Cache of CRM case titles keyed by case number.
+
+Titles are looked up for every suggestions dropdown and on case creation, but
+they almost never change. CaseTitleCache answers from a (Shared)TTLCache and
+only sends the case numbers it has not seen to the CRM, in one batch. Cases
+without a title are cached too (negative entries, shorter TTL), so they are
+not looked up again on every render. A background thread periodically
+re-fetches every recently requested title in bulk and reports titles that
+appeared or changed, so they can be written back to CASE_SESSIONS.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+_NO_TITLE = ""  # cached value for "case has no title"
+
+
+class CaseTitleCache:
+    """
+    Args:
+        fetch_fn: Callable(case_numbers) -> {case_number: title} for the CRM lookup
+        cache: TTLCache or SharedTTLCache holding titles ("" for cases without one)
+        negative_ttl: TTL in seconds for cases without a title
+        refresh_interval: Seconds between bulk refreshes (0 disables the refresher)
+        refresh_batch: Case numbers per CRM query during a bulk refresh
+        max_tracked: How many recently requested case numbers the refresher keeps fresh
+        on_titles: Optional callable({case_number: title}) for newly fetched or changed titles
+    """
+
+    def __init__(self, fetch_fn, cache, negative_ttl=600, refresh_interval=1800,
+                 refresh_batch=500, max_tracked=5000, on_titles=None):
+        self._fetch_fn = fetch_fn
+        self._cache = cache
+        self.negative_ttl = negative_ttl
+        self.refresh_interval = refresh_interval
+        self.refresh_batch = refresh_batch
+        self.max_tracked = max_tracked
+        self._on_titles = on_titles
+
+        self._tracked = OrderedDict()  # case_number -> last known title ("" = none)
+        self._lock = threading.Lock()
+        self._refresher_pid = None
+        self._stats = {"lookups": 0, "fetched": 0, "fetch_queries": 0, "negative": 0,
+                       "refreshes": 0, "refresh_changes": 0, "last_refresh": None}
+
+    def get_many(self, case_numbers):
+        """Return {case_number: title} for the cases that have a title."""
+        keys = list(dict.fromkeys(str(c) for c in case_numbers if c is not None))
+        if not keys:
+            return {}
+        self._ensure_refresher()
+        cached = self._cache.get_many(keys)
+        missing = [k for k in keys if k not in cached]
+        if missing:
+            fetched = self._fetch(missing)
+            cached.update(fetched)
+            self._report({k: v for k, v in fetched.items() if v})
+        self._track(keys, cached)
+        with self._lock:
+            self._stats["lookups"] += len(keys)
+        return {k: v for k, v in cached.items() if v}
+
+    def get(self, case_number):
+        return self.get_many([case_number]).get(str(case_number))
+
+    def put(self, case_number, title):
+        """Record a title learned elsewhere (e.g. entered by the user)."""
+        key = str(case_number)
+        self._cache.set(key, title or _NO_TITLE, ttl=None if title else self.negative_ttl)
+        self._track([key], {key: title or _NO_TITLE})
+
+    def refresh(self):
+        """Re-fetch every tracked title in bulk. Returns {case_number: title} that changed."""
+        with self._lock:
+            tracked = dict(self._tracked)
+        changed = {}
+        keys = list(tracked)
+        for start in range(0, len(keys), self.refresh_batch):
+            chunk = keys[start:start + self.refresh_batch]
+            fetched = self._fetch(chunk)
+            changed.update({k: v for k, v in fetched.items() if v and v != tracked.get(k)})
+            self._track(chunk, fetched)
+        self._report(changed)
+        with self._lock:
+            self._stats["refreshes"] += 1
+            self._stats["refresh_changes"] += len(changed)
+            self._stats["last_refresh"] = time.time()
+        return changed
+
+    def stats(self):
+        stats = self._cache.stats()
+        with self._lock:
+            stats.update(self._stats)
+            stats["tracked"] = len(self._tracked)
+        stats["negative_ttl"] = self.negative_ttl
+        stats["refresh_interval"] = self.refresh_interval
+        return stats
+
+    # ------------------------------------------------------------------ internals
+
+    def _fetch(self, keys):
+        """Fetch titles for keys from the CRM and cache them, including negative entries."""
+        titles = {str(k): v for k, v in (self._fetch_fn(keys) or {}).items() if v}
+        found = {k: titles[k] for k in keys if k in titles}
+        absent = {k: _NO_TITLE for k in keys if k not in titles}
+        self._cache.set_many(found)
+        self._cache.set_many(absent, ttl=self.negative_ttl)
+        with self._lock:
+            self._stats["fetched"] += len(keys)
+            self._stats["fetch_queries"] += 1
+            self._stats["negative"] += len(absent)
+        found.update(absent)
+        return found
+
+    def _track(self, keys, titles):
+        with self._lock:
+            for key in keys:
+                if key in titles:
+                    self._tracked[key] = titles[key]
+                if key in self._tracked:
+                    self._tracked.move_to_end(key)
+            while len(self._tracked) > self.max_tracked:
+                self._tracked.popitem(last=False)
+
+    def _report(self, titles):
+        if titles and self._on_titles is not None:
+            try:
+                self._on_titles(titles)
+            except Exception as e:
+                print(f"⚠️ [CRM] Case title write-back failed: {e}")
+
+    def _ensure_refresher(self):
+        if not self.refresh_interval or self._refresher_pid == os.getpid():
+            return
+        with self._lock:
+            # One refresher per worker process (threads do not survive a fork)
+            if self._refresher_pid == os.getpid():
+                return
+            self._refresher_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(self.refresh_interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"⚠️ [CRM] Case title refresh failed: {e}")
+
+        threading.Thread(target=run, name="case-title-refresh", daemon=True).start()
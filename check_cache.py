@@ -0,0 +1,111 @@
+"""
+Paragraph-level cache of LanguageTool matches for incremental /check.
+
+A document is checked as a list of paragraphs (its lines). Matches are cached
+per paragraph text hash with offsets relative to the paragraph, so an edit
+only sends the paragraphs that changed to LanguageTool (batched into one
+request). Offsets are shifted back to document coordinates when the response
+is assembled. Clients that kept the hashes from the previous response can send
+{"hash": ...} instead of the text for unchanged paragraphs.
+"""
+import hashlib
+
+PARAGRAPH_SEPARATOR = "\n"
+# Changed paragraphs are checked together, separated like real paragraphs so
+# LanguageTool does not apply sentence rules across them
+_BATCH_SEPARATOR = "\n\n"
+
+
+def paragraph_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ParagraphCheckCache:
+    """
+    Args:
+        check_fn: Callable(text) -> list of match dicts with "offset" and "length" (plus any other fields)
+        cache: TTLCache (LRU) for paragraph hash -> (paragraph length, matches)
+    """
+
+    def __init__(self, check_fn, cache):
+        self._check_fn = check_fn
+        self._cache = cache
+
+    def check_document(self, text):
+        """All matches for text, in document coordinates."""
+        matches, _, _ = self.check_paragraphs(text.split(PARAGRAPH_SEPARATOR))
+        return matches
+
+    def check_paragraphs(self, paragraphs):
+        """
+        Check paragraphs given as text or {"hash": ...} (unchanged since a previous call).
+
+        Returns (matches, hashes, missing): matches in document coordinates (the
+        paragraphs joined by newlines), the hash of every paragraph, and the indices
+        of hash-only paragraphs that are no longer cached. When missing is non-empty,
+        matches is None and those paragraphs must be sent again as text.
+        """
+        hashes = []
+        texts = {}
+        for index, paragraph in enumerate(paragraphs):
+            if isinstance(paragraph, dict):
+                hashes.append(str(paragraph.get("hash", "")))
+            else:
+                paragraph = str(paragraph)
+                key = paragraph_hash(paragraph)
+                hashes.append(key)
+                texts[key] = paragraph
+
+        results = self._cache.get_many(list(dict.fromkeys(hashes)))
+        missing = [i for i, key in enumerate(hashes) if key not in results and key not in texts]
+        if missing:
+            return None, hashes, missing
+
+        unchecked = [key for key in dict.fromkeys(hashes) if key not in results]
+        if unchecked:
+            results.update(self._check_batch({key: texts[key] for key in unchecked}))
+
+        matches = []
+        position = 0
+        for key in hashes:
+            length, paragraph_matches = results[key]
+            for match in paragraph_matches:
+                shifted = dict(match)
+                shifted["offset"] = match["offset"] + position
+                matches.append(shifted)
+            position += length + len(PARAGRAPH_SEPARATOR)
+        return matches, hashes, []
+
+    def stats(self):
+        return self._cache.stats()
+
+    def _check_batch(self, texts):
+        """Run LanguageTool once over all unchecked paragraphs and cache the per-paragraph matches."""
+        results = {}
+        spans = []
+        parts = []
+        position = 0
+        for key, text in texts.items():
+            results[key] = (len(text), [])
+            if text.strip():
+                spans.append((position, position + len(text), key))
+                parts.append(text)
+                position += len(text) + len(_BATCH_SEPARATOR)
+
+        if parts:
+            span_index = 0
+            for match in sorted(self._check_fn(_BATCH_SEPARATOR.join(parts)), key=lambda m: m["offset"]):
+                while span_index < len(spans) and match["offset"] >= spans[span_index][1]:
+                    span_index += 1
+                if span_index == len(spans):
+                    break
+                start, end, key = spans[span_index]
+                # Matches that only cover the separator between paragraphs are not real findings
+                if match["offset"] < start or match["offset"] + match["length"] > end:
+                    continue
+                relative = dict(match)
+                relative["offset"] = match["offset"] - start
+                results[key][1].append(relative)
+
+        self._cache.set_many(results)
+        return results
@@ -0,0 +1,129 @@
+"""
+Background sync of external CRM status for open case sessions.
+
+Instead of every browser tab asking the CRM whether its cases were closed,
+one process per host periodically walks all open CASE_SESSIONS in chunks,
+asks the CRM which of them are closed, and records the result (needs-feedback
+flag + sync time) in CASE_SESSIONS. /api/cases/check-external-status then only
+reads local rows.
+
+Leader election is a non-blocking flock on a shared lock file: whichever
+worker holds it runs the sync; the others retry every interval, so a new
+leader takes over if the current one exits.
+"""
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines: every process syncs
+    fcntl = None
+
+
+class CRMStatusSync:
+    """
+    Args:
+        list_open_cases: Callable() -> list of case IDs of all open case sessions
+        fetch_closed_cases: Callable(case_ids) -> set of those case IDs (as strings) closed in the CRM
+        apply_statuses: Callable(case_ids, closed_ids) that records one chunk's result locally
+        interval: Seconds between sync runs
+        chunk_size: Case IDs per CRM query / local update
+        lock_path: Lock file used to elect one syncing process per host
+    """
+
+    def __init__(self, list_open_cases, fetch_closed_cases, apply_statuses, interval=300,
+                 chunk_size=1000, lock_path="/tmp/fsrcoach_crm_sync.lock"):
+        self._list_open_cases = list_open_cases
+        self._fetch_closed_cases = fetch_closed_cases
+        self._apply_statuses = apply_statuses
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.lock_path = lock_path
+        self._lock_file = None
+        self._thread_pid = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "runs": 0,
+            "failures": 0,
+            "cases_checked": 0,
+            "closed_found": 0,
+            "last_run": None,
+            "last_duration_ms": None,
+            "last_error": None,
+        }
+
+    def start(self):
+        """Start the sync thread in this process (idempotent, fork-aware)."""
+        with self._start_lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+            self._lock_file = None  # an inherited lock belongs to the parent
+        threading.Thread(target=self._run, name="crm-status-sync", daemon=True).start()
+
+    @property
+    def is_leader(self):
+        return self._lock_file is not None
+
+    def sync_once(self):
+        """Run one full sync pass. Returns (cases_checked, closed_found)."""
+        started = time.perf_counter()
+        case_ids = list(dict.fromkeys(str(c) for c in self._list_open_cases() if c is not None))
+        closed_total = 0
+        for start in range(0, len(case_ids), self.chunk_size):
+            chunk = case_ids[start:start + self.chunk_size]
+            closed = {str(c) for c in self._fetch_closed_cases(chunk)} & set(chunk)
+            self._apply_statuses(chunk, closed)
+            closed_total += len(closed)
+        with self._stats_lock:
+            self._stats["runs"] += 1
+            self._stats["cases_checked"] += len(case_ids)
+            self._stats["closed_found"] += closed_total
+            self._stats["last_run"] = time.time()
+            self._stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self._stats["last_error"] = None
+        print(f"📊 [CRM Sync] Checked {len(case_ids)} open cases, {closed_total} closed in CRM")
+        return len(case_ids), closed_total
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            "leader": self.is_leader,
+            "interval": self.interval,
+            "chunk_size": self.chunk_size,
+        })
+        return stats
+
+    # ------------------------------------------------------------------ internals
+
+    def _acquire_leadership(self):
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            self._lock_file = True
+            return True
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held (and the file kept open) for the life of the process
+        self._lock_file = lock_file
+        print(f"✅ [CRM Sync] Process {os.getpid()} is the CRM status sync leader")
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                if self._acquire_leadership():
+                    self.sync_once()
+            except Exception as e:
+                with self._stats_lock:
+                    self._stats["failures"] += 1
+                    self._stats["last_error"] = str(e)
+                print(f"❌ [CRM Sync] Sync failed: {e}")
+            time.sleep(self.interval)
@@ -0,0 +1,94 @@
+"""
+Result cache for LLM criteria evaluations.
+
+An evaluation depends only on the text, the criteria it is judged against, the
+model and the prompt template, so repeated evaluations of the same (normalized)
+text are served from here instead of calling the LLM again. Entries are keyed
+by a hash of all of those inputs; changing any of them simply misses the cache.
+"""
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Unicode-normalize and collapse whitespace so trivially different copies of a note share an entry."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def evaluation_cache_key(text, criteria, model, prompt_kind, template_version):
+    """
+    Args:
+        text: Text being evaluated (normalized here)
+        criteria: JSON-serializable identity of the criteria, e.g. [(id, version), ...]
+        model: Model name
+        prompt_kind: Which prompt builds the request (e.g. "llm" or "score")
+        template_version: Version of that prompt template
+    """
+    material = json.dumps(
+        [normalize_text(text), criteria, model, prompt_kind, template_version],
+        sort_keys=True, default=str, ensure_ascii=False,
+    )
+    return "eval_" + hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    """
+    Stores parsed LLM evaluation results in a TTLCache / SharedTTLCache.
+
+    get() returns (result, metadata) where metadata is always a dict suitable
+    for the response ("hit", "key", "age_seconds"); the result is a private
+    copy so callers may decorate it freely.
+    """
+
+    def __init__(self, cache, enabled=True):
+        self._cache = cache
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None, {"hit": False, "enabled": False}
+        entry = self._cache.get(key)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        if entry is None:
+            return None, {"hit": False, "key": key[5:17]}
+        return copy.deepcopy(entry["result"]), {
+            "hit": True,
+            "key": key[5:17],
+            "age_seconds": round(time.time() - entry["cached_at"], 1),
+        }
+
+    def set(self, key, result):
+        if not self.enabled:
+            return
+        self._cache.set(key, {"result": copy.deepcopy(result), "cached_at": time.time()})
+        with self._lock:
+            self._stores += 1
+
+    def stats(self):
+        stats = self._cache.stats()
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats.update({
+                "enabled": self.enabled,
+                "evaluation_hits": self._hits,
+                "evaluation_misses": self._misses,
+                "stores": self._stores,
+                "evaluation_hit_rate": round(self._hits / lookups, 4) if lookups else None,
+            })
+        return stats
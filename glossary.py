@@ -0,0 +1,147 @@
+"""
+In-process index of the KLA_GLOSSARY term bank.
+
+Each worker loads the glossary once into hashed sets (exact and casefolded) so
+spellcheck lookups never touch the database. A background thread polls a cheap
+fingerprint of the table and only reloads the terms when it has changed.
+"""
+import threading
+import time
+
+
+class GlossaryIndex:
+    """
+    Hashed, thread-safe view of the KLA glossary.
+
+    Args:
+        query_fn: Callable with the snowflake_query signature
+        payload: Connection payload passed to query_fn
+        table: Fully qualified glossary table name (e.g. SAGE.SCHEMA.KLA_GLOSSARY)
+        refresh_interval: Seconds between background fingerprint checks
+    """
+
+    def __init__(self, query_fn, payload, table, refresh_interval=300):
+        self._query_fn = query_fn
+        self._payload = payload
+        self._table = table
+        self._refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._terms = frozenset()
+        self._folded = frozenset()
+        self._fingerprint = None
+        self._loaded_at = None
+        self._refresher = None
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------------------ lookups
+
+    def __contains__(self, token):
+        """Exact match, as spellcheck filtering always did ("Kla" is not "KLA")."""
+        self.ensure_loaded()
+        return token in self._terms
+
+    def __len__(self):
+        return len(self._terms)
+
+    def terms(self):
+        """Return the current terms as a sorted list."""
+        self.ensure_loaded()
+        return sorted(self._terms)
+
+    def contains_casefold(self, term):
+        """Case-insensitive membership check used to de-duplicate inserts."""
+        self.ensure_loaded()
+        return term.casefold() in self._folded
+
+    # ------------------------------------------------------------------ loading
+
+    def ensure_loaded(self):
+        """
+        Load the glossary on first use and start the background refresher.
+
+        A failed first load raises (an empty index would silently stop filtering
+        glossary terms); the next call tries again.
+        """
+        if self._loaded_at is not None:
+            return
+        with self._lock:
+            if self._loaded_at is None:
+                try:
+                    self._reload(self._fetch_fingerprint())
+                except Exception as e:
+                    print(f"❌ [Glossary] Initial load failed: {e}")
+                    raise
+        self._start_refresher()
+
+    def add(self, term):
+        """Add a term immediately (called after a successful /terms insert)."""
+        self.ensure_loaded()
+        with self._lock:
+            self._terms = self._terms | {term}
+            self._folded = self._folded | {term.casefold()}
+            # Force the next background check to re-validate against the table
+            self._fingerprint = None
+
+    def refresh(self, force=False):
+        """
+        Reload the terms if the table fingerprint has changed.
+        Returns True if the index was reloaded.
+        """
+        fingerprint = self._fetch_fingerprint()
+        if not force and fingerprint is not None and fingerprint == self._fingerprint:
+            return False
+        with self._lock:
+            self._reload(fingerprint)
+        return True
+
+    def stats(self):
+        return {
+            "terms": len(self._terms),
+            "loaded_at": self._loaded_at,
+            "refresh_interval": self._refresh_interval,
+        }
+
+    def close(self):
+        self._stop.set()
+
+    def _fetch_fingerprint(self):
+        # COUNT + HASH_AGG changes whenever a term is added, removed or edited,
+        # and costs far less than shipping every term over the wire.
+        result = self._query_fn(
+            f"SELECT COUNT(*) AS TERM_COUNT, HASH_AGG(TERM) AS TERM_HASH FROM {self._table}",
+            self._payload,
+        )
+        if result is None or result.empty:
+            return None
+        row = result.iloc[0]
+        return (int(row["TERM_COUNT"]), str(row["TERM_HASH"]))
+
+    def _reload(self, fingerprint):
+        result = self._query_fn(f"SELECT TERM FROM {self._table}", self._payload)
+        terms = set()
+        if result is not None and not result.empty:
+            terms = {str(t) for t in result["TERM"].dropna().tolist()}
+        self._terms = frozenset(terms)
+        self._folded = frozenset(t.casefold() for t in terms)
+        self._fingerprint = fingerprint
+        self._loaded_at = time.time()
+        print(f"📚 [Glossary] Loaded {len(terms)} terms")
+
+    def _start_refresher(self):
+        if self._refresher is not None or self._refresh_interval <= 0:
+            return
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, name="glossary-refresh", daemon=True
+            )
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self._refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ [Glossary] Background refresh failed: {e}")
@@ -0,0 +1,99 @@
+"""
+Client-side primary key allocation for audit tables.
+
+Each worker pre-fetches blocks of IDs from a Snowflake sequence, so inserts
+can carry their own keys and no INSERT-then-SELECT read-back is needed.
+
+Only the sequence the table's ID column already defaults to is used
+(ID DEFAULT <seq>.NEXTVAL), so explicit and default-generated keys come from
+one counter. An AUTOINCREMENT / IDENTITY column has no sequence Snowflake lets
+us draw from (and its default cannot be switched to one), so the allocator
+raises NoSequenceDefault and callers insert without an ID instead.
+"""
+import re
+import threading
+
+_NEXTVAL = re.compile(r"^\s*(.+?)\.NEXTVAL\s*$", re.IGNORECASE)
+
+
+class NoSequenceDefault(Exception):
+    """The table's ID column does not default to a sequence; IDs cannot be allocated client-side."""
+
+
+class SequenceIdAllocator:
+    """
+    Hands out integer IDs from pre-fetched blocks of the sequence behind a table's ID column.
+
+    Args:
+        query_fn: Callable with the snowflake_query signature
+        payload: Connection payload passed to query_fn
+        table: Fully qualified table (DATABASE.SCHEMA.TABLE) whose ID column is being allocated
+        block_size: Number of IDs fetched per round trip
+    """
+
+    def __init__(self, query_fn, payload, table, block_size=50):
+        self._query_fn = query_fn
+        self._payload = payload
+        self.table = table
+        self.block_size = block_size
+        self.sequence = None
+        self._resolved = False
+        self._lock = threading.Lock()
+        self._block = []
+        self._blocks_fetched = 0
+        self._allocated = 0
+
+    def allocate(self):
+        """
+        Return the next ID, fetching a new block from the sequence when the current one is used up.
+        Raises NoSequenceDefault if the ID column is not sequence-backed.
+        """
+        with self._lock:
+            if not self._block:
+                self._block = self._fetch_block()
+                self._blocks_fetched += 1
+            self._allocated += 1
+            return self._block.pop()
+
+    def stats(self):
+        return {
+            "sequence": self.sequence,
+            "client_side": self.sequence is not None if self._resolved else None,
+            "block_size": self.block_size,
+            "remaining_in_block": len(self._block),
+            "blocks_fetched": self._blocks_fetched,
+            "allocated": self._allocated,
+        }
+
+    def _resolve_sequence(self):
+        # Looked up once per process; a failed lookup is retried on the next call
+        if self._resolved:
+            return self.sequence
+        database, schema, table = self.table.split(".")
+        result = self._query_fn(f"""
+            SELECT COLUMN_DEFAULT FROM {database}.INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = 'ID'
+        """, self._payload, (schema, table))
+        default = None
+        if result is not None and not result.empty:
+            default = result.iloc[0]["COLUMN_DEFAULT"]
+        match = _NEXTVAL.match(default) if isinstance(default, str) else None
+        self.sequence = match.group(1) if match else None
+        self._resolved = True
+        if self.sequence is None:
+            print(f"⚠️ [IDs] {self.table}.ID has no sequence default ({default!r}); "
+                  f"inserts will let the column generate IDs")
+        return self.sequence
+
+    def _fetch_block(self):
+        sequence = self._resolve_sequence()
+        if sequence is None:
+            raise NoSequenceDefault(f"{self.table}.ID does not default to a sequence")
+        result = self._query_fn(
+            f"SELECT {sequence}.NEXTVAL AS ID FROM TABLE(GENERATOR(ROWCOUNT => {int(self.block_size)}))",
+            self._payload,
+        )
+        if result is None or result.empty:
+            raise RuntimeError(f"Sequence {sequence} returned no IDs")
+        # Reverse so pop() hands IDs out in ascending order
+        return sorted((int(v) for v in result["ID"].tolist()), reverse=True)
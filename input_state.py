@@ -0,0 +1,413 @@
+"""
+Read/write path for LAST_INPUT_STATE (problem statement and FSR notes per case).
+
+The editor autosaves constantly. Each save used to look up the case session
+and then run one MERGE per field, and each read ran three sequential queries.
+InputStateStore keeps:
+  - a memo of (user, case) -> CASE_SESSIONS.ID, so a save is a single MERGE
+    (the MERGE joins CASE_SESSIONS, so a memo gone stale writes nothing)
+  - reads as one combined query; state is not cached across requests, since
+    every gunicorn worker would hold its own copy and serve it after another
+    worker saved newer text
+  - group commit: concurrent saves are collected for flush_interval seconds
+    (latest value per case session, field and line item wins) and written as
+    one multi-row MERGE. Each save waits for the commit that carries it and is
+    only acknowledged with a version once its rows are in Snowflake. Sessions
+    the MERGE did not write (case deleted or recreated since the ID was
+    memoized) are looked up again and retried once, or reported as not found.
+"""
+import copy
+import os
+import threading
+import time
+from datetime import datetime
+
+from ttl_cache import TTLCache
+
+PROBLEM_STATEMENT_FIELD = 1
+FSR_NOTES_FIELD = 2
+
+
+def _key(case_id, user_id):
+    return (str(user_id), str(case_id))
+
+
+class InputStateError(Exception):
+    """A save could not be committed."""
+
+
+class _Commit:
+    """Saves written by one flush; their writers wait on done."""
+
+    __slots__ = ("done", "missing", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.missing = set()  # _key()s whose case no longer exists
+        self.error = None
+
+
+class InputStateStore:
+    """
+    Args:
+        query_fn: Callable with the snowflake_query signature (returns the row count when return_df=False)
+        payload: Connection payload passed to query_fn
+        database / schema: Location of CASE_SESSIONS and LAST_INPUT_STATE
+        session_ttl: Seconds a (user, case) -> session ID mapping stays memoized
+        max_size: Maximum memoized session IDs
+        flush_interval: Seconds concurrent saves are collected into one commit (0 commits every save on its own)
+        flush_batch: Maximum rows per flushed MERGE
+        commit_timeout: Seconds a save waits for its commit before failing
+    """
+
+    def __init__(self, query_fn, payload, database, schema, session_ttl=3600, max_size=5000,
+                 flush_interval=0.2, flush_batch=500, commit_timeout=30):
+        self._query_fn = query_fn
+        self._payload = payload
+        self._sessions_table = f"{database}.{schema}.CASE_SESSIONS"
+        self._state_table = f"{database}.{schema}.LAST_INPUT_STATE"
+        self._session_ids = TTLCache(max_size=max_size, ttl=session_ttl, name="case_session_ids")
+
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.commit_timeout = commit_timeout
+        # session_id -> {(input_field_id, line_item_id): (value, evaluation_id)}
+        self._pending = {}
+        self._inflight = {}  # same shape, being written by the current flush
+        self._owners = {}  # session_id -> (case_id, user_id) of the pending values
+        self._commit = _Commit()
+        self._wake = threading.Event()
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher_pid = None
+        self._closed = False
+        self._last_version = 0
+        self._stats = {"writes": 0, "coalesced": 0, "flushes": 0, "rows_flushed": 0,
+                       "flush_failures": 0, "session_retries": 0, "not_found": 0,
+                       "last_flush_ms": None}
+
+    # ------------------------------------------------------------------ sessions
+
+    def session_id(self, case_id, user_id, fresh=False):
+        """
+        CASE_SESSIONS.ID for the user's case, or None if the case does not exist.
+
+        The memo is per worker and may be stale after the case was deleted or
+        recreated through another worker; pass fresh=True to look it up again.
+        """
+        key = _key(case_id, user_id)
+        session_id = None if fresh else self._session_ids.get(key)
+        if session_id is not None:
+            return session_id
+        result = self._query_fn(f"""
+            SELECT ID FROM {self._sessions_table}
+            WHERE CASE_ID = %s AND CREATED_BY_USER = %s
+            ORDER BY ID
+            LIMIT 1
+        """, self._payload, (case_id, user_id))
+        if result is None or result.empty:
+            self._session_ids.invalidate(key)
+            return None
+        session_id = int(result.iloc[0]["ID"])
+        self._session_ids.set(key, session_id)
+        return session_id
+
+    def forget(self, case_id, user_id):
+        """Drop the memoized session and buffered values for a case (e.g. after it was deleted)."""
+        key = _key(case_id, user_id)
+        session_id = self._session_ids.get(key)
+        if session_id is not None:
+            with self._buffer_lock:
+                self._pending.pop(session_id, None)
+                self._owners.pop(session_id, None)
+        self._session_ids.invalidate(key)
+
+    # ------------------------------------------------------------------ reads
+
+    def read(self, case_id, user_id):
+        """
+        Current input state as {"problem_statement", "fsr_notes", "fsr_line_items"},
+        or None if the case does not exist.
+        """
+        # Session lookup and both fields in one round trip; rows are de-duplicated
+        # per (field, line item) to the most recent update
+        result = self._query_fn(f"""
+            SELECT cs.ID AS CASE_SESSION_ID,
+                   lis.INPUT_FIELD_ID,
+                   lis.LINE_ITEM_ID,
+                   lis.INPUT_FIELD_VALUE,
+                   lis.LAST_UPDATED
+            FROM (
+                SELECT ID FROM {self._sessions_table}
+                WHERE CASE_ID = %s AND CREATED_BY_USER = %s
+                ORDER BY ID
+                LIMIT 1
+            ) cs
+            LEFT JOIN {self._state_table} lis
+                ON lis.CASE_SESSION_ID = cs.ID
+                AND lis.INPUT_FIELD_ID IN ({PROBLEM_STATEMENT_FIELD}, {FSR_NOTES_FIELD})
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY lis.INPUT_FIELD_ID, lis.LINE_ITEM_ID
+                ORDER BY lis.LAST_UPDATED DESC
+            ) = 1
+            ORDER BY lis.INPUT_FIELD_ID, lis.LINE_ITEM_ID
+        """, self._payload, (case_id, user_id))
+        if result is None or result.empty:
+            return None
+
+        rows = result.to_dict("records")
+        session_id = int(rows[0]["CASE_SESSION_ID"])
+        self._session_ids.set(_key(case_id, user_id), session_id)
+        state = {"problem_statement": "", "fsr_notes": "", "fsr_line_items": []}
+        problem_updated = None
+        for row in rows:
+            updated = row["LAST_UPDATED"]
+            updated = updated.isoformat() if hasattr(updated, "isoformat") and updated == updated else None
+            if row["INPUT_FIELD_ID"] == PROBLEM_STATEMENT_FIELD:
+                # Older rows were written under more than one LINE_ITEM_ID; the latest wins
+                if problem_updated is None or (updated and updated > problem_updated):
+                    state["problem_statement"] = row["INPUT_FIELD_VALUE"] or ""
+                    problem_updated = updated or ""
+            elif row["INPUT_FIELD_ID"] == FSR_NOTES_FIELD:
+                line_item_id = row["LINE_ITEM_ID"]
+                if line_item_id != line_item_id:  # NaN from a nullable column
+                    line_item_id = None
+                elif line_item_id is not None:
+                    line_item_id = int(line_item_id)
+                state["fsr_line_items"].append({
+                    "line_item_id": line_item_id,
+                    "value": row["INPUT_FIELD_VALUE"],
+                    "last_updated": updated,
+                })
+        if state["fsr_line_items"]:
+            state["fsr_notes"] = state["fsr_line_items"][-1]["value"] or ""
+
+        # Saves that are not in Snowflake yet take precedence over what was just read
+        with self._buffer_lock:
+            unflushed = dict(self._inflight.get(session_id, {}))
+            unflushed.update(self._pending.get(session_id, {}))
+        if unflushed:
+            fields = [(field_id, line_item_id, value)
+                      for (field_id, line_item_id), (value, _) in unflushed.items()]
+            state = self._apply(state, fields)
+        return state
+
+    # ------------------------------------------------------------------ writes
+
+    def write(self, case_id, user_id, fields, evaluation_id=None):
+        """
+        Upsert fields [(input_field_id, line_item_id, value), ...] and wait until
+        they are committed.
+
+        Returns a version number that increases with every committed save, or
+        None if the case does not exist. Raises InputStateError if the commit
+        failed or did not finish within commit_timeout.
+        """
+        session_id = self.session_id(case_id, user_id)
+        if session_id is None:
+            return None
+        fields = [f for f in fields if f[2]]
+
+        if fields and self.flush_interval and not self._closed:
+            self._ensure_flusher()
+            with self._buffer_lock:
+                pending = self._pending.setdefault(session_id, {})
+                self._owners[session_id] = (case_id, user_id)
+                for input_field_id, line_item_id, value in fields:
+                    if (input_field_id, line_item_id) in pending:
+                        self._stats["coalesced"] += 1
+                    pending[(input_field_id, line_item_id)] = (value, evaluation_id)
+                commit = self._commit
+            self._wake.set()
+            if not commit.done.wait(self.commit_timeout):
+                raise InputStateError(f"Save was not committed within {self.commit_timeout}s")
+            if commit.error is not None:
+                raise InputStateError(f"Save failed: {commit.error}")
+            missing = commit.missing
+        elif fields:
+            values = {session_id: {(input_field_id, line_item_id): (value, evaluation_id)
+                                   for input_field_id, line_item_id, value in fields}}
+            missing = self._write(values, {session_id: (case_id, user_id)})
+        else:
+            missing = ()
+
+        if _key(case_id, user_id) in missing:
+            return None
+        with self._buffer_lock:
+            self._stats["writes"] += 1
+            version = self._next_version()
+        return version
+
+    def flush(self):
+        """Commit every buffered value now and release the saves waiting for it. Returns the rows written."""
+        with self._flush_lock:
+            with self._buffer_lock:
+                commit, self._commit = self._commit, _Commit()
+                owners, self._owners = self._owners, {}
+                self._inflight, self._pending = self._pending, {}
+                inflight = self._inflight
+            rows = sum(len(values) for values in inflight.values())
+            started = time.perf_counter()
+            written = 0
+            try:
+                if inflight:
+                    commit.missing = self._write(inflight, owners)
+                    written = rows
+            except Exception as e:
+                commit.error = e
+                with self._buffer_lock:
+                    self._stats["flush_failures"] += 1
+                print(f"❌ [Input State] Commit of {rows} rows failed: {e}")
+            finally:
+                with self._buffer_lock:
+                    self._inflight = {}
+                    self._stats["flushes"] += 1
+                    self._stats["rows_flushed"] += written
+                    self._stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                commit.done.set()
+            return written
+
+    def close(self):
+        """Stop collecting saves and commit what is pending (called at shutdown)."""
+        self._closed = True
+        self.flush()
+        self._wake.set()
+
+    def _write(self, values, owners):
+        """
+        MERGE values {session_id: {(field_id, line_item_id): (value, evaluation_id)}} and
+        make sure every session was actually written. Sessions the MERGE skipped (their
+        memoized ID no longer exists) are looked up again and retried once under the
+        current ID. Returns the _key()s of cases that no longer exist.
+        """
+        if self._merge_all(values) >= sum(len(v) for v in values.values()):
+            return set()
+
+        existing = self._existing_sessions(list(values))
+        missing = set()
+        retry, retry_owners = {}, {}
+        for session_id in values:
+            if session_id in existing:
+                continue
+            case_id, user_id = owners[session_id]
+            current = self.session_id(case_id, user_id, fresh=True)
+            if current is None or current == session_id:
+                missing.add(_key(case_id, user_id))
+                continue
+            retry.setdefault(current, {}).update(values[session_id])
+            retry_owners[current] = owners[session_id]
+        if retry:
+            print(f"⚠️ [Input State] {len(retry)} case session(s) changed since memoized; retrying")
+            self._merge_all(retry)
+            existing = self._existing_sessions(list(retry))
+            missing.update(_key(*retry_owners[session_id]) for session_id in retry
+                           if session_id not in existing)
+        with self._buffer_lock:
+            self._stats["session_retries"] += len(retry)
+            self._stats["not_found"] += len(missing)
+        return missing
+
+    def _merge_all(self, values):
+        rows = [(session_id, field_id, value, line_item_id, evaluation_id)
+                for session_id, fields in values.items()
+                for (field_id, line_item_id), (value, evaluation_id) in fields.items()]
+        written = 0
+        for start in range(0, len(rows), self.flush_batch):
+            written += self._merge(rows[start:start + self.flush_batch]) or 0
+        return written
+
+    def _existing_sessions(self, session_ids):
+        placeholders = ", ".join(["%s"] * len(session_ids))
+        result = self._query_fn(f"""
+            SELECT ID FROM {self._sessions_table} WHERE ID IN ({placeholders})
+        """, self._payload, tuple(session_ids))
+        if result is None or result.empty:
+            return set()
+        return {int(session_id) for session_id in result["ID"]}
+
+    def _merge(self, rows):
+        """One MERGE for rows [(case_session_id, input_field_id, value, line_item_id, evaluation_id), ...]."""
+        values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+        params = [param for row in rows for param in row]
+        # Joining CASE_SESSIONS keeps a stale session ID (case deleted meanwhile) from writing
+        # orphan rows; EQUAL_NULL lets rows without a LINE_ITEM_ID match instead of being re-inserted
+        return self._query_fn(f"""
+            MERGE INTO {self._state_table} AS target
+            USING (
+                SELECT cs.ID AS CASE_SESSION_ID,
+                       v.COLUMN2 AS INPUT_FIELD_ID,
+                       v.COLUMN3 AS INPUT_FIELD_VALUE,
+                       v.COLUMN4 AS LINE_ITEM_ID,
+                       v.COLUMN5 AS INPUT_FIELD_EVAL_ID
+                FROM (VALUES {values}) v
+                JOIN {self._sessions_table} cs ON cs.ID = v.COLUMN1
+            ) AS source
+            ON target.CASE_SESSION_ID = source.CASE_SESSION_ID
+               AND target.INPUT_FIELD_ID = source.INPUT_FIELD_ID
+               AND EQUAL_NULL(target.LINE_ITEM_ID, source.LINE_ITEM_ID)
+            WHEN MATCHED THEN UPDATE SET
+                INPUT_FIELD_VALUE = source.INPUT_FIELD_VALUE,
+                LAST_UPDATED = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN INSERT
+                (CASE_SESSION_ID, INPUT_FIELD_ID, INPUT_FIELD_VALUE, LINE_ITEM_ID, INPUT_FIELD_EVAL_ID, LAST_UPDATED)
+                VALUES (source.CASE_SESSION_ID, source.INPUT_FIELD_ID, source.INPUT_FIELD_VALUE,
+                        source.LINE_ITEM_ID, source.INPUT_FIELD_EVAL_ID, CURRENT_TIMESTAMP())
+        """, self._payload, tuple(params), return_df=False)
+
+    def _next_version(self):
+        # Millisecond clock, bumped so it is strictly increasing within the process
+        self._last_version = max(self._last_version + 1, int(time.time() * 1000))
+        return self._last_version
+
+    def _ensure_flusher(self):
+        if self._flusher_pid == os.getpid():
+            return
+        with self._flush_lock:
+            # One flusher per worker process (threads do not survive a fork)
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+
+        def run():
+            while not self._closed:
+                self._wake.wait()
+                # Let concurrent saves join this commit
+                time.sleep(self.flush_interval)
+                self._wake.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"❌ [Input State] Flusher error: {e}")
+
+        threading.Thread(target=run, name="input-state-flush", daemon=True).start()
+
+    @staticmethod
+    def _apply(state, fields):
+        """Copy of state with fields [(input_field_id, line_item_id, value), ...] applied."""
+        state = copy.deepcopy(state)
+        now = datetime.utcnow().isoformat()
+        for input_field_id, line_item_id, value in fields:
+            if input_field_id == PROBLEM_STATEMENT_FIELD:
+                state["problem_statement"] = value
+                continue
+            lines = state["fsr_line_items"]
+            for line in lines:
+                if line["line_item_id"] == line_item_id:
+                    line["value"] = value
+                    line["last_updated"] = now
+                    break
+            else:
+                lines.append({"line_item_id": line_item_id, "value": value, "last_updated": now})
+                lines.sort(key=lambda line: (line["line_item_id"] is not None, line["line_item_id"] or 0))
+            state["fsr_notes"] = lines[-1]["value"] or ""
+        return state
+
+    def stats(self):
+        with self._buffer_lock:
+            buffer = dict(self._stats)
+            buffer["pending_rows"] = sum(len(values) for values in self._pending.values())
+        buffer["flush_interval"] = self.flush_interval
+        return {
+            "session_ids": self._session_ids.stats(),
+            "write_buffer": buffer,
+        }
@@ -0,0 +1,231 @@
+"""
+Shared LLM gateway.
+
+All model calls go through one LLMGateway per worker:
+  - the model configuration (ACTIVE_MODEL_CONFIG) is turned into litellm kwargs in one place
+  - calls run as litellm.acompletion on a background asyncio loop that owns a
+    persistent, keep-alive httpx.AsyncClient, so connections to the model
+    endpoint are reused instead of re-established per request
+  - an asyncio semaphore bounds in-flight calls, and transient failures are
+    retried with jittered exponential backoff without blocking a thread per retry
+
+Request threads call complete() / stream(), which hand the work to the loop
+and wait for the result.
+"""
+import asyncio
+import os
+import queue
+import random
+import threading
+import time
+
+import httpx
+import litellm
+
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '16'))
+LLM_MAX_ATTEMPTS = int(os.environ.get('LLM_MAX_ATTEMPTS', '3'))
+LLM_BACKOFF_BASE = float(os.environ.get('LLM_BACKOFF_BASE', '0.5'))  # seconds
+LLM_BACKOFF_MAX = float(os.environ.get('LLM_BACKOFF_MAX', '8'))  # seconds
+LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', '30'))  # seconds per attempt
+LLM_KEEPALIVE_CONNECTIONS = int(os.environ.get('LLM_KEEPALIVE_CONNECTIONS', '20'))
+
+_DONE = object()
+
+
+def is_retryable(error):
+    """Rate limits, 5xx responses and connection/timeout errors are retried; other 4xx are not."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    if status is None:
+        return True
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return True
+    return status == 408 or status == 429 or status >= 500
+
+
+class LLMGateway:
+    """
+    Args:
+        model_config: ACTIVE_MODEL_CONFIG-style dict (model, api_base, provider, api_key or token provider)
+        max_concurrency: Maximum number of in-flight model calls in this worker
+        max_attempts: Attempts per call (1 = no retries)
+        backoff_base: First retry delay in seconds, doubled per attempt and jittered
+        backoff_max: Upper bound on a single retry delay
+        timeout: Per-attempt request timeout in seconds
+    """
+
+    def __init__(self, model_config, max_concurrency=LLM_MAX_CONCURRENCY, max_attempts=LLM_MAX_ATTEMPTS,
+                 backoff_base=LLM_BACKOFF_BASE, backoff_max=LLM_BACKOFF_MAX, timeout=LLM_TIMEOUT):
+        self.model_config = model_config
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_pid = None
+        self._semaphore = None
+        self._http = None
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "streams": 0,
+            "retries": 0,
+            "failures": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "latency_ms_total": 0.0,
+        }
+
+    # ------------------------------------------------------------------ config
+
+    def model_kwargs(self, **overrides):
+        """litellm kwargs for the active model; overrides (e.g. max_tokens) win."""
+        config = self.model_config
+        kwargs = {
+            "model": config["model"],
+            "api_base": config["api_base"],
+            "custom_llm_provider": config["provider"],
+            "temperature": 0.1,
+            "timeout": self.timeout,
+        }
+        if config["use_token_provider"]:
+            kwargs["azure_ad_token_provider"] = config["token_provider"]
+            kwargs["api_version"] = config["api_version"]
+        else:
+            kwargs["api_key"] = config["api_key"]
+        kwargs.update(overrides)
+        return kwargs
+
+    # ------------------------------------------------------------------ calls
+
+    def complete(self, messages, max_attempts=None, **overrides):
+        """Blocking completion for request threads; runs on the gateway loop."""
+        future = asyncio.run_coroutine_threadsafe(
+            self.acomplete(messages, max_attempts=max_attempts, **overrides), self._get_loop()
+        )
+        return future.result()
+
+    async def acomplete(self, messages, max_attempts=None, **overrides):
+        """Completion with the concurrency limit and jittered exponential backoff."""
+        kwargs = self.model_kwargs(**overrides)
+        async with self._semaphore:
+            return await self._with_retries(
+                lambda: litellm.acompletion(messages=messages, **kwargs), max_attempts, "calls"
+            )
+
+    def stream(self, messages, max_attempts=None, **overrides):
+        """
+        Yield streamed completion chunks to a request thread. Retries only cover
+        opening the stream; once chunks have been delivered an error is raised.
+        """
+        kwargs = self.model_kwargs(stream=True, **overrides)
+        chunks = queue.Queue()
+
+        async def pump():
+            try:
+                async with self._semaphore:
+                    response = await self._with_retries(
+                        lambda: litellm.acompletion(messages=messages, **kwargs), max_attempts, "streams"
+                    )
+                    async for chunk in response:
+                        chunks.put(chunk)
+            except BaseException as e:
+                chunks.put(e)
+            finally:
+                chunks.put(_DONE)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._get_loop())
+        try:
+            while True:
+                item = chunks.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Client disconnected mid-stream: stop reading from the model
+            if not future.done():
+                future.cancel()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        completed = stats["calls"] + stats["streams"]
+        stats.update({
+            "max_concurrency": self.max_concurrency,
+            "max_attempts": self.max_attempts,
+            "avg_latency_ms": round(stats["latency_ms_total"] / completed, 1) if completed else None,
+        })
+        return stats
+
+    # ------------------------------------------------------------------ internals
+
+    async def _with_retries(self, make_call, max_attempts, counter):
+        attempts = max(1, max_attempts or self.max_attempts)
+        self._bump("in_flight")
+        started = time.perf_counter()
+        try:
+            for attempt in range(1, attempts + 1):
+                try:
+                    result = await make_call()
+                    self._bump(counter)
+                    self._bump("latency_ms_total", (time.perf_counter() - started) * 1000)
+                    return result
+                except Exception as e:
+                    if attempt == attempts or not is_retryable(e):
+                        self._bump("failures")
+                        raise
+                    self._bump("retries")
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                    print(f"⚠️ [LLM] Attempt {attempt} failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+        finally:
+            self._bump("in_flight", -1)
+
+    def _get_loop(self):
+        with self._lock:
+            # A loop thread does not survive a fork (e.g. gunicorn --preload); start a new one
+            if self._loop is None or self._loop_pid != os.getpid():
+                self._start_loop()
+            return self._loop
+
+    def _start_loop(self):
+        # Caller holds self._lock
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            # Shared keep-alive client for litellm's async providers
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max(self.max_concurrency, LLM_KEEPALIVE_CONNECTIONS),
+                    max_keepalive_connections=LLM_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=60,
+                ),
+                timeout=self.timeout,
+            )
+            litellm.aclient_session = self._http
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="llm-gateway-loop", daemon=True).start()
+        ready.wait()
+        self._loop = loop
+        self._loop_pid = os.getpid()
+
+    def _bump(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+            if key == "in_flight":
+                self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._stats["in_flight"])
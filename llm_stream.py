@@ -0,0 +1,171 @@
+"""
+Incremental parsing of streamed LLM output for the /llm/stream endpoint.
+
+The model returns one JSON document, but it arrives token by token. These
+parsers consume the raw chunks as they come in and surface the parts the UI
+can show early: each criterion of a step 1 {"evaluation": {...}} object once
+its value object is closed, and the step 2 "rewrite" string as decoded text.
+"""
+import json
+import re
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class EvaluationStreamParser:
+    """
+    Emits (criterion_name, criterion_dict) pairs from a streamed
+    {"evaluation": {"<name>": {...}, ...}} document as soon as each member
+    object is complete. Anything before the first "{" (e.g. a ```json fence)
+    is ignored.
+    """
+
+    def __init__(self, container_key="evaluation"):
+        self.container_key = container_key
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._pending_key = None
+        self._container_depth = None
+        self._member_key = None
+        self._member_start = None
+
+    def feed(self, chunk):
+        """Consume a chunk and return the list of criteria completed by it."""
+        completed = []
+        self.text += chunk
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    try:
+                        self._last_string = json.loads(text[self._string_start:i + 1])
+                    except ValueError:
+                        self._last_string = None
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":":
+                self._pending_key = self._last_string
+            elif ch == ",":
+                self._pending_key = None
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "{" and self._container_depth is None and self._depth == 2 \
+                        and self._pending_key == self.container_key:
+                    self._container_depth = self._depth
+                elif ch == "{" and self._container_depth and self._depth == self._container_depth + 1:
+                    self._member_key = self._pending_key
+                    self._member_start = i
+                self._pending_key = None
+            elif ch in "}]":
+                if ch == "}" and self._container_depth and self._depth == self._container_depth + 1 \
+                        and self._member_start is not None:
+                    try:
+                        value = json.loads(text[self._member_start:i + 1])
+                        if self._member_key is not None and isinstance(value, dict):
+                            completed.append((self._member_key, value))
+                    except ValueError:
+                        pass
+                    self._member_start = None
+                    self._member_key = None
+                elif self._container_depth and self._depth == self._container_depth:
+                    self._container_depth = -1  # container closed; ignore the rest
+                self._depth -= 1
+        self._pos = len(text)
+        return completed
+
+
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class RewriteStreamParser:
+    """
+    Emits decoded text deltas of the "rewrite" string value in a streamed
+    {"rewrite": "..."} document. Escape sequences split across chunks
+    (including \\uXXXX surrogate pairs) are held back until complete.
+    """
+
+    def __init__(self, key="rewrite"):
+        self._start = re.compile(r'"%s"\s*:\s*"' % re.escape(key))
+        self.text = ""
+        self._value_pos = None
+        self._done = False
+        self.rewrite = ""
+
+    @property
+    def done(self):
+        return self._done
+
+    def feed(self, chunk):
+        """Consume a chunk and return the newly decoded rewrite text (possibly empty)."""
+        self.text += chunk
+        if self._done:
+            return ""
+        if self._value_pos is None:
+            match = self._start.search(self.text)
+            if not match:
+                return ""
+            self._value_pos = match.end()
+
+        out = []
+        text = self.text
+        i = self._value_pos
+        while i < len(text):
+            ch = text[i]
+            if ch == '"':
+                self._done = True
+                i += 1
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            if i + 1 >= len(text):
+                break  # wait for the escaped character
+            esc = text[i + 1]
+            if esc in _SIMPLE_ESCAPES:
+                out.append(_SIMPLE_ESCAPES[esc])
+                i += 2
+                continue
+            if esc != "u":
+                out.append(esc)
+                i += 2
+                continue
+            if i + 6 > len(text):
+                break  # wait for all four hex digits
+            try:
+                code = int(text[i + 2:i + 6], 16)
+            except ValueError:
+                code = 0xFFFD
+            if 0xD800 <= code <= 0xDBFF:
+                # High surrogate: needs the following \uXXXX low surrogate
+                if i + 12 > len(text):
+                    break
+                try:
+                    out.append(json.loads('"' + text[i:i + 12] + '"'))
+                except ValueError:
+                    out.append("�")
+                i += 12
+                continue
+            out.append(chr(code))
+            i += 6
+        self._value_pos = i
+        delta = "".join(out)
+        self.rewrite += delta
+        return delta
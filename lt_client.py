@@ -0,0 +1,135 @@
+"""
+Minimal HTTP client for a LanguageTool server's /v2/check.
+
+language_tool_python builds request and Match wrapper objects for every call
+and exposes far more than /check uses. LanguageToolClient posts straight to
+/v2/check over a keep-alive connection pool and parses the response (with
+orjson when it is installed) into small __slots__ Match records carrying only
+the fields /check reads. Rule selection (disabledRules, disabledCategories,
+enabledRules, enabledOnly) is sent with every request, so expensive or noisy
+rules can be kept off the hot path.
+
+LanguageTool (Java) reports offsets and lengths in UTF-16 code units; they are
+converted to Python string indices, which differ once the text contains
+characters outside the BMP (emoji).
+"""
+import json
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional speed-up
+    _loads = json.loads
+
+
+class LanguageToolRequestError(ValueError):
+    """The server rejected the request itself (4xx); the server is fine, the input is not."""
+
+
+class Match:
+    """One LanguageTool finding (attribute names follow language_tool_python.Match)."""
+
+    __slots__ = ("offset", "errorLength", "message", "replacements", "ruleId", "category")
+
+    def __init__(self, offset, errorLength, message, replacements, ruleId, category):
+        self.offset = offset
+        self.errorLength = errorLength
+        self.message = message
+        self.replacements = replacements
+        self.ruleId = ruleId
+        self.category = category
+
+    def __repr__(self):
+        return f"Match(ruleId={self.ruleId!r}, offset={self.offset}, errorLength={self.errorLength})"
+
+
+def _csv(values):
+    return ",".join(v for v in values if v)
+
+
+def _utf16_index_map(text):
+    """
+    List mapping UTF-16 code unit offsets in text to str indices, or None when
+    they are the same (no characters outside the BMP).
+    """
+    if text.isascii() or not any(ord(c) > 0xFFFF for c in text):
+        return None
+    index_map = []
+    for index, char in enumerate(text):
+        index_map.append(index)
+        if ord(char) > 0xFFFF:
+            index_map.append(index)  # low surrogate of the same character
+    index_map.append(len(text))
+    return index_map
+
+
+class LanguageToolClient:
+    """
+    Args:
+        url: LanguageTool server base URL (e.g. http://localhost:8081)
+        language: Language code sent with every check
+        disabled_rules / disabled_categories: Rule / category IDs to skip
+        enabled_rules: Rule IDs to turn on (with enabled_only, the only rules that run)
+        enabled_only: Run only enabled_rules
+        timeout: Seconds per request
+        pool_size: Keep-alive connections kept open to the server
+        max_replacements: Suggestions kept per match (LanguageTool can return dozens)
+    """
+
+    def __init__(self, url, language="en-US", disabled_rules=(), disabled_categories=(),
+                 enabled_rules=(), enabled_only=False, timeout=10.0, pool_size=10, max_replacements=5):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.max_replacements = max_replacements
+        self._params = {"language": language}
+        if disabled_rules:
+            self._params["disabledRules"] = _csv(disabled_rules)
+        if disabled_categories:
+            self._params["disabledCategories"] = _csv(disabled_categories)
+        if enabled_rules:
+            self._params["enabledRules"] = _csv(enabled_rules)
+        if enabled_only:
+            if not enabled_rules:
+                raise ValueError("enabled_only needs enabled_rules")
+            self._params["enabledOnly"] = "true"
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def check(self, text):
+        """Return the list of Match records for text."""
+        data = dict(self._params)
+        data["text"] = text
+        response = self._session.post(f"{self.url}/v2/check", data=data, timeout=self.timeout)
+        if 400 <= response.status_code < 500:
+            raise LanguageToolRequestError(
+                f"LanguageTool rejected the request ({response.status_code}): {response.text[:200]}")
+        response.raise_for_status()
+
+        limit = self.max_replacements
+        index_map = _utf16_index_map(text)
+        matches = []
+        for m in _loads(response.content).get("matches", ()):
+            rule = m.get("rule") or {}
+            offset, length = m["offset"], m["length"]
+            if index_map is not None:
+                end = index_map[min(offset + length, len(index_map) - 1)]
+                offset = index_map[min(offset, len(index_map) - 1)]
+                length = end - offset
+            matches.append(Match(
+                offset,
+                length,
+                m.get("message", ""),
+                [r["value"] for r in m.get("replacements", ())[:limit] if "value" in r],
+                rule.get("id", ""),
+                (rule.get("category") or {}).get("id"),
+            ))
+        return matches
+
+    def close(self):
+        self._session.close()
@@ -0,0 +1,191 @@
+"""
+Pool of LanguageTool HTTP servers.
+
+Each /check used to go to the single LanguageTool server every worker was
+pointed at. LanguageToolPool spreads checks over several servers (a list of
+URLs, or N local processes started by scripts/start.sh):
+  - routing: least outstanding requests, ties broken by lower average latency
+  - failures: a backend that fails eject_after times in a row is ejected and
+    the request is retried on another backend
+  - health: a background thread probes ejected backends and puts them back
+    once they answer again
+Per-backend request counts, failures and latency are reported by stats().
+"""
+import os
+import threading
+import time
+
+import requests
+
+_LATENCY_ALPHA = 0.2  # weight of the newest sample in the moving average
+
+
+class NoBackendAvailable(Exception):
+    """Every LanguageTool backend is ejected."""
+
+
+class _Backend:
+    __slots__ = ("url", "tool", "healthy", "outstanding", "requests", "failures",
+                 "consecutive_failures", "latency_ms", "ejected_at", "last_error")
+
+    def __init__(self, url):
+        self.url = url
+        self.tool = None
+        self.healthy = True
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency_ms = None
+        self.ejected_at = None
+        self.last_error = None
+
+
+def backend_urls_from_env(environ=os.environ):
+    """
+    LanguageTool URLs from the environment:
+      LT_URLS       comma-separated list of servers, or
+      LT_INSTANCES  number of local servers on consecutive ports from LT_PORT (default 1)
+    """
+    urls = [u.strip().rstrip("/") for u in environ.get("LT_URLS", "").split(",") if u.strip()]
+    if urls:
+        return urls
+    port = int(environ.get("LT_PORT", "8081"))
+    instances = max(1, int(environ.get("LT_INSTANCES", "1")))
+    return [f"http://localhost:{port + i}" for i in range(instances)]
+
+
+class LanguageToolPool:
+    """
+    Args:
+        urls: LanguageTool server base URLs
+        factory: Callable(url) -> object with .check(text) (an lt_client.LanguageToolClient)
+        eject_after: Consecutive failures before a backend is taken out of rotation
+        health_interval: Seconds between probes of ejected backends
+        probe_timeout: Timeout in seconds for one health probe
+        client_errors: Exception types caused by the input rather than the backend;
+                       raised as-is without retrying or counting against the backend
+    """
+
+    def __init__(self, urls, factory, eject_after=3, health_interval=10, probe_timeout=2.0,
+                 client_errors=()):
+        if not urls:
+            raise ValueError("LanguageToolPool needs at least one backend URL")
+        self._backends = [_Backend(url) for url in urls]
+        self._factory = factory
+        self.eject_after = eject_after
+        self.health_interval = health_interval
+        self.probe_timeout = probe_timeout
+        self._client_errors = tuple(client_errors)
+        self._lock = threading.Lock()
+        self._checker_pid = None
+
+    def check(self, text):
+        """Check text on the least busy healthy backend, failing over to the others."""
+        self._ensure_health_checker()
+        tried = set()
+        last_error = None
+        while True:
+            backend = self._acquire(tried)
+            if backend is None:
+                break
+            tried.add(backend.url)
+            started = time.perf_counter()
+            try:
+                if backend.tool is None:
+                    backend.tool = self._factory(backend.url)
+                matches = backend.tool.check(text)
+            except self._client_errors:
+                self._release(backend, (time.perf_counter() - started) * 1000, None)
+                raise
+            except Exception as e:
+                last_error = e
+                self._release(backend, None, e)
+                continue
+            self._release(backend, (time.perf_counter() - started) * 1000, None)
+            return matches
+        if last_error is not None:
+            raise last_error
+        raise NoBackendAvailable("No healthy LanguageTool backend")
+
+    def stats(self):
+        with self._lock:
+            backends = [{
+                "url": b.url,
+                "healthy": b.healthy,
+                "outstanding": b.outstanding,
+                "requests": b.requests,
+                "failures": b.failures,
+                "avg_latency_ms": round(b.latency_ms, 1) if b.latency_ms is not None else None,
+                "ejected_for_s": round(time.time() - b.ejected_at, 1) if b.ejected_at else None,
+                "last_error": b.last_error,
+            } for b in self._backends]
+        return {
+            "backends": backends,
+            "healthy": sum(1 for b in backends if b["healthy"]),
+            "eject_after": self.eject_after,
+        }
+
+    # ------------------------------------------------------------------ internals
+
+    def _acquire(self, exclude):
+        with self._lock:
+            candidates = [b for b in self._backends if b.healthy and b.url not in exclude]
+            if not candidates:
+                return None
+            backend = min(candidates, key=lambda b: (
+                b.outstanding, b.latency_ms if b.latency_ms is not None else 0.0))
+            backend.outstanding += 1
+            return backend
+
+    def _release(self, backend, latency_ms, error):
+        with self._lock:
+            backend.outstanding -= 1
+            backend.requests += 1
+            if error is None:
+                backend.consecutive_failures = 0
+                if backend.latency_ms is None:
+                    backend.latency_ms = latency_ms
+                else:
+                    backend.latency_ms += _LATENCY_ALPHA * (latency_ms - backend.latency_ms)
+                return
+            backend.failures += 1
+            backend.consecutive_failures += 1
+            backend.last_error = str(error)
+            if backend.healthy and backend.consecutive_failures >= self.eject_after:
+                backend.healthy = False
+                backend.ejected_at = time.time()
+                print(f"⚠️ [LanguageTool] Ejected {backend.url} after "
+                      f"{backend.consecutive_failures} failures: {error}")
+
+    def _probe(self, backend):
+        try:
+            response = requests.get(f"{backend.url}/v2/languages", timeout=self.probe_timeout)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _run_health_checks(self):
+        while True:
+            time.sleep(self.health_interval)
+            with self._lock:
+                ejected = [b for b in self._backends if not b.healthy]
+            for backend in ejected:
+                if not self._probe(backend):
+                    continue
+                with self._lock:
+                    backend.healthy = True
+                    backend.consecutive_failures = 0
+                    backend.ejected_at = None
+                    backend.latency_ms = None
+                print(f"✅ [LanguageTool] {backend.url} is healthy again")
+
+    def _ensure_health_checker(self):
+        if self._checker_pid == os.getpid():
+            return
+        with self._lock:
+            # One checker per worker process (threads do not survive a fork)
+            if self._checker_pid == os.getpid():
+                return
+            self._checker_pid = os.getpid()
+        threading.Thread(target=self._run_health_checks, name="languagetool-health", daemon=True).start()
@@ -0,0 +1,132 @@
+"""
+Query results -> JSON-ready records.
+
+Endpoints used to walk DataFrames with iterrows(), building a Series per row
+and calling pd.notna / .isoformat() on every cell. Here each column is
+converted once (nulls -> None, timestamps -> ISO strings, decimals -> float,
+JSON text -> objects) and the records are zipped together at the end.
+
+records() works on a DataFrame from snowflake_query; tuple_records() takes
+cursor column names and row tuples directly (snowflake_query_rows) and never
+touches pandas.
+"""
+import datetime
+import decimal
+import json
+
+import pandas as pd
+
+# Every timestamp is rendered in this one format (always with microseconds;
+# tz-aware values in UTC with "+00:00"), so ISO strings from records() and
+# tuple_records() compare chronologically with each other
+_ISO_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+_UTC_SUFFIX = "+00:00"
+
+
+def _iso(value):
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None and value.utcoffset() is not None:
+            return value.astimezone(datetime.timezone.utc).strftime(_ISO_FORMAT) + _UTC_SUFFIX
+        return value.strftime(_ISO_FORMAT)
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value)
+
+
+def _to_float(value):
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number  # NaN -> None
+
+
+def _to_json(value):
+    if value is None or not isinstance(value, str):
+        return value
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        print(f"⚠️ [Rows] Could not parse JSON column value: {value[:80]}")
+        return None
+
+
+def _plain(value):
+    # Snowflake NUMBER(38,0) arrives as int, scaled NUMBER as Decimal
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def _timestamp_column(series):
+    """ISO strings for a timestamp column (same output as _iso), vectorized for datetime64 dtypes."""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        if getattr(series.dt, "tz", None) is not None:
+            formatted = series.dt.tz_convert("UTC").dt.strftime(_ISO_FORMAT) + _UTC_SUFFIX
+        else:
+            formatted = series.dt.strftime(_ISO_FORMAT)
+        mask = series.isna()
+        values = formatted.tolist()
+        if mask.any():
+            values = [None if missing else v for v, missing in zip(values, mask.tolist())]
+        return values
+    return [_iso(v) for v in _null_to_none(series)]
+
+
+def _null_to_none(series):
+    values = series.tolist()
+    mask = series.isna()
+    if mask.any():
+        values = [None if missing else v for v, missing in zip(values, mask.tolist())]
+    return values
+
+
+def _convert(name, values, timestamps, floats, json_columns):
+    if name in timestamps:
+        return [_iso(v) for v in values]
+    if name in floats:
+        return [_to_float(v) for v in values]
+    if name in json_columns:
+        return [_to_json(v) for v in values]
+    return [_plain(v) for v in values]
+
+
+def records(df, timestamps=(), floats=(), json_columns=()):
+    """
+    Convert a DataFrame into a list of dicts (one per row, keyed by column name).
+
+    Args:
+        df: DataFrame (None or empty -> [])
+        timestamps: Columns rendered as ISO-8601 strings
+        floats: Columns converted to float (Decimal/NaN safe)
+        json_columns: Columns holding JSON text (e.g. VARIANT) parsed into objects
+    """
+    if df is None or df.empty:
+        return []
+    names = list(df.columns)
+    columns = []
+    for name in names:
+        series = df[name]
+        if name in timestamps:
+            columns.append(_timestamp_column(series))
+        else:
+            columns.append(_convert(name, _null_to_none(series), (), floats, json_columns))
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def tuple_records(column_names, rows, timestamps=(), floats=(), json_columns=()):
+    """Same as records() for cursor output: column names plus a list of row tuples."""
+    if not rows:
+        return []
+    names = list(column_names)
+    columns = [
+        _convert(name, values, timestamps, floats, json_columns)
+        for name, values in zip(names, zip(*rows))
+    ]
+    return [dict(zip(names, row)) for row in zip(*columns)]
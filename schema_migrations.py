@@ -0,0 +1,65 @@
+"""
+Idempotent schema changes the application code depends on.
+
+They are applied once per container start by scripts/start.sh, before the
+gunicorn workers come up, instead of from request workers or background
+threads at runtime:
+
+    python schema_migrations.py
+
+Every migration must be safe to run again (IF NOT EXISTS).
+Code reading a column added here should still cope with it missing, since a
+failed migration does not stop the app from starting.
+"""
+import os
+
+
+def _crm_needs_feedback(run, query, prefix):
+    run(f"""
+        ALTER TABLE {prefix}.CASE_SESSIONS
+        ADD COLUMN IF NOT EXISTS CRM_NEEDS_FEEDBACK BOOLEAN DEFAULT FALSE
+    """)
+
+
+def _crm_status_sync_time(run, query, prefix):
+    # Written only by the CRM status sync; CRM_LAST_SYNC_TIME is also stamped
+    # by case creation and title updates, so it cannot tell whether the status was synced
+    run(f"""
+        ALTER TABLE {prefix}.CASE_SESSIONS
+        ADD COLUMN IF NOT EXISTS CRM_STATUS_SYNC_TIME TIMESTAMP_NTZ
+    """)
+
+
+MIGRATIONS = [
+    ("CASE_SESSIONS.CRM_NEEDS_FEEDBACK", _crm_needs_feedback),
+    ("CASE_SESSIONS.CRM_STATUS_SYNC_TIME", _crm_status_sync_time),
+]
+
+
+def apply_migrations(query_fn, payload, database, schema):
+    """
+    Run every migration in order; stops at the first failure.
+
+    Args:
+        query_fn: Callable with the snowflake_query signature
+        payload: Connection payload passed to query_fn
+        database / schema: Location of the application tables
+    """
+    def run(statement):
+        query_fn(statement, payload, return_df=False)
+
+    def query(statement):
+        return query_fn(statement, payload)
+
+    for name, migrate in MIGRATIONS:
+        migrate(run, query, f"{database}.{schema}")
+        print(f"✅ [Migrations] {name}")
+
+
+if __name__ == "__main__":
+    # Connection settings come from app.py (config.yaml); importing it must not
+    # start the CRM status sync in this short-lived process
+    os.environ["CRM_SYNC_ENABLED"] = "0"
+    from app import snowflake_query, CONNECTION_PAYLOAD, DATABASE, SCHEMA
+
+    apply_migrations(snowflake_query, CONNECTION_PAYLOAD, DATABASE, SCHEMA)
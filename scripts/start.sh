@@ -1,78 +1,107 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-# Start LanguageTool server in background
+# Start LanguageTool server(s) in background.
+# LT_INSTANCES > 1 starts that many servers on consecutive ports from LT_PORT;
+# app.py spreads checks across them (see lt_pool.py). Each one gets its own JVM heap.
 JAVA_OPTS=${JAVA_OPTS:-"-Xms128m -Xmx512m"}
 LT_PORT=${LT_PORT:-8081}
+LT_INSTANCES=${LT_INSTANCES:-1}
 LT_DIR=/opt/LanguageTool
 
-echo "Starting LanguageTool server on port $LT_PORT..."
-java $JAVA_OPTS -cp "$LT_DIR/*" org.languagetool.server.HTTPServer --port $LT_PORT > /tmp/languagetool.log 2>&1 &
-LT_PID=$!
+# Wait for one LanguageTool server to answer (max 60 seconds)
+wait_for_languagetool() {
+    local port=$1 pid=$2 log=$3
+    local url="http://localhost:${port}"
+    local max_wait=60
+    local wait_count=0
 
-echo "LanguageTool started (pid $LT_PID), waiting for it to be ready..."
-
-# Wait for LanguageTool to be ready (max 60 seconds)
-MAX_WAIT=60
-WAIT_COUNT=0
-LT_URL="http://localhost:${LT_PORT}"
-
-while [ $WAIT_COUNT -lt $MAX_WAIT ]; do
-    # Check if LanguageTool is responding (try simple HTTP check or check if port is listening)
-    if command -v curl > /dev/null 2>&1; then
-        # Try to check if LanguageTool HTTP server is responding
-        if curl -s --connect-timeout 2 "$LT_URL" > /dev/null 2>&1 || \
-           curl -s --connect-timeout 2 "$LT_URL/v2/languages" > /dev/null 2>&1; then
-            echo "✅ LanguageTool is ready!"
-            break
-        fi
-    else
-        # Fallback: check if port is listening using netcat or /proc
-        if command -v nc > /dev/null 2>&1; then
-            if nc -z localhost $LT_PORT 2>/dev/null; then
-                echo "✅ LanguageTool port is listening!"
-                sleep 2  # Give it a moment to fully initialize
-                break
+    while [ $wait_count -lt $max_wait ]; do
+        # Check if LanguageTool is responding (try simple HTTP check or check if port is listening)
+        if command -v curl > /dev/null 2>&1; then
+            # Try to check if LanguageTool HTTP server is responding
+            if curl -s --connect-timeout 2 "$url" > /dev/null 2>&1 || \
+               curl -s --connect-timeout 2 "$url/v2/languages" > /dev/null 2>&1; then
+                echo "✅ LanguageTool on port $port is ready!"
+                return 0
             fi
-        elif [ -f /proc/net/tcp ]; then
-            # Check if port is in listening state (hex format)
-            PORT_HEX=$(printf "%04X" $LT_PORT)
-            if grep -q ":$PORT_HEX " /proc/net/tcp 2>/dev/null; then
-                echo "✅ LanguageTool port is listening!"
-                sleep 2  # Give it a moment to fully initialize
-                break
+        else
+            # Fallback: check if port is listening using netcat or /proc
+            if command -v nc > /dev/null 2>&1; then
+                if nc -z localhost $port 2>/dev/null; then
+                    echo "✅ LanguageTool port $port is listening!"
+                    sleep 2  # Give it a moment to fully initialize
+                    return 0
+                fi
+            elif [ -f /proc/net/tcp ]; then
+                # Check if port is in listening state (hex format)
+                local port_hex
+                port_hex=$(printf "%04X" $port)
+                if grep -q ":$port_hex " /proc/net/tcp 2>/dev/null; then
+                    echo "✅ LanguageTool port $port is listening!"
+                    sleep 2  # Give it a moment to fully initialize
+                    return 0
+                fi
             fi
         fi
+
+        # Check if LanguageTool process is still running
+        if ! kill -0 $pid 2>/dev/null; then
+            echo "❌ LanguageTool process on port $port died. Checking logs:"
+            tail -20 "$log" || true
+            return 1
+        fi
+
+        wait_count=$((wait_count + 1))
+        if [ $((wait_count % 5)) -eq 0 ]; then
+            echo "   Still waiting for LanguageTool on port $port... (${wait_count}s/${max_wait}s)"
+        fi
+        sleep 1
+    done
+
+    echo "❌ LanguageTool on port $port failed to start within ${max_wait} seconds"
+    echo "LanguageTool logs:"
+    tail -30 "$log" || true
+    return 1
+}
+
+LT_PIDS=()
+LT_LOGS=()
+for ((i = 0; i < LT_INSTANCES; i++)); do
+    port=$((LT_PORT + i))
+    log=/tmp/languagetool.log
+    if [ "$LT_INSTANCES" -gt 1 ]; then
+        log=/tmp/languagetool-${port}.log
     fi
-    
-    # Check if LanguageTool process is still running
-    if ! kill -0 $LT_PID 2>/dev/null; then
-        echo "❌ LanguageTool process died. Checking logs:"
-        tail -20 /tmp/languagetool.log || true
-        exit 1
-    fi
-    
-    WAIT_COUNT=$((WAIT_COUNT + 1))
-    if [ $((WAIT_COUNT % 5)) -eq 0 ]; then
-        echo "   Still waiting for LanguageTool... (${WAIT_COUNT}s/${MAX_WAIT}s)"
-    fi
-    sleep 1
+    echo "Starting LanguageTool server on port $port..."
+    java $JAVA_OPTS -cp "$LT_DIR/*" org.languagetool.server.HTTPServer --port $port > "$log" 2>&1 &
+    LT_PIDS+=($!)
+    LT_LOGS+=("$log")
 done
 
-if [ $WAIT_COUNT -ge $MAX_WAIT ]; then
-    echo "❌ LanguageTool failed to start within ${MAX_WAIT} seconds"
-    echo "LanguageTool logs:"
-    tail -30 /tmp/languagetool.log || true
-    exit 1
-fi
+echo "LanguageTool started (pids ${LT_PIDS[*]}), waiting for it to be ready..."
+
+# The servers start in parallel; wait for each in turn
+for ((i = 0; i < LT_INSTANCES; i++)); do
+    wait_for_languagetool $((LT_PORT + i)) "${LT_PIDS[$i]}" "${LT_LOGS[$i]}" || exit 1
+done
+
+# Export so app.py builds its LanguageTool pool from the same settings
+export LT_PORT LT_INSTANCES
 
-# Export URL so app.py can read it if needed
-export LT_URL="$LT_URL"
+# Apply idempotent schema changes once, before any worker serves requests.
+# The app copes with a missing column, so a failure here does not block startup.
+echo "Applying schema migrations..."
+python schema_migrations.py || echo "⚠️ Schema migrations failed; the app will fall back where it can"
 
 # Start gunicorn for Flask app with increased timeouts
-echo "Starting Gunicorn with ${WEB_CONCURRENCY:-2} workers..."
+# Threaded workers: requests waiting on the LLM (via the gateway's async loop) only
+# park a thread, so a few workers can keep many LLM calls in flight
+echo "Starting Gunicorn with ${WEB_CONCURRENCY:-2} workers x ${GUNICORN_THREADS:-8} threads..."
 exec gunicorn \
     -w ${WEB_CONCURRENCY:-2} \
+    --worker-class gthread \
+    --threads ${GUNICORN_THREADS:-8} \
     -b 0.0.0.0:${PORT:-8055} \
     --timeout 120 \
     --graceful-timeout 30 \
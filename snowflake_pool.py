@@ -0,0 +1,396 @@
+"""
+Pooled Snowflake connection layer.
+
+Drop-in replacement for snowflakeconnection.snowflake_query: connections are
+kept open per worker and reused, one pool per connection payload
+(CONNECTION_PAYLOAD vs PROD_PAYLOAD), instead of paying the connection
+handshake on every query.
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pandas as pd
+import snowflake.connector
+from snowflake.connector.errors import DatabaseError, OperationalError
+
+POOL_MAX_SIZE = int(os.environ.get('SNOWFLAKE_POOL_SIZE', '8'))
+POOL_CHECKOUT_TIMEOUT = float(os.environ.get('SNOWFLAKE_POOL_CHECKOUT_TIMEOUT', '30'))  # seconds
+POOL_IDLE_TIMEOUT = float(os.environ.get('SNOWFLAKE_POOL_IDLE_TIMEOUT', '600'))  # seconds
+POOL_HEALTH_CHECK_AFTER = float(os.environ.get('SNOWFLAKE_POOL_HEALTH_CHECK_AFTER', '60'))  # seconds idle
+POOL_REAP_INTERVAL = 60  # seconds
+IN_LIST_CHUNK_SIZE = int(os.environ.get('SNOWFLAKE_IN_LIST_CHUNK_SIZE', '500'))
+IN_LIST_PARALLELISM = int(os.environ.get('SNOWFLAKE_IN_LIST_PARALLELISM', '4'))
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Bounded pool of Snowflake connections for a single payload.
+
+    Connections are created lazily up to max_size. Idle connections are
+    health-checked before reuse and closed once they exceed idle_timeout.
+    """
+
+    def __init__(self, payload, label, max_size=POOL_MAX_SIZE,
+                 checkout_timeout=POOL_CHECKOUT_TIMEOUT, idle_timeout=POOL_IDLE_TIMEOUT,
+                 health_check_after=POOL_HEALTH_CHECK_AFTER):
+        self.payload = dict(payload or {})
+        self.label = label
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._idle = []  # LIFO stack so hot connections stay warm
+        self._in_use = 0
+        self._metrics = {
+            "checkouts": 0,
+            "connects": 0,
+            "discards": 0,
+            "health_check_failures": 0,
+            "idle_evictions": 0,
+            "timeouts": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "checkout_ms_total": 0.0,
+            "checkout_ms_max": 0.0,
+        }
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the with-block."""
+        wait_start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self._metrics["timeouts"] += 1
+            raise PoolTimeoutError(
+                f"No Snowflake connection available in pool '{self.label}' after {self.checkout_timeout}s"
+            )
+        pooled = None
+        try:
+            pooled = self._take()
+            wait_ms = (time.perf_counter() - wait_start) * 1000
+            with self._lock:
+                self._in_use += 1
+                self._metrics["checkouts"] += 1
+                self._metrics["wait_ms_total"] += wait_ms
+                self._metrics["wait_ms_max"] = max(self._metrics["wait_ms_max"], wait_ms)
+        except Exception:
+            self._slots.release()
+            raise
+
+        held_start = time.perf_counter()
+        broken = False
+        try:
+            yield pooled.conn
+        except (OperationalError, DatabaseError):
+            broken = self._is_closed(pooled.conn)
+            raise
+        finally:
+            held_ms = (time.perf_counter() - held_start) * 1000
+            with self._lock:
+                self._in_use -= 1
+                self._metrics["checkout_ms_total"] += held_ms
+                self._metrics["checkout_ms_max"] = max(self._metrics["checkout_ms_max"], held_ms)
+            if broken or self._is_closed(pooled.conn):
+                self._discard(pooled)
+            else:
+                pooled.last_used = time.time()
+                with self._lock:
+                    self._idle.append(pooled)
+            self._slots.release()
+
+    def evict_idle(self):
+        """Close connections that have been idle longer than idle_timeout."""
+        cutoff = time.time() - self.idle_timeout
+        with self._lock:
+            stale = [p for p in self._idle if p.last_used < cutoff]
+            self._idle = [p for p in self._idle if p.last_used >= cutoff]
+            self._metrics["idle_evictions"] += len(stale)
+        for pooled in stale:
+            self._close(pooled.conn)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._close(pooled.conn)
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+            idle = len(self._idle)
+            in_use = self._in_use
+        checkouts = metrics["checkouts"] or 1
+        metrics.update({
+            "label": self.label,
+            "max_size": self.max_size,
+            "idle": idle,
+            "in_use": in_use,
+            "avg_wait_ms": round(metrics["wait_ms_total"] / checkouts, 2),
+            "avg_checkout_ms": round(metrics["checkout_ms_total"] / checkouts, 2),
+        })
+        return metrics
+
+    def _take(self):
+        while True:
+            with self._lock:
+                pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                return self._connect()
+            now = time.time()
+            if now - pooled.last_used > self.idle_timeout:
+                with self._lock:
+                    self._metrics["idle_evictions"] += 1
+                self._close(pooled.conn)
+                continue
+            if now - pooled.last_used > self.health_check_after and not self._healthy(pooled.conn):
+                with self._lock:
+                    self._metrics["health_check_failures"] += 1
+                self._discard(pooled)
+                continue
+            return pooled
+
+    def _connect(self):
+        conn = snowflake.connector.connect(**self.payload)
+        with self._lock:
+            self._metrics["connects"] += 1
+        return _PooledConnection(conn)
+
+    def _healthy(self, conn):
+        if self._is_closed(conn):
+            return False
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, pooled):
+        with self._lock:
+            self._metrics["discards"] += 1
+        self._close(pooled.conn)
+
+    @staticmethod
+    def _is_closed(conn):
+        try:
+            return conn.is_closed()
+        except Exception:
+            return True
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pool_labels = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+_reaper = None
+
+
+def _payload_key(payload):
+    return tuple(sorted((str(k), str(v)) for k, v in (payload or {}).items()))
+
+
+def set_pool_label(payload, label):
+    """Give the pool for a payload a readable name in pool_stats() (e.g. 'CONNECTION_PAYLOAD')."""
+    key = _payload_key(payload)
+    with _pools_lock:
+        _pool_labels[key] = label
+        if key in _pools:
+            _pools[key].label = label
+
+
+def get_pool(payload):
+    """Return the per-worker pool for a payload, creating it on first use."""
+    global _pools_pid
+    key = _payload_key(payload)
+    with _pools_lock:
+        # Connections must never be shared across a fork (e.g. gunicorn --preload)
+        if os.getpid() != _pools_pid:
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            label = _pool_labels.get(key) or hashlib.sha1(repr(key).encode()).hexdigest()[:8]
+            pool = ConnectionPool(payload, label)
+            _pools[key] = pool
+        _start_reaper()
+    return pool
+
+
+def snowflake_query(query, payload, params=None, return_df=True):
+    """
+    Run a query on a pooled connection.
+
+    Args:
+        query: SQL with %s placeholders
+        payload: Connection payload dict (CONNECTION_PAYLOAD or PROD_PAYLOAD)
+        params: Optional tuple/list of bind parameters
+        return_df: Return the result set as a DataFrame (default). When False
+                   the statement is executed and the affected row count is returned.
+    """
+    with get_pool(payload).connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            if not return_df:
+                return cursor.rowcount
+            if cursor.description is None:
+                return pd.DataFrame()
+            columns = [col[0] for col in cursor.description]
+            return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+        finally:
+            cursor.close()
+
+
+def snowflake_query_rows(query, payload, params=None):
+    """
+    Run a query and return (column_names, rows) straight from the cursor,
+    without building a DataFrame (see row_serialization.tuple_records).
+    """
+    with get_pool(payload).connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            if cursor.description is None:
+                return [], []
+            return [col[0] for col in cursor.description], cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def snowflake_executemany(query, payload, seq_of_params):
+    """
+    Execute one statement for many parameter rows on a pooled connection.
+    For plain "INSERT ... VALUES (%s, ...)" statements (including
+    "INSERT ... SELECT ... FROM VALUES (%s, ...)") the connector rewrites
+    the batch into a single multi-row INSERT.
+    """
+    seq_of_params = list(seq_of_params)
+    if not seq_of_params:
+        return 0
+    with get_pool(payload).connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(query, seq_of_params)
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+
+def _in_list_chunks(keys, chunk_size):
+    """
+    Split keys into chunks of at most chunk_size, each padded (by repeating its
+    last key, which leaves IN semantics unchanged) to a power of two. Only a
+    handful of distinct statement texts are produced, whatever the key count.
+    """
+    chunks = []
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        width = 1
+        while width < len(chunk):
+            width *= 2
+        width = min(width, chunk_size)
+        chunks.append(chunk + [chunk[-1]] * (width - len(chunk)))
+    return chunks
+
+
+def snowflake_query_in_chunks(query, payload, keys, params_before=(), params_after=(),
+                              chunk_size=None, parallelism=None):
+    """
+    Run a query whose WHERE clause filters on a list of keys, in bounded,
+    parameter-bound chunks, and return the concatenated DataFrame.
+
+    Args:
+        query: SQL containing "{in_list}" where the bound placeholders go,
+               e.g. 'WHERE "Case Number" IN ({in_list})'
+        payload: Connection payload dict
+        keys: Values for the IN list (duplicates are removed, order is kept)
+        params_before / params_after: Bind parameters that precede / follow the IN list
+        chunk_size: Maximum keys per statement (default SNOWFLAKE_IN_LIST_CHUNK_SIZE)
+        parallelism: Maximum chunks in flight on the pool (default SNOWFLAKE_IN_LIST_PARALLELISM)
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return pd.DataFrame()
+    chunks = _in_list_chunks(keys, max(1, chunk_size or IN_LIST_CHUNK_SIZE))
+
+    def run(chunk):
+        statement = query.replace("{in_list}", ", ".join(["%s"] * len(chunk)))
+        return snowflake_query(statement, payload, tuple(params_before) + tuple(chunk) + tuple(params_after))
+
+    if len(chunks) == 1:
+        frames = [run(chunks[0])]
+    else:
+        workers = max(1, min(len(chunks), parallelism or IN_LIST_PARALLELISM, POOL_MAX_SIZE))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sf-in-list") as executor:
+            frames = list(executor.map(run, chunks))
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def pool_stats():
+    """Per-payload pool metrics for the /metrics endpoint."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.label: pool.stats() for pool in pools}
+
+
+def close_all():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def _start_reaper():
+    # Caller holds _pools_lock
+    global _reaper
+    if _reaper is not None and _reaper.is_alive():
+        return
+    _reaper = threading.Thread(target=_reap_loop, name="snowflake-pool-reaper", daemon=True)
+    _reaper.start()
+
+
+def _reap_loop():
+    while True:
+        time.sleep(POOL_REAP_INTERVAL)
+        with _pools_lock:
+            pools = list(_pools.values())
+        for pool in pools:
+            try:
+                pool.evict_idle()
+            except Exception as e:
+                print(f"⚠️ [SnowflakePool] Idle eviction failed for '{pool.label}': {e}")
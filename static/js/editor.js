@@ -612,11 +612,11 @@ class LanguageToolEditor {
                                 formData.append('audio', audioBlob, 'recording.wav');
                                 setTimeout(async () => {
                                     try {
-                                        const response = await fetch('/speech-to-text', {
-                                            method: 'POST',
-                                            body: formData
+                                        // Long recordings are transcribed in segments; show each as it arrives
+                                        const data = await this.fetchTranscriptionStream(formData, partial => {
+                                            fieldObj.editor.innerText = partial;
+                                            fieldObj.editor.classList.toggle('empty', !partial.trim());
                                         });
-                                        const data = await response.json();
                                         const transcription = data.transcription || '';
                                         
                                         // Check if the transcription indicates insufficient audio content
@@ -929,16 +929,9 @@ class LanguageToolEditor {
         }
         
         try {
-            const response = await fetch('/check', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ text: text })
-            });
+            const suggestionsRaw = await this.fetchIncrementalCheck(fieldObj, text);
             
             // Filter out ignored suggestions using robust key
-            const suggestionsRaw = await response.json();
             const suggestions = suggestionsRaw.filter(
                 s => !fieldObj.ignoredSuggestions.has(this.getSuggestionKey(s, text))
             );
@@ -963,6 +956,33 @@ class LanguageToolEditor {
         }
     }
     
+    // Check text via /check/incremental. Lines unchanged since the last check are sent
+    // as the hash the server returned for them, so only edited lines reach LanguageTool.
+    async fetchIncrementalCheck(fieldObj, text) {
+        const lines = text.split('\n');
+        const knownHashes = fieldObj.checkHashes || new Map();
+        const send = async (paragraphs) => {
+            const response = await fetch('/check/incremental', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ paragraphs })
+            });
+            return response.json();
+        };
+        
+        // A hash is only worth sending instead of lines longer than the hash itself
+        let data = await send(lines.map(line =>
+            line.length > 40 && knownHashes.has(line) ? { hash: knownHashes.get(line) } : line
+        ));
+        if (data.missing && data.missing.length) {
+            // The server no longer has some of those lines cached: send everything as text
+            data = await send(lines);
+        }
+        const hashes = data.hashes || [];
+        fieldObj.checkHashes = new Map(lines.map((line, i) => [line, hashes[i]]).filter(([, hash]) => hash));
+        return data.matches || [];
+    }
+    
     clearSuggestions(field) {
         this.fields[field].currentSuggestions = [];
         this.updateHighlights(field);
@@ -1317,12 +1337,15 @@ class LanguageToolEditor {
             // Capture the case number that this LLM call is for
             const llmCallCaseNumber = body.case_id;
             
-            const response = await fetch('/llm', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(body)
+            // Stream the call so criteria / rewrite text show up while the model is still generating
+            const data = await this.fetchLLMStream(body, (event, payload) => {
+                this.renderLLMProgress(field, event, payload, llmCallCaseNumber);
             });
-            const data = await response.json();
+            // Undo streamed partial text if the rewrite did not complete
+            if (answers && fieldObj.streamedRewrite && !(data.result && data.result.rewrite)) {
+                fieldObj.editor.innerText = fieldObj.prevVersionBeforeRewrite || text;
+            }
+            fieldObj.streamedRewrite = '';
             if (typeof data.result === 'object') {
                 // Preserve original text outside of result to avoid polluting evaluation object
                 fieldObj.lastOriginalText = text;
@@ -1497,6 +1520,123 @@ class LanguageToolEditor {
         }
     }
  
+    // POST to /llm/stream and read its Server-Sent Events. onEvent receives the
+    // "criterion" (step 1) and "delta" (step 2) events; resolves with the same
+    // { result } shape that /llm returns.
+    async fetchLLMStream(body, onEvent) {
+        const response = await fetch('/llm/stream', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+            body: JSON.stringify(body)
+        });
+        const contentType = response.headers.get('Content-Type') || '';
+        if (!contentType.includes('text/event-stream') || !response.body) {
+            return response.json();
+        }
+        
+        const result = await this.readEventStream(response, (event, payload) => {
+            if (event === 'result' || event === 'error') return { result: payload };
+            try {
+                onEvent(event, payload);
+            } catch (e) {
+                console.warn('⚠️ [LLM] Failed to render stream event:', e);
+            }
+        });
+        if (!result) throw new Error('LLM stream ended before a result was received');
+        return result;
+    }
+    
+    // POST a recording to /speech-to-text/stream. onPartial receives the transcript
+    // stitched so far after every segment; resolves with { transcription } like /speech-to-text.
+    async fetchTranscriptionStream(formData, onPartial) {
+        const response = await fetch('/speech-to-text/stream', {
+            method: 'POST',
+            headers: { 'Accept': 'text/event-stream' },
+            body: formData
+        });
+        const contentType = response.headers.get('Content-Type') || '';
+        if (!contentType.includes('text/event-stream') || !response.body) {
+            return response.json();
+        }
+        const result = await this.readEventStream(response, (event, payload) => {
+            if (event === 'result') return payload;
+            if (event === 'error') throw new Error(payload.error || 'Transcription failed');
+            if (event === 'partial') onPartial(payload.transcript || '');
+        });
+        if (!result) throw new Error('Transcription stream ended before a result was received');
+        return result;
+    }
+    
+    // Read a Server-Sent Events response, calling handler(event, payload) for each
+    // event. Stops and resolves with the first value the handler returns (undefined
+    // if the stream ends first).
+    async readEventStream(response, handler) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let event = 'message';
+                let dataLines = [];
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+                });
+                if (!dataLines.length) continue;
+                let handled;
+                try {
+                    handled = handler(event, JSON.parse(dataLines.join('\n')));
+                } catch (e) {
+                    reader.cancel().catch(() => {});
+                    throw e;
+                }
+                if (handled !== undefined) {
+                    reader.cancel().catch(() => {});
+                    return handled;
+                }
+            }
+        }
+        return undefined;
+    }
+    
+    // Show partial LLM output while the stream is in flight. The final result is
+    // rendered by displayLLMResult as before.
+    renderLLMProgress(field, event, payload, llmCallCaseNumber) {
+        const fieldObj = this.fields[field];
+        const currentCaseNumber = this.caseManager && this.caseManager.currentCase
+            ? this.caseManager.currentCase.caseNumber
+            : null;
+        if (currentCaseNumber !== llmCallCaseNumber) return;
+        
+        if (event === 'start') {
+            fieldObj.streamedCriteria = {};
+            fieldObj.streamedRewrite = '';
+        } else if (event === 'criterion') {
+            if (field !== this.activeField) return;
+            fieldObj.streamedCriteria = fieldObj.streamedCriteria || {};
+            fieldObj.streamedCriteria[payload.name] = payload.criterion;
+            const evalBox = document.getElementById('llm-eval-box');
+            if (!evalBox) return;
+            let html = '<div class="llm-score" style="font-size:1.2em;font-weight:700;color:#41007F;padding:10px 0;text-align:center;">Reviewing...</div>';
+            Object.keys(fieldObj.streamedCriteria).forEach(name => {
+                const criterion = fieldObj.streamedCriteria[name] || {};
+                const icon = criterion.passed ? '✅' : '❌';
+                html += `<div style="padding:4px 10px;">${icon} ${this.escapeHtml(criterion.display_name || name)}</div>`;
+            });
+            evalBox.innerHTML = html;
+            evalBox.style.display = 'block';
+        } else if (event === 'delta') {
+            fieldObj.streamedRewrite = (fieldObj.streamedRewrite || '') + (payload.text || '');
+            fieldObj.editor.innerText = fieldObj.streamedRewrite;
+        }
+    }
+    
     displayLLMResult(result, showRewrite, field = this.activeField, isNewEvaluation = false) {
         const fieldObj = this.fields[field];
         
@@ -1997,8 +2137,9 @@ class LanguageToolEditor {
     async loadRulesets() {
         try {
             const [ps, fsr] = await Promise.all([
-                fetch('/ruleset/problem_statement').then(res => res.json()),
-                fetch('/ruleset/fsr').then(res => res.json())
+                // 'no-cache' revalidates with the cached ETag, so unchanged rulesets come back as 304
+                fetch('/ruleset/problem_statement', { cache: 'no-cache' }).then(res => res.json()),
+                fetch('/ruleset/fsr', { cache: 'no-cache' }).then(res => res.json())
             ]);
  
             this.rulesets = { editor: ps, editor2: fsr };
@@ -2181,12 +2322,40 @@ class LanguageToolEditor {
             if (evalBox) { evalBox.innerHTML = ''; evalBox.style.display = 'none'; }
             const rewritePopup = document.getElementById('rewrite-popup');
             if (rewritePopup) { rewritePopup.style.display = 'none'; }
+            if (typeof historyItem === 'object' && historyItem.evaluationId) {
+                this.loadHistoryDetails(historyItem, field);
+            }
         }
         this.updateEditorLabelsWithScore();
         this.updateActiveEditorHighlight();
         this.checkText(field);
         // Overlay will be shown again when checkText completes and calls updateHighlights
     }
+
+    async loadHistoryDetails(historyItem, field) {
+        // DB history is listed without EVALUATION_DETAILS; fetch them when an item is opened
+        try {
+            const response = await fetch(`/api/cases/history/${historyItem.evaluationId}`);
+            if (!response.ok) {
+                console.warn(`⚠️ [History] Failed to load details for evaluation ${historyItem.evaluationId}`);
+                return;
+            }
+            const data = await response.json();
+            if (!data.evaluationDetails) return;
+            historyItem.llmLastResult = data.evaluationDetails;
+
+            // Only show it if the user has not moved on to other text meanwhile
+            const fieldObj = this.fields[field];
+            if (fieldObj.llmLastResult || fieldObj.editor.innerText.trim() !== historyItem.text.trim()) return;
+            fieldObj.llmLastResult = data.evaluationDetails;
+            fieldObj.isRestoringFromHistory = true;
+            const hasRewrite = data.evaluationDetails.rewrite || data.evaluationDetails.rewritten_problem_statement;
+            this.displayLLMResult(data.evaluationDetails, hasRewrite, field);
+            this.updateEditorLabelsWithScore();
+        } catch (error) {
+            console.error(`❌ [History] Error loading details for evaluation ${historyItem.evaluationId}:`, error);
+        }
+    }
  
     renderHistory() {
         if (!this.historyList) return;
@@ -2734,7 +2903,7 @@ class CaseManager {
         this.currentCase = null;
         this.caseCounter = 1;
         this.userId = null;
-        this.preloadedSuggestions = []; // Cache for case suggestions
+        this.suggestionTotal = null; // Number of CRM cases available to the user (from preload)
         // Don't call init() here - will be called from outside
     }
     
@@ -2830,31 +2999,18 @@ class CaseManager {
     }
     
     async preloadCaseSuggestions() {
+        // Suggestions are searched server-side; this only warms the user's
+        // suggestion index so the first keystroke is answered from memory
         try {
-            const response = await fetch('/api/cases/suggestions/preload');
+            const response = await fetch('/api/cases/suggestions/preload?limit=1');
             if (response.ok) {
                 const data = await response.json();
-                this.preloadedSuggestions = data.case_numbers || [];
-                const totalCases = this.preloadedSuggestions.length;
-                const filteredByEmail = data.filtered_by_email || 'unknown';
-                
-                // Log sample of 5 case numbers for testing
-                if (totalCases > 0) {
-                    const sampleCount = Math.min(5, totalCases);
-                    const sampleCases = this.preloadedSuggestions.slice(0, sampleCount);
-                    
-                    // Log types of case numbers
-                    if (sampleCases.length > 0) {
-                    }
-                } else {
-                }
+                this.suggestionTotal = data.total;
             } else {
                 console.error('❌ [CaseManager] Failed to preload suggestions:', response.status);
-                this.preloadedSuggestions = [];
             }
         } catch (error) {
             console.error('❌ [CaseManager] Error preloading suggestions:', error);
-            this.preloadedSuggestions = [];
         }
     }
     
@@ -3294,26 +3450,18 @@ class CaseManager {
         
         
         try {
-            // Parallelize Step 1 and Step 2 - they query similar data and can run concurrently
-            const cacheBust = Date.now();
-            
-            const [userCasesResponse, caseDataResponse] = await Promise.all([
-                fetch(`/api/cases/user-cases?cache_bust=${cacheBust}`),
-                fetch(`/api/cases/data?cache_bust=${cacheBust}`)
-            ]);
-            
-            if (!userCasesResponse.ok) {
-                throw new Error(`Failed to fetch user cases: ${userCasesResponse.status} ${userCasesResponse.statusText}`);
-            }
+            // One round trip for cases, titles, latest inputs and feedback flags.
+            // The response has an ETag: the browser revalidates with If-None-Match
+            // and an unchanged dashboard comes back as a 304 from the server.
+            const dashboardResponse = await fetch('/api/cases/dashboard', {
+                cache: forceRefresh ? 'no-cache' : 'default'
+            });
             
-            if (!caseDataResponse.ok) {
-                throw new Error(`Failed to fetch case data: ${caseDataResponse.status} ${caseDataResponse.statusText}`);
+            if (!dashboardResponse.ok) {
+                throw new Error(`Failed to fetch case dashboard: ${dashboardResponse.status} ${dashboardResponse.statusText}`);
             }
             
-            const [userCasesData, caseData] = await Promise.all([
-                userCasesResponse.json(),
-                caseDataResponse.json()
-            ]);
+            const caseData = await dashboardResponse.json();
             
             // Convert backend format to frontend format
             const backendCases = caseData.cases || {};
@@ -3343,6 +3491,7 @@ class CaseManager {
                     createdAt: new Date(caseData.updatedAt || Date.now()),
                     updatedAt: new Date(caseData.updatedAt || Date.now()),
                     lastAccessedAt: lastAccessedAt,
+                    needsFeedback: !!caseData.needsFeedback,
                     isTrackedInDatabase: true // All cases from database are tracked
                 };
                 
@@ -3613,10 +3762,12 @@ class CaseManager {
                 // Get existing in-session history
                 const existingHistory = field.history || [];
                 
-                // Convert DB history to full format with evaluation details
+                // Convert DB history to full format; evaluation details are fetched on demand
+                // (see SpellCheckEditor.loadHistoryDetails) using evaluationId
                 const dbHistoryEntries = dbHistory.map(item => ({
                     text: item.text,
-                    llmLastResult: item.evaluationDetails || null,  // Full evaluation/rewrite details from JSON!
+                    llmLastResult: item.evaluationDetails || null,
+                    evaluationId: item.id,
                     score: item.score,
                     timestamp: item.timestamp,
                     isRewrite: item.isRewrite,
@@ -3770,10 +3921,12 @@ class CaseManager {
             
             let isTrackedInDatabase = true;
             let untrackedCaseTitle = null;
+            let crmCaseTitle = null; // Title looked up by /api/cases/create, if any
             
             if (createResponse.ok) {
                 const createData = await createResponse.json();
                 console.log(`✅ [CaseManager] Successfully created case ${caseNumberValue} in database:`, createData);
+                crmCaseTitle = createData.case_title || null;
                 
                 // Check for CRM warning (case not found in CRM)
                 if (createData.warning) {
@@ -3891,7 +4044,7 @@ class CaseManager {
         const newCase = {
             id: caseNumberValue, // Use case number as ID for consistency
             caseNumber: caseNumberValue,
-            caseTitle: untrackedCaseTitle || null, // Store the title if provided
+            caseTitle: untrackedCaseTitle || crmCaseTitle || null, // Store the title if known
             problemStatement: '',
             fsrNotes: '',
             createdAt: new Date(),
@@ -3917,8 +4070,8 @@ class CaseManager {
                 console.log(`🔍 [CaseManager] Fetching CRM data for case ${caseNumberValue}`);
                 
                 try {
-                    // Fetch title
-                    const response = await fetch('/api/cases/titles', {
+                    // Fetch title (unless the create response already carried it)
+                    const response = crmCaseTitle ? null : await fetch('/api/cases/titles', {
                         method: 'POST',
                         headers: {
                             'Content-Type': 'application/json'
@@ -3928,7 +4081,7 @@ class CaseManager {
                         })
                     });
                     
-                    if (response.ok) {
+                    if (response && response.ok) {
                         const data = await response.json();
                         if (data && data.titles && data.titles[String(caseNumberValue)]) {
                             const caseIndex = this.cases.findIndex(c => c.caseNumber === caseNumberValue);
@@ -4072,8 +4225,8 @@ class CaseManager {
             if (editor1Field && editor1Field.history && editor1Field.history.length > 0) {
                 const mostRecent = editor1Field.history[0];  // Most recent (sorted DESC)
                 
-                // Only auto-load if it has full evaluation details
-                if (mostRecent.llmLastResult) {
+                // Only auto-load if it has (or can fetch) full evaluation details
+                if (mostRecent.llmLastResult || mostRecent.evaluationId) {
                     console.log(`📥 [CaseManager] Auto-loading most recent evaluation for problem statement`);
                     window.spellCheckEditor.restoreFromHistory(mostRecent, 'editor');
                 }
@@ -5029,9 +5182,9 @@ class CaseManager {
             let currentFilteringQuery = null;
             let currentAbortController = null; // For cancelling in-flight title requests
             
-            // Function to filter preloaded suggestions and fetch titles
+            // Function to fetch matching suggestions (with titles) from the server-side index
             const filterSuggestions = async (query) => {
-                // Cancel any in-flight title requests for previous queries
+                // Cancel any in-flight request for previous queries
                 if (currentAbortController) {
                     currentAbortController.abort();
                     currentAbortController = null;
@@ -5047,86 +5200,50 @@ class CaseManager {
                     return;
                 }
                 
-                // Check if preloadedSuggestions is populated
-                if (!this.preloadedSuggestions || this.preloadedSuggestions.length === 0) {
-                    console.warn(`⚠️ [CaseManager] Preloaded suggestions not available yet`);
-                    suggestionsData = [];
-                    displaySuggestions();
-                    return;
-                }
-                
-                // Filter preloaded suggestions (already filtered by email) - no database queries
-                const queryLower = query.toLowerCase();
-                const filteredCases = this.preloadedSuggestions.filter(caseNum => {
-                    const caseNumStr = caseNum.toString().toLowerCase();
-                    return caseNumStr.startsWith(queryLower);
-                }).slice(0, 10); // Limit to 10 suggestions
-                
-                // Build initial suggestions data (without titles)
-                suggestionsData = filteredCases.map(caseNum => ({
-                    caseNumber: caseNum,
-                    caseName: null // Will be fetched next
-                }));
+                // Create new AbortController for this request
+                const abortController = new AbortController();
+                currentAbortController = abortController;
                 
-                // Display suggestions immediately (with "Available in CRM" placeholder)
-                displaySuggestions();
+                // Store the query this request is for
+                const requestQuery = query;
                 
-                // Fetch titles for filtered cases in background
-                if (filteredCases.length > 0) {
-                    // Create new AbortController for this request
-                    const abortController = new AbortController();
-                    currentAbortController = abortController;
+                try {
+                    const params = new URLSearchParams({ q: query, limit: '10' });
+                    const response = await fetch(`/api/cases/suggestions?${params}`, {
+                        signal: abortController.signal
+                    });
                     
-                    // Store the query this request is for
-                    const requestQuery = query;
+                    // Check if this request is still relevant (query hasn't changed)
+                    if (currentFilteringQuery !== requestQuery) {
+                        return;
+                    }
                     
-                    try {
-                        const response = await fetch('/api/cases/titles', {
-                            method: 'POST',
-                            headers: {
-                                'Content-Type': 'application/json'
-                            },
-                            body: JSON.stringify({
-                                case_numbers: filteredCases
-                            }),
-                            signal: abortController.signal
-                        });
+                    if (response.ok) {
+                        const data = await response.json();
                         
-                        // Check if this request is still relevant (query hasn't changed)
+                        // Double-check query hasn't changed while processing
                         if (currentFilteringQuery !== requestQuery) {
                             return;
                         }
                         
-                        if (response.ok) {
-                            const data = await response.json();
-                            const titles = data.titles || {};
-                            
-                            // Double-check query hasn't changed while processing
-                            if (currentFilteringQuery !== requestQuery) {
-                                return;
-                            }
-                            
-                            // Update suggestions with titles
-                            suggestionsData = filteredCases.map(caseNum => ({
-                                caseNumber: caseNum,
-                                caseName: titles[String(caseNum)] || null
-                            }));
-                            
-                            displaySuggestions(); // Re-render with titles
-                        } else {
-                            console.warn(`⚠️ [CaseManager] Failed to fetch titles: ${response.status}`);
-                        }
-                    } catch (error) {
-                        // Ignore abort errors (expected when cancelling)
-                        if (error.name !== 'AbortError') {
-                            console.error(`❌ [CaseManager] Error fetching titles:`, error);
-                        }
-                        // Continue with suggestions without titles
-                    } finally {
-                        // Clear abort controller if this was the current request
-                        if (currentAbortController === abortController) {
-                            currentAbortController = null;
-                        }
+                        // Suggestions are already filtered by email on the server
+                        suggestionsData = (data.suggestions || []).map(suggestion => ({
+                            caseNumber: suggestion.case_number,
+                            caseName: suggestion.title || null
+                        }));
+                        displaySuggestions();
+                    } else {
+                        console.warn(`⚠️ [CaseManager] Failed to fetch suggestions: ${response.status}`);
+                    }
+                } catch (error) {
+                    // Ignore abort errors (expected when cancelling)
+                    if (error.name !== 'AbortError') {
+                        console.error(`❌ [CaseManager] Error fetching suggestions:`, error);
+                    }
+                } finally {
+                    // Clear abort controller if this was the current request
+                    if (currentAbortController === abortController) {
+                        currentAbortController = null;
                     }
                 }
             };
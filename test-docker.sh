@@ -369,7 +369,7 @@ if [ "$APP_READY" = false ]; then
     echo "  ${YELLOW}If database connection is failing:${NC}"
     echo "  • Check config.yaml Snowflake credentials are correct"
     echo "  • Verify network/firewall allows connection to Snowflake"
-    echo "  • Test credentials manually: docker-compose exec app python -c 'from snowflakeconnection import *; print(\"Test connection\")'"
+    echo "  • Test credentials manually: docker-compose exec app python -c 'from snowflake_pool import *; print(\"Test connection\")'"
     echo "  • Check if using correct DEV_MODE setting in config.yaml"
     echo ""
     echo "  ${YELLOW}Memory-related fixes:${NC}"
@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lt_client import LanguageToolClient
+
+
+class _Response:
+    def __init__(self, payload, status_code=200):
+        self.content = json.dumps(payload).encode("utf-8")
+        self.text = self.content.decode("utf-8")
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        pass
+
+
+class _Session:
+    """Stands in for requests.Session and answers /v2/check with fixed matches."""
+
+    def __init__(self, matches):
+        self.matches = matches
+
+    def post(self, url, data=None, timeout=None):
+        return _Response({"matches": self.matches})
+
+
+def _client(matches):
+    client = LanguageToolClient("http://languagetool.test")
+    client._session = _Session(matches)
+    return client
+
+
+def _utf16_span(text, word):
+    start = text.index(word)
+    return (len(text[:start].encode("utf-16-le")) // 2,
+            len(word.encode("utf-16-le")) // 2)
+
+
+class LanguageToolClientOffsetsTest(unittest.TestCase):
+
+    def test_offsets_after_emoji_are_python_indices(self):
+        text = "Great job 👍 but teh pump failed"
+        offset, length = _utf16_span(text, "teh")
+        self.assertNotEqual(offset, text.index("teh"))
+
+        match, = _client([{"offset": offset, "length": length, "message": "Typo",
+                           "replacements": [{"value": "the"}], "rule": {"id": "MORFOLOGIK_RULE_EN_US"}}]
+                         ).check(text)
+
+        self.assertEqual(text[match.offset:match.offset + match.errorLength], "teh")
+        self.assertEqual(match.replacements, ["the"])
+
+    def test_match_spanning_emoji(self):
+        text = "Pump 🔧🔧 broke"
+        offset, length = _utf16_span(text, "🔧🔧 broke")
+
+        match, = _client([{"offset": offset, "length": length, "rule": {"id": "X"}}]).check(text)
+
+        self.assertEqual(text[match.offset:match.offset + match.errorLength], "🔧🔧 broke")
+
+    def test_bmp_text_offsets_unchanged(self):
+        text = "Café naïve teh"
+        match, = _client([{"offset": 11, "length": 3, "rule": {"id": "X"}}]).check(text)
+
+        self.assertEqual((match.offset, match.errorLength), (11, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
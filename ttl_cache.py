@@ -0,0 +1,353 @@
+"""
+Small thread-safe LRU cache with per-entry TTL and hit/miss counters, plus an
+optional shared tier (SQLite file or Redis) so several gunicorn workers can
+see the same entries.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire after a TTL.
+
+    Args:
+        max_size: Maximum number of entries; least recently used entries are evicted first
+        ttl: Default time-to-live in seconds for each entry
+        name: Label used in stats()
+    """
+
+    def __init__(self, max_size=1024, ttl=300, name="cache"):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.name = name
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self._misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys that are present and not expired."""
+        found = {}
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def set_many(self, items, ttl=None):
+        for key, value in items.items():
+            self.set(key, value, ttl=ttl)
+
+    def purge_expired(self):
+        """Drop every expired entry. Returns the number removed."""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+            self._expirations += len(expired)
+        return len(expired)
+
+    def start_sweeper(self, interval=60):
+        """Purge expired entries periodically in a daemon thread (in addition to lazy expiry on get)."""
+        _start_sweeper(self, interval)
+
+    def invalidate(self, key):
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+            }
+
+
+def _start_sweeper(cache, interval):
+    def sweep():
+        while True:
+            time.sleep(interval)
+            try:
+                cache.purge_expired()
+            except Exception as e:
+                print(f"⚠️ [Cache] Sweep failed for '{cache.name}': {e}")
+
+    threading.Thread(target=sweep, name=f"{cache.name}-sweeper", daemon=True).start()
+
+
+class SQLiteCacheBackend:
+    """
+    Shared cache tier stored in a local SQLite file. All workers on the host
+    open the same file, so an entry written by one worker is visible to the rest.
+    Values must be JSON-serializable.
+    """
+
+    _CHUNK = 500
+
+    def __init__(self, path, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        keys = [str(k) for k in keys]
+        found = {}
+        now = time.time()
+        conn = self._conn()
+        for i in range(0, len(keys), self._CHUNK):
+            chunk = keys[i:i + self._CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"SELECT key, value FROM cache WHERE key IN ({placeholders}) AND expires_at > ?",
+                (*chunk, now),
+            ).fetchall()
+            for key, value in rows:
+                found[key] = json.loads(value)
+        return found
+
+    def set_many(self, items, ttl):
+        expires_at = time.time() + ttl
+        rows = [(str(k), json.dumps(v), expires_at) for k, v in items.items()]
+        with self._conn() as conn:
+            conn.executemany("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)", rows)
+
+    def delete(self, key):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (str(key),))
+
+    def purge_expired(self):
+        with self._conn() as conn:
+            removed = conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            # Keep the file bounded: drop the entries closest to expiry first
+            overflow = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at LIMIT ?)",
+                    (overflow,),
+                )
+                removed += overflow
+        return removed
+
+    def describe(self):
+        return f"sqlite:{self.path}"
+
+
+class RedisCacheBackend:
+    """Shared cache tier in Redis (or any Redis-protocol server). Requires the optional redis package."""
+
+    def __init__(self, url, prefix="fsrcoach:"):
+        import redis  # optional dependency, only needed when a redis:// backend is configured
+
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+
+    def get_many(self, keys):
+        keys = [str(k) for k in keys]
+        if not keys:
+            return {}
+        values = self._client.mget([self.prefix + k for k in keys])
+        return {k: json.loads(v) for k, v in zip(keys, values) if v is not None}
+
+    def set_many(self, items, ttl):
+        pipe = self._client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.setex(self.prefix + str(key), max(1, int(ttl)), json.dumps(value))
+        pipe.execute()
+
+    def delete(self, key):
+        self._client.delete(self.prefix + str(key))
+
+    def purge_expired(self):
+        return 0  # Redis expires keys itself
+
+    def describe(self):
+        return "redis"
+
+
+def make_cache_backend(url):
+    """
+    Build a shared backend from a URL:
+        ""                      -> None (per-worker memory only)
+        "sqlite:///path/to.db"  -> SQLiteCacheBackend
+        "redis://host:6379/0"   -> RedisCacheBackend
+    """
+    if not url:
+        return None
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+        # An in-memory database is private to one connection (here: one thread),
+        # so it would silently share nothing
+        if not path or path == ":memory:":
+            raise ValueError(f"SQLite cache backend needs a file path shared by the workers: {url}")
+        return SQLiteCacheBackend(path)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unsupported cache backend URL: {url}")
+
+
+class SharedTTLCache:
+    """
+    Two-tier cache: a per-worker TTLCache in front of an optional shared backend.
+
+    The local tier keeps a shorter TTL (local_ttl) when a shared backend is
+    configured, so workers converge on the shared value quickly. Backend errors
+    are logged and counted, and the cache degrades to the local tier.
+
+    Several caches can share one backend: their keys are stored as
+    "<name>:<key>", and results are returned under the caller's original keys.
+    """
+
+    def __init__(self, name, max_size=10000, ttl=300, backend=None, local_ttl=30, sweep_interval=60):
+        self.name = name
+        self.ttl = ttl
+        self.backend = backend
+        self._local_ttl = min(ttl, local_ttl) if backend is not None else ttl
+        self.local = TTLCache(max_size=max_size, ttl=self._local_ttl, name=name)
+        self._lock = threading.Lock()
+        self._backend_hits = 0
+        self._backend_misses = 0
+        self._backend_errors = 0
+        if sweep_interval:
+            _start_sweeper(self, sweep_interval)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = self.local.get_many(keys)
+        missing = [k for k in keys if k not in found]
+        if missing and self.backend is not None:
+            shared_keys = {self._shared_key(k): k for k in missing}
+            try:
+                shared = {shared_keys[k]: v for k, v in self.backend.get_many(list(shared_keys)).items()
+                          if k in shared_keys}
+            except Exception as e:
+                self._count_backend_error(e)
+                shared = {}
+            with self._lock:
+                self._backend_hits += len(shared)
+                self._backend_misses += len(missing) - len(shared)
+            if shared:
+                self.local.set_many(shared)
+                found.update(shared)
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, items, ttl=None):
+        if not items:
+            return
+        self.local.set_many(items, ttl=min(self._local_ttl, ttl) if ttl else None)
+        if self.backend is not None:
+            try:
+                self.backend.set_many({self._shared_key(k): v for k, v in items.items()}, ttl or self.ttl)
+            except Exception as e:
+                self._count_backend_error(e)
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl=ttl)
+
+    def invalidate(self, key):
+        self.local.invalidate(key)
+        if self.backend is not None:
+            try:
+                self.backend.delete(self._shared_key(key))
+            except Exception as e:
+                self._count_backend_error(e)
+
+    def purge_expired(self):
+        removed = self.local.purge_expired()
+        if self.backend is not None:
+            try:
+                removed += self.backend.purge_expired()
+            except Exception as e:
+                self._count_backend_error(e)
+        return removed
+
+    def stats(self):
+        stats = self.local.stats()
+        stats.update({
+            "ttl": self.ttl,
+            "local_ttl": self._local_ttl,
+            "backend": self.backend.describe() if self.backend is not None else None,
+            "backend_hits": self._backend_hits,
+            "backend_misses": self._backend_misses,
+            "backend_errors": self._backend_errors,
+        })
+        return stats
+
+    def _shared_key(self, key):
+        return f"{self.name}:{key}"
+
+    def _count_backend_error(self, error):
+        with self._lock:
+            self._backend_errors += 1
+        print(f"⚠️ [Cache] Shared backend error in '{self.name}': {error}")
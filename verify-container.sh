@@ -121,7 +121,7 @@ signal.signal(signal.SIGALRM, timeout_handler)
 signal.alarm(10)  # 10 second timeout
 
 try:
-    from snowflakeconnection import snowflake_query
+    from snowflake_pool import snowflake_query
     
     with open('/app/config.yaml', 'r') as f:
         config = yaml.safe_load(f)